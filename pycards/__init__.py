@@ -1,7 +1,3 @@
 """
 Module for all the fundamental elements of a card game
 """
-
-import logging
-
-logging.basicConfig(level=logging.DEBUG)
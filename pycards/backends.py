@@ -0,0 +1,279 @@
+"""
+Interchangeable implementations of the random number and bulk scoring
+primitives used by the cards and games.
+
+The "python" backend only uses the standard library. The "numpy" backend
+uses NumPy's random generators (so games are reproducible from NumPy seeds
+and SeedSequences) and vectorised scoring. Neither is imported until it's
+first used, so importing pycards doesn't import NumPy.
+
+The backend is chosen by the PYCARDS_BACKEND environment variable, and
+otherwise is "numpy" when NumPy is installed, or "python" when it isn't.
+Use `set_backend` to change it at run time, or `register_backend` to add a
+new one.
+
+Backends don't import any of pycards, since the cards and games use them.
+Each backend's cribbage scoring is in the module named by its
+hand_scoring_module, imported on first use.
+"""
+
+import importlib
+import importlib.util
+import os
+import random
+from typing import (
+    Any,
+    Dict,
+    List,
+    MutableSequence,
+    Optional,
+    Protocol,
+    Sequence,
+    Type,
+    Union,
+)
+
+BACKEND_ENV_VAR = "PYCARDS_BACKEND"
+
+
+class RandomGenerator(Protocol):
+    """
+    The parts of numpy.random.Generator that pycards relies on, which every
+    backend's random number generators provide
+    """
+
+    def integers(self, low: int, high: Optional[int] = None) -> int:
+        """
+        A random integer in [low, high), or [0, low) if high is None
+        """
+
+    def choice(
+        self, a: Union[int, Sequence], size: Optional[int] = None, replace: bool = True
+    ) -> Any:
+        """
+        Random elements of a (or of range(a), if it is an int)
+        """
+
+    def shuffle(self, x: MutableSequence) -> None:
+        """
+        Shuffle a sequence in place
+        """
+
+    def random(self) -> float:
+        """
+        A random float in [0, 1)
+        """
+
+
+class PythonRandom(random.Random):
+    """
+    random.Random with the numpy.random.Generator methods in RandomGenerator
+    """
+
+    def integers(self, low: int, high: Optional[int] = None) -> int:
+        """
+        A random integer in [low, high), or [0, low) if high is None
+        """
+
+        if high is None:
+            low, high = 0, low
+        return self.randrange(low, high)
+
+    def choice(
+        self,
+        seq: Union[int, Sequence],
+        size: Optional[int] = None,
+        replace: bool = True,
+    ) -> Any:
+        """
+        Random elements of seq (or of range(seq), if it is an int). Returns a
+        single element if size is None, otherwise a list of size elements.
+        """
+
+        population = range(seq) if isinstance(seq, int) else seq
+        if size is None:
+            return population[self.randrange(len(population))]
+        if replace:
+            return self.choices(population, k=size)
+
+        return self.sample(population, size)
+
+
+class Backend:
+    """
+    Base class of the backends, whose methods each backend implements
+    """
+
+    name = ""
+    # module with score_hands(hands, turn_ups, is_crib) for this backend
+    hand_scoring_module = ""
+
+    def default_rng(self, seed: Any = None) -> RandomGenerator:
+        """
+        A random number generator, seeded from seed if it isn't None
+        """
+        raise NotImplementedError()
+
+    def spawn_seeds(self, seed: Any, n_seeds: int) -> List[Any]:
+        """
+        n_seeds independent seeds derived from seed (randomly, if it's None),
+        for seeding default_rng
+        """
+        raise NotImplementedError()
+
+    def shuffled_decks(self, n_decks: int, deck_size: int, rng: RandomGenerator) -> Any:
+        """
+        n_decks independently shuffled decks of the card indices
+        range(deck_size), one per row. rng must come from this backend's
+        default_rng.
+        """
+        raise NotImplementedError()
+
+    def score_hands(
+        self,
+        hands: Sequence[Sequence[int]],
+        turn_ups: Sequence[int],
+        is_crib: bool = False,
+    ) -> Any:
+        """
+        The cribbage scores of N 4 card hands (as card indices) with their
+        turn up cards, the same as `Cribbage.score_hand`
+        """
+
+        module = importlib.import_module(self.hand_scoring_module)
+        return module.score_hands(hands, turn_ups, is_crib)
+
+
+class PythonBackend(Backend):
+    """
+    Standard library only. Decks are bytearrays, and scores lists of ints.
+    """
+
+    name = "python"
+    hand_scoring_module = "pycards.games.cribbage.scoring"
+
+    def default_rng(self, seed: Any = None) -> RandomGenerator:
+        return PythonRandom(seed)
+
+    def spawn_seeds(self, seed: Any, n_seeds: int) -> List[Any]:
+
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(128)
+        return [f"{seed}/{i}" for i in range(n_seeds)]
+
+    def shuffled_decks(
+        self, n_decks: int, deck_size: int, rng: RandomGenerator
+    ) -> List[bytearray]:
+
+        decks = []
+        for _ in range(n_decks):
+            deck = bytearray(range(deck_size))
+            rng.shuffle(deck)
+            decks.append(deck)
+        return decks
+
+
+class NumpyBackend(Backend):
+    """
+    NumPy random generators and vectorised scoring. Decks and scores are
+    NumPy arrays.
+    """
+
+    name = "numpy"
+    hand_scoring_module = "pycards.games.cribbage.vectorized"
+
+    def __init__(self):
+
+        # pylint: disable=import-outside-toplevel
+        import numpy
+
+        self.np = numpy
+
+    def default_rng(self, seed: Any = None) -> RandomGenerator:
+        return self.np.random.default_rng(seed)
+
+    def spawn_seeds(self, seed: Any, n_seeds: int) -> List[Any]:
+
+        if not isinstance(seed, self.np.random.SeedSequence):
+            seed = self.np.random.SeedSequence(seed)
+        return seed.spawn(n_seeds)
+
+    def shuffled_decks(self, n_decks: int, deck_size: int, rng: RandomGenerator) -> Any:
+
+        # shuffled with Generator.permuted, which other generators don't have
+        if not isinstance(rng, self.np.random.Generator):
+            raise TypeError(
+                f"The {self.name} backend needs a numpy.random.Generator,"
+                f" not {type(rng).__name__}"
+            )
+
+        decks = self.np.tile(
+            self.np.arange(deck_size, dtype=self.np.int8), (n_decks, 1)
+        )
+        return rng.permuted(decks, axis=1, out=decks)
+
+
+BACKENDS: Dict[str, Type[Backend]] = {
+    PythonBackend.name: PythonBackend,
+    NumpyBackend.name: NumpyBackend,
+}
+
+_backends: Dict[str, Backend] = {}
+# the name of the default backend, under "name" once it's been chosen
+_default: Dict[str, str] = {}
+
+
+def register_backend(name: str, backend_class: Type[Backend]) -> None:
+    """
+    Make a new backend available to get_backend and set_backend
+    """
+    BACKENDS[name] = backend_class
+
+
+def _choose_default_name() -> str:
+
+    name = os.environ.get(BACKEND_ENV_VAR)
+    if name:
+        return name
+
+    if importlib.util.find_spec("numpy") is not None:
+        return NumpyBackend.name
+
+    return PythonBackend.name
+
+
+def get_backend(name: Optional[str] = None) -> Backend:
+    """
+    The named backend, or the current default one, creating it on first use
+    """
+
+    if name is None:
+        if "name" not in _default:
+            _default["name"] = _choose_default_name()
+        name = _default["name"]
+
+    if name not in _backends:
+        if name not in BACKENDS:
+            raise ValueError(
+                f"Unknown backend {name}, expected one of {', '.join(BACKENDS)}"
+            )
+        _backends[name] = BACKENDS[name]()
+
+    return _backends[name]
+
+
+def set_backend(name: str) -> Backend:
+    """
+    Make the named backend the default, returning it
+    """
+
+    backend = get_backend(name)
+    _default["name"] = name
+    return backend
+
+
+def default_rng(seed: Any = None) -> RandomGenerator:
+    """
+    A random number generator from the default backend
+    """
+    return get_backend().default_rng(seed)
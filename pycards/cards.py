@@ -2,14 +2,24 @@
 Code for manipulating individual cards and groups of cards
 """
 
-import random
 from collections import Counter, defaultdict
 from dataclasses import dataclass
 from enum import Enum
-from itertools import product
-from typing import List, Union
-
-import numpy as np
+from itertools import combinations, product
+from math import factorial, prod
+from numbers import Integral
+from typing import (
+    Any,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from pycards.backends import RandomGenerator, default_rng, get_backend
 
 FACE_VALUE_TO_STR = {
     0: "A",
@@ -29,6 +39,19 @@ FACE_VALUE_TO_STR = {
 
 STR_TO_FACE_VALUE = {s: v for v, s in FACE_VALUE_TO_STR.items()}
 
+N_FACE_VALUES = 13
+N_SUITS = 4
+DECK_SIZE = N_FACE_VALUES * N_SUITS
+FULL_DECK_MASK = (1 << DECK_SIZE) - 1
+
+
+def _get_rng(rng: Optional[RandomGenerator]) -> RandomGenerator:
+    """
+    The given random number generator, or a freshly seeded one from the
+    default backend if it is None
+    """
+    return rng if rng is not None else default_rng()
+
 
 class FaceValue(Enum):
     """
@@ -92,14 +115,38 @@ class Suit(Enum):
         raise ValueError(f"Can't make a card from suit string {string}")
 
 
-@dataclass(frozen=True)
 class Card:
     """
-    Dataclass to store info about a single card
+    A single playing card.
+
+    There are exactly 52 Card objects, created when this module is imported.
+    Card(suit, value), Card.from_string and Card.from_index all return one of
+    them, so equal cards are always the same object and compare by identity.
+
+    Every card has an integer index between 0 and 51, ordered first by suit
+    and then by face value, which is also its hash and is the compact
+    encoding used by `CardSet` and the other array based representations of
+    cards.
     """
 
+    __slots__ = ("suit", "value", "index", "_repr")
+
     suit: Suit
     value: FaceValue
+    index: int
+    _repr: str
+
+    def __new__(cls, suit: Suit, value: FaceValue):
+        try:
+            return _CARDS_BY_SUIT_AND_VALUE[suit, value]
+        except KeyError:
+            raise ValueError(f"Can't make a card from {suit} and {value}") from None
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Cards can't be modified")
+
+    def __delattr__(self, name):
+        raise AttributeError("Cards can't be modified")
 
     def __lt__(self, other):
         """
@@ -108,10 +155,20 @@ class Card:
         return self.value < other.value
 
     def __repr__(self):
-        return f"{self.value.single_char_rep()}{self.suit.name[0]}"
+        return self._repr
 
     def __hash__(self):
-        return self.suit.__hash__() + self.value.__hash__()
+        return self.index
+
+    def __reduce__(self):
+        # unpickle to the canonical card, e.g. in other processes
+        return (Card.from_index, (self.index,))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
 
     @classmethod
     def from_string(cls, card_str: str):
@@ -125,6 +182,10 @@ class Card:
         TS = Ten of Spades
         """
 
+        card = _CARDS_BY_STRING.get(card_str)
+        if card is not None:
+            return card
+
         if len(card_str) != 2:
             raise ValueError(f"The card string {card_str} is in the wrong format")
 
@@ -133,9 +194,149 @@ class Card:
 
         return cls(suit=suit, value=value)
 
+    @classmethod
+    def from_index(cls, index: int) -> "Card":
+        """
+        Returns the card with the given integer index (between 0 and 51)
+        """
+
+        if not 0 <= index < DECK_SIZE:
+            raise ValueError(f"Card index {index} out of range")
+
+        return CARDS_BY_INDEX[index]
+
+
+def _make_card(suit: Suit, value: FaceValue) -> Card:
+    """
+    Makes one of the 52 canonical cards. Only called at import time.
+    """
+
+    card = object.__new__(Card)
+    object.__setattr__(card, "suit", suit)
+    object.__setattr__(card, "value", value)
+    object.__setattr__(card, "index", (suit.value - 1) * N_FACE_VALUES + value.value)
+    object.__setattr__(card, "_repr", f"{value.single_char_rep()}{suit.name[0]}")
+    return card
+
+
+CARDS_BY_INDEX = tuple(_make_card(suit, value) for suit in Suit for value in FaceValue)
+
+_CARDS_BY_SUIT_AND_VALUE = {(card.suit, card.value): card for card in CARDS_BY_INDEX}
+
+# every upper/lower case spelling of each card, e.g. "AH", "aH", "Ah" and "ah"
+_CARDS_BY_STRING = {
+    value_char + suit_char: card
+    for card in CARDS_BY_INDEX
+    for value_char in (repr(card)[0].upper(), repr(card)[0].lower())
+    for suit_char in (repr(card)[1].upper(), repr(card)[1].lower())
+}
+
+
+@dataclass(frozen=True)
+class CardSet:
+    """
+    Set of distinct cards, stored as a 52 bit mask of card indices.
+
+    Union, intersection, difference, membership and size are all single
+    integer operations, so this is the representation to use in hot loops.
+    """
+
+    mask: int = 0
+
+    def __contains__(self, card: Card) -> bool:
+        return bool(self.mask >> card.index & 1)
+
+    def __len__(self) -> int:
+        return self.mask.bit_count()
+
+    def __bool__(self) -> bool:
+        return self.mask != 0
+
+    def __iter__(self) -> Iterator[Card]:
+        mask = self.mask
+        while mask:
+            lowest_bit = mask & -mask
+            yield CARDS_BY_INDEX[lowest_bit.bit_length() - 1]
+            mask ^= lowest_bit
+
+    def __or__(self, other: "CardSet") -> "CardSet":
+        return CardSet(self.mask | other.mask)
+
+    def __and__(self, other: "CardSet") -> "CardSet":
+        return CardSet(self.mask & other.mask)
+
+    def __sub__(self, other: "CardSet") -> "CardSet":
+        return CardSet(self.mask & ~other.mask)
+
+    def __repr__(self) -> str:
+        return " ".join([str(card) for card in self])
+
+    def add(self, card: Card) -> "CardSet":
+        """
+        Returns a new set which also contains the given card
+        """
+        return CardSet(self.mask | 1 << card.index)
+
+    def remove(self, card: Card) -> "CardSet":
+        """
+        Returns a new set without the given card
+        """
+        if card not in self:
+            raise KeyError(card)
+        return CardSet(self.mask ^ 1 << card.index)
+
+    def indices(self) -> List[int]:
+        """
+        The (sorted) indices of the cards in the set
+        """
+        return [card.index for card in self]
+
+    def to_cards(self) -> "Cards":
+        """
+        Returns the set as a (sorted by index) collection of cards
+        """
+        return Cards(list(self))
+
+    @classmethod
+    def from_cards(cls, cards: Iterable[Card]) -> "CardSet":
+        """
+        Construct a set from any iterable of cards. Duplicates are collapsed.
+        """
+        mask = 0
+        for card in cards:
+            mask |= 1 << card.index
+        return cls(mask)
+
+    @classmethod
+    def from_indices(cls, indices: Iterable[int]) -> "CardSet":
+        """
+        Construct a set from card indices
+        """
+        mask = 0
+        for index in indices:
+            mask |= 1 << index
+        return cls(mask)
+
+    @classmethod
+    def full(cls) -> "CardSet":
+        """
+        The set of all 52 cards
+        """
+        return cls(FULL_DECK_MASK)
+
+
+class RunCount(NamedTuple):
+    """
+    A maximal run of consecutive face values amongst some cards
+    """
+
+    first_value: int
+    length: int
+    multiplicity: int
+
 
 @dataclass
-class Cards:
+class Cards:  # pylint: disable=too-many-public-methods
     """
     Class to manipulate collections of cards
     """
@@ -145,9 +346,15 @@ class Cards:
     def __len__(self):
         return len(self.cards)
 
+    def __iter__(self) -> Iterator[Card]:
+        return iter(self.cards)
+
+    def __contains__(self, card: Card) -> bool:
+        return card in self.cards
+
     def __getitem__(self, key) -> Union[Card, "Cards"]:
 
-        if isinstance(key, (int, np.integer)):
+        if isinstance(key, Integral):
             return self.cards[key]
         if isinstance(key, slice):
             return Cards(self.cards[key])
@@ -163,6 +370,24 @@ class Cards:
 
         raise TypeError(f"Can't add object of type {type(other)} to cards")
 
+    def __iadd__(self, other):
+
+        if isinstance(other, Card):
+            self.cards.append(other)
+            return self
+        if isinstance(other, Cards):
+            self.cards.extend(other.cards)
+            return self
+
+        raise TypeError(f"Can't add object of type {type(other)} to cards")
+
+    def __copy__(self) -> "Cards":
+        return self.copy()
+
+    def __deepcopy__(self, memo) -> "Cards":
+        # cards are immutable, so there's no need to copy them
+        return self.copy()
+
     def __repr__(self) -> str:
         return " ".join([str(card) for card in self.cards])
 
@@ -173,18 +398,55 @@ class Cards:
         """
         return cls([Card.from_string(s) for s in string.split(delimiter)])
 
-    def shuffle(self):
+    @classmethod
+    def from_indices(cls, indices: Iterable[int]):
+        """
+        Construct cards from a sequence of card indices
+        """
+        return cls([CARDS_BY_INDEX[index] for index in indices])
+
+    def indices(self) -> List[int]:
+        """
+        The index of each of the cards, in order
+        """
+        return [card.index for card in self.cards]
+
+    def copy(self) -> "Cards":
+        """
+        A new collection of the same cards, which can be changed without
+        affecting this one. The (immutable) cards themselves aren't copied.
+        """
+        return Cards(self.cards.copy())
+
+    def append(self, card: Card):
+        """
+        Adds a card to the end of the cards, in place
+        """
+        self.cards.append(card)
+
+    def extend(self, cards: Iterable[Card]):
+        """
+        Adds cards to the end of the cards, in place
+        """
+        self.cards.extend(cards)
+
+    def to_card_set(self) -> CardSet:
+        """
+        The distinct cards, as a bitmask backed set
+        """
+        return CardSet.from_cards(self.cards)
+
+    def shuffle(self, rng: Optional[RandomGenerator] = None):
         """
         Randomise the order of the cards
         """
-        np.random.shuffle(self.cards)
+        _get_rng(rng).shuffle(self.cards)
 
     def deal_card(self):
         """
         deals a single card from the top of the deck, removing it from the deck
         """
-        card = self.cards[0]
-        return self.play_card(card)
+        return self.cards.pop(0)
 
     def play_card(self, card: Card):
         """
@@ -199,34 +461,99 @@ class Cards:
         """
         return Cards([self.play_card(card) for card in cards])
 
-    def play_random_card(self):
+    def play_random_card(self, rng: Optional[RandomGenerator] = None):
         """
         Returns a random card from the cards and removes it from the pile
         """
-        card_to_play = random.choice(self.cards)
-        return self.play_card(card_to_play)
+        return self.cards.pop(_get_rng(rng).integers(len(self.cards)))
 
     def play_all(self) -> "Cards":
         """
         returns all cards and removes them from the cards
         """
-        # take a copy of the cards
-        cards_to_play = list(self.cards)
-        return self.play_cards(cards_to_play)
+        cards_to_play = self.cards
+        self.cards = []
+        return Cards(cards_to_play)
 
     def contains_flush(self, length: int) -> bool:
         """ "
         Checks if there is a flush of the given length amongst the cards
         """
 
-        return bool(self.get_flushes(length, length))
+        return bool(self.count_flushes(length, length))
 
     def contains_straight(self, length: int) -> bool:
         """
         Checks if theres a striaght of the given length amonsts the cards
         """
 
-        return bool(self.get_straights(length, length))
+        return bool(self.count_straights(length, length))
+
+    def face_value_counts(self) -> List[int]:
+        """
+        The number of cards with each face value (ace first)
+        """
+
+        counts = [0] * N_FACE_VALUES
+        for card in self.cards:
+            counts[card.index % N_FACE_VALUES] += 1
+
+        return counts
+
+    def suit_counts(self) -> List[int]:
+        """
+        The number of cards of each suit, in the order of the Suit enum
+        """
+
+        counts = [0] * N_SUITS
+        for card in self.cards:
+            counts[card.index // N_FACE_VALUES] += 1
+
+        return counts
+
+    def count_flushes(self, min_length: int, max_length: int) -> List[int]:
+        """
+        The lengths of the flushes that get_flushes would return, without
+        building them
+        """
+
+        return sorted(
+            (
+                count
+                for count in self.suit_counts()
+                if count and min_length <= count <= max_length
+            ),
+            reverse=True,
+        )
+
+    def count_straights(self, min_length: int, max_length: int) -> List[RunCount]:
+        """
+        Describes the straights that get_straights would return, without
+        building them. Each maximal run of consecutive face values gives one
+        RunCount, whose multiplicity is the number of distinct straights
+        made from those face values.
+        """
+
+        counts = self.face_value_counts()
+
+        run_counts = []
+        run_start = None
+        for face_value in range(N_FACE_VALUES + 1):
+            if face_value < N_FACE_VALUES and counts[face_value]:
+                if run_start is None:
+                    run_start = face_value
+                continue
+
+            if run_start is not None:
+                length = face_value - run_start
+                if min_length <= length <= max_length:
+                    multiplicity = 1
+                    for count in counts[run_start:face_value]:
+                        multiplicity *= count
+                    run_counts.append(RunCount(run_start, length, multiplicity))
+                run_start = None
+
+        return run_counts
 
     def get_flushes(self, min_length: int, max_length: int) -> List["Cards"]:
         """
@@ -234,14 +561,25 @@ class Cards:
         minimum and maximum length. Subsets of flushes are not counted.
         """
 
-        suits = [card.suit for card in self.cards]
-        counts = Counter(suits)
+        counts = self.suit_counts()
+
+        # most common suits first, ties in the order the suits first appear
+        suits = sorted(
+            dict.fromkeys(card.index // N_FACE_VALUES for card in self.cards),
+            key=lambda suit: -counts[suit],
+        )
 
         flushes = []
-        for suit, count in counts.most_common():
-            if max_length >= count >= min_length:
+        for suit in suits:
+            if max_length >= counts[suit] >= min_length:
                 flushes.append(
-                    Cards([card for card in self.cards if card.suit == suit])
+                    Cards(
+                        [
+                            card
+                            for card in self.cards
+                            if card.index // N_FACE_VALUES == suit
+                        ]
+                    )
                 )
 
         return flushes
@@ -252,33 +590,19 @@ class Cards:
         straights. Does not return sub-straights
         """
 
+        run_counts = self.count_straights(min_length, max_length)
+        if not run_counts:
+            return []
+
         val_to_cards = defaultdict(list)
         for card in self.cards:
-            val_to_cards[card.value].append(card)
-
-        vals = sorted(list(val_to_cards))
-        diffs = np.diff(vals)
-
-        runs = []
-        current_run = [vals[0]]
-        for start_ind, diff in enumerate(diffs):
-            if diff == 1:
-                current_run.append(vals[start_ind + 1])
-            else:
-                runs.append(current_run)
-                current_run = [vals[start_ind + 1]]
-
-        runs.append(current_run)
+            val_to_cards[card.index % N_FACE_VALUES].append(card)
 
         card_runs = []
-        for run in runs:
-            if not min_length <= len(run) <= max_length:
-                continue
-
+        for run_count in run_counts:
+            run = range(run_count.first_value, run_count.first_value + run_count.length)
             all_runs = product(*[val_to_cards[val] for val in run])
-            runs_as_cards = [Cards(list(r)) for r in all_runs]
-
-            card_runs += runs_as_cards
+            card_runs += [Cards(list(r)) for r in all_runs]
 
         return card_runs
 
@@ -290,17 +614,287 @@ class Cards:
         return cls(cards=[])
 
     @classmethod
-    def standard_deck(cls, shuffle: bool = True):
+    def standard_deck(cls, shuffle: bool = True, rng: Optional[RandomGenerator] = None):
         """
         Returns a standard 52 card deck
         """
 
-        cards = []
-        for suit in Suit:
-            for value in FaceValue:
-                cards.append(Card(suit, value))
+        cards = list(CARDS_BY_INDEX)
 
         if shuffle:
-            random.shuffle(cards)
+            _get_rng(rng).shuffle(cards)
 
         return cls(cards=cards)
+
+
+def shuffled_decks(n_decks: int, rng: Optional[RandomGenerator] = None) -> Any:
+    """
+    n_decks independently shuffled decks of card indices, one deck per row.
+    With the numpy backend this is an n_decks x 52 int8 array, and with the
+    python backend a list of bytearrays.
+    """
+
+    return get_backend().shuffled_decks(n_decks, DECK_SIZE, _get_rng(rng))
+
+
+class CanonicalForm(NamedTuple):
+    """
+    The representative of a class of groups of cards which are the same up
+    to relabelling the suits.
+
+    groups holds the sorted card indices of each group after relabelling,
+    suit_map[s] is the suit that suit s was relabelled to (suits numbered
+    from 0, as in index // N_FACE_VALUES), and weight is the number of
+    distinct groupings of cards in the class.
+    """
+
+    groups: Tuple[Tuple[int, ...], ...]
+    weight: int
+    suit_map: Tuple[int, ...]
+
+
+def _suit_signature_key(signature: Tuple[Tuple[int, ...], ...]) -> tuple:
+    """
+    Sort key putting the suits with the most cards (then the lowest face
+    values) first
+    """
+    return tuple((-len(face_values), face_values) for face_values in signature)
+
+
+def _suit_permutation_weight(signatures: Iterable[tuple]) -> int:
+    """
+    The number of distinct relabellings of the suits, given each suit's
+    signature (suits with the same signature can be swapped without changing
+    anything)
+    """
+    return factorial(N_SUITS) // prod(
+        factorial(count) for count in Counter(signatures).values()
+    )
+
+
+def canonical_form(*groups: Iterable[int]) -> CanonicalForm:
+    """
+    Relabels the suits of groups of card indices (e.g. a hand and its turn up
+    card, or the cards held and discarded) into a canonical form, so that all
+    groupings that only differ by their suits have the same form.
+
+    Anything which depends on face values and on which cards share a suit
+    (like cribbage scores, flushes and nobs included) is the same for every
+    grouping in the class, so only needs working out once per canonical
+    form, and counting weight times.
+    """
+
+    groups = [list(group) for group in groups]
+
+    signatures = [
+        tuple(
+            tuple(
+                sorted(
+                    index % N_FACE_VALUES
+                    for index in group
+                    if index // N_FACE_VALUES == suit
+                )
+            )
+            for group in groups
+        )
+        for suit in range(N_SUITS)
+    ]
+
+    suit_map = [0] * N_SUITS
+    for new_suit, suit in enumerate(
+        sorted(range(N_SUITS), key=lambda suit: _suit_signature_key(signatures[suit]))
+    ):
+        suit_map[suit] = new_suit
+
+    return CanonicalForm(
+        groups=tuple(
+            tuple(
+                sorted(
+                    suit_map[index // N_FACE_VALUES] * N_FACE_VALUES
+                    + index % N_FACE_VALUES
+                    for index in group
+                )
+            )
+            for group in groups
+        ),
+        weight=_suit_permutation_weight(signatures),
+        suit_map=tuple(suit_map),
+    )
+
+
+def canonical_card_sets(n_cards: int) -> Iterator[CanonicalForm]:
+    """
+    Every canonical form of a single group of n_cards cards, without going
+    through all comb(52, n_cards) of them. The weights add up to
+    comb(52, n_cards).
+    """
+
+    def suit_contents(
+        n_remaining: int, previous: Tuple[Tuple[int, ...], ...]
+    ) -> Iterator[Tuple[Tuple[int, ...], ...]]:
+        # the face values in each suit, in canonical order
+        if len(previous) == N_SUITS:
+            if n_remaining == 0:
+                yield previous
+            return
+
+        n_suits_left = N_SUITS - len(previous)
+        max_size = len(previous[-1]) if previous else N_FACE_VALUES
+        for size in range(min(max_size, n_remaining), -1, -1):
+            if size * n_suits_left < n_remaining:
+                break
+            for face_values in combinations(range(N_FACE_VALUES), size):
+                if (
+                    previous
+                    and size == len(previous[-1])
+                    and face_values < previous[-1]
+                ):
+                    continue
+                yield from suit_contents(n_remaining - size, previous + (face_values,))
+
+    for contents in suit_contents(n_cards, ()):
+        yield CanonicalForm(
+            groups=(
+                tuple(
+                    suit * N_FACE_VALUES + face_value
+                    for suit, face_values in enumerate(contents)
+                    for face_value in face_values
+                ),
+            ),
+            weight=_suit_permutation_weight((face_values,) for face_values in contents),
+            suit_map=tuple(range(N_SUITS)),
+        )
+
+
+class Deck:
+    """
+    A pile of cards to deal from the top of.
+
+    The order of the cards is stored as a bytearray of card indices, with
+    a cursor pointing at the top card and an end marking the bottom card, so
+    dealing a card just moves the cursor and reset() puts all the dealt cards
+    back in their original order.
+    """
+
+    def __init__(self, order: Iterable[int]):
+
+        self._order = bytearray(order)
+        self._cursor = 0
+        self._end = len(self._order)
+
+    @classmethod
+    def standard(cls, shuffle: bool = True, rng: Optional[RandomGenerator] = None):
+        """
+        Returns a standard 52 card deck
+        """
+
+        deck = cls(range(DECK_SIZE))
+        if shuffle:
+            deck.shuffle(rng)
+
+        return deck
+
+    def __len__(self) -> int:
+        return self._end - self._cursor
+
+    def __iter__(self) -> Iterator[Card]:
+        for index in self.indices():
+            yield CARDS_BY_INDEX[index]
+
+    def __getitem__(self, item: int) -> Card:
+        return self.to_cards()[item]
+
+    def __contains__(self, card: Card) -> bool:
+        return card.index in self.indices()
+
+    def __add__(self, other: Union[Card, "Cards"]) -> "Cards":
+        return self.to_cards() + other
+
+    def __repr__(self) -> str:
+        return repr(self.to_cards())
+
+    def indices(self) -> List[int]:
+        """
+        The indices of the cards still in the deck, from the top down
+        """
+        return list(self._order[self._cursor : self._end])
+
+    def to_cards(self) -> Cards:
+        """
+        The cards still in the deck, from the top down
+        """
+        return Cards.from_indices(self.indices())
+
+    def deal_card(self) -> Card:
+        """
+        Deals a single card from the top of the deck
+        """
+
+        if self._cursor == self._end:
+            raise IndexError("Can't deal from an empty deck")
+
+        card = CARDS_BY_INDEX[self._order[self._cursor]]
+        self._cursor += 1
+        return card
+
+    def deal_cards(self, n_cards: int) -> Cards:
+        """
+        Deals n_cards from the top of the deck
+        """
+
+        if n_cards > len(self):
+            raise IndexError(f"Can't deal {n_cards} cards from a deck of {len(self)}")
+
+        cards = Cards.from_indices(self._order[self._cursor : self._cursor + n_cards])
+        self._cursor += n_cards
+        return cards
+
+    def play_random_card(self, rng: Optional[RandomGenerator] = None) -> Card:
+        """
+        Deals a card from a random position in the deck, by swapping it with
+        the top card
+        """
+
+        if self._cursor == self._end:
+            raise IndexError("Can't deal from an empty deck")
+
+        position = self._cursor + _get_rng(rng).integers(len(self))
+        order = self._order
+        order[self._cursor], order[position] = order[position], order[self._cursor]
+        return self.deal_card()
+
+    def add_to_bottom(
+        self,
+        cards: Cards,
+        shuffle: bool = True,
+        rng: Optional[RandomGenerator] = None,
+    ):
+        """
+        Puts the cards (shuffled first, by default) underneath the cards still
+        in the deck. Cards that have already been dealt are forgotten.
+        """
+
+        new_indices = bytearray(cards.indices())
+        if shuffle:
+            _get_rng(rng).shuffle(new_indices)
+
+        order = self._order[self._cursor : self._end] + new_indices
+
+        self._order = order
+        self._cursor = 0
+        self._end = len(order)
+
+    def reset(self):
+        """
+        Puts every dealt card back on top of the deck, in the order they were
+        dealt
+        """
+        self._cursor = 0
+
+    def shuffle(self, rng: Optional[RandomGenerator] = None):
+        """
+        Puts every dealt card back and shuffles the whole deck
+        """
+
+        self._cursor = 0
+        _get_rng(rng).shuffle(self._order)
@@ -0,0 +1,21 @@
+"""
+The game of cribbage
+"""
+
+from typing import Any, Sequence
+
+from pycards.backends import get_backend
+
+__all__ = ["score_hands"]
+
+
+def score_hands(
+    hands: Sequence[Sequence[int]], turn_ups: Sequence[int], is_crib: bool = False
+) -> Any:
+    """
+    The scores of N 4 card hands (as card indices) with their turn up cards,
+    from the current backend (see `pycards.backends`), so NumPy is only
+    imported by the numpy backend
+    """
+
+    return get_backend().score_hands(hands, turn_ups, is_crib)
@@ -0,0 +1,596 @@
+"""
+Batched simulation of many two player games of cribbage in lockstep.
+
+The state of every game is held in NumPy arrays (hands, crib, turn up,
+pegging count and trailing cards, scores), and each step of the game is
+applied to all the games still playing at once, so the Python overhead is
+per step rather than per game and card.
+
+Players' strategies are vectorised policies, looked up by name:
+
+- discard policies ("random", "expected_value") choose which 4 of the 6
+  dealt cards to hold, for every game at once.
+- pegging policies ("random", "lowest") choose which card to peg.
+
+RandomCribbagePlayer is ("random", "lowest") and ExpectedValueCribbagePlayer
+is ("expected_value", "lowest"), see BATCHED_STRATEGIES. Seat 0 counts its
+hand first, so the two strategies swap seats in half of the games. The rules
+follow
+`Cribbage.play()`, including the order in which points are scored and
+checked for a winner. The one difference is that the whole deck is
+reshuffled for every round, rather than dealing on through the deck and
+reshuffling the discards, which doesn't change the distribution of the
+cards in any round.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import combinations
+from typing import Callable, Dict, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from pycards.backends import get_backend
+from pycards.cards import DECK_SIZE, N_FACE_VALUES, N_SUITS
+from pycards.games.cribbage.crib_tables import (
+    DISCARD_CLASS_INDICES,
+    load_default_crib_table,
+)
+from pycards.games.cribbage.pegging import (
+    CARD_POINTS,
+    MAX_RUN_LENGTH,
+    PAIR_POINTS,
+    PEGGING_LIMIT,
+)
+from pycards.games.cribbage.util import HAND_SIZE, JACK_RANK
+from pycards.games.cribbage.vectorized import (
+    lookup_fifteens_pairs_and_runs,
+    score_flushes_and_nobs,
+)
+
+N_DEALT = 6
+
+# positions of the held cards for every way of keeping 4 of 6, in the same
+# order as `discard.evaluate_discards`
+HOLD_POSITIONS = np.array(list(combinations(range(N_DEALT), HAND_SIZE)))
+DISCARD_POSITIONS = np.array(
+    [
+        [position for position in range(N_DEALT) if position not in hold]
+        for hold in HOLD_POSITIONS.tolist()
+    ]
+)
+
+_CARD_POINTS = np.array(CARD_POINTS)
+# cards which could be turned up, as far as a player who was dealt 6 knows
+_N_TURN_UPS = DECK_SIZE - N_DEALT
+_PAIR_POINTS = np.array(PAIR_POINTS)
+_NO_CARD = -1
+_NO_WINNER = -1
+
+# (N x 6 card indices, N is_dealer bools, rng) -> N x 4 held positions
+DiscardPolicy = Callable[[np.ndarray, np.ndarray, np.random.Generator], np.ndarray]
+# (N x 4 card indices, N x 4 legal bools, rng) -> N positions to peg
+PeggingPolicy = Callable[[np.ndarray, np.ndarray, np.random.Generator], np.ndarray]
+
+
+def random_discard(
+    hands: np.ndarray, _is_dealer: np.ndarray, rng: np.random.Generator
+) -> np.ndarray:
+    """
+    Hold 4 random cards
+    """
+
+    return np.sort(rng.random(hands.shape).argsort(axis=1)[:, :HAND_SIZE], axis=1)
+
+
+@lru_cache(maxsize=None)
+def _crib_class_values() -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    (pone table, dealer table) of expected crib scores, indexed by
+    [lower face value, higher face value, suited], if the crib tables exist
+    """
+
+    crib_table = load_default_crib_table()
+    if crib_table is None:
+        return None
+
+    class_indices = np.zeros((N_FACE_VALUES, N_FACE_VALUES, 2), dtype=np.int64)
+    for (low, high, suited), index in DISCARD_CLASS_INDICES.items():
+        class_indices[low, high, int(suited)] = index
+
+    return tuple(
+        np.array(crib_table.values[name])[class_indices] for name in ("pone", "dealer")
+    )
+
+
+def _expected_fifteens_pairs_and_runs(ranks: np.ndarray) -> np.ndarray:
+    """
+    Expected fifteens, pairs and runs of every hold over the possible turn
+    ups, from the N x 6 face values dealt
+    """
+
+    n_games, n_holds = len(ranks), len(HOLD_POSITIONS)
+
+    # how many of each face value could still be turned up
+    rank_counts = N_SUITS - (ranks[:, :, None] == np.arange(N_FACE_VALUES)).sum(1)
+
+    all_ranks = np.concatenate(
+        [
+            np.broadcast_to(
+                ranks[:, HOLD_POSITIONS][:, :, None, :],
+                (n_games, n_holds, N_FACE_VALUES, HAND_SIZE),
+            ),
+            np.broadcast_to(
+                np.arange(N_FACE_VALUES)[None, None, :, None],
+                (n_games, n_holds, N_FACE_VALUES, 1),
+            ),
+        ],
+        axis=3,
+    )
+    rank_scores = lookup_fifteens_pairs_and_runs(all_ranks.reshape(-1, 5)).reshape(
+        n_games, n_holds, N_FACE_VALUES
+    )
+    return (rank_scores * rank_counts[:, None, :]).sum(axis=2) / _N_TURN_UPS
+
+
+def _expected_flushes_and_nobs(ranks: np.ndarray, suits: np.ndarray) -> np.ndarray:
+    """
+    Expected flush and nobs points of every hold over the possible turn ups.
+    A flush of 4 scores 4, or 5 if the turn up matches, and each jack scores
+    1 if the turn up is of its suit.
+    """
+
+    # how many of each suit could still be turned up
+    suit_counts = N_FACE_VALUES - (suits[:, :, None] == np.arange(N_SUITS)).sum(1)
+
+    held_suits = suits[:, HOLD_POSITIONS]
+    suit_turn_up_chances = (
+        np.take_along_axis(suit_counts, held_suits.reshape(len(suits), -1), axis=1)
+        / _N_TURN_UPS
+    ).reshape(held_suits.shape)
+    is_flush = (held_suits == held_suits[:, :, :1]).all(axis=2)
+
+    return np.where(is_flush, 4 + suit_turn_up_chances[:, :, 0], 0) + (
+        suit_turn_up_chances * (ranks[:, HOLD_POSITIONS] == JACK_RANK)
+    ).sum(axis=2)
+
+
+def _expected_crib_scores(
+    hands: np.ndarray,
+    is_dealer: np.ndarray,
+    crib_class_values: Tuple[np.ndarray, np.ndarray],
+) -> np.ndarray:
+    """
+    Expected crib score of every discard, positive for the dealer's crib and
+    negative for the pone's
+    """
+
+    pone_values, dealer_values = crib_class_values
+    discards = hands[:, DISCARD_POSITIONS]
+    discard_ranks = np.sort(discards % N_FACE_VALUES, axis=2)
+    discard_suits = discards // N_FACE_VALUES
+    suited = (discard_suits[:, :, 0] == discard_suits[:, :, 1]).astype(np.int64)
+    low, high = discard_ranks[:, :, 0], discard_ranks[:, :, 1]
+    return np.where(
+        is_dealer[:, None],
+        dealer_values[low, high, suited],
+        -pone_values[low, high, suited],
+    )
+
+
+def expected_value_discard(
+    hands: np.ndarray, is_dealer: np.ndarray, _rng: np.random.Generator
+) -> np.ndarray:
+    """
+    Hold the 4 cards with the best expected hand score over the possible turn
+    ups, plus or minus the expected crib score when the crib tables are
+    available. The same choice as `discard.best_discard`.
+    """
+
+    ranks, suits = hands % N_FACE_VALUES, hands // N_FACE_VALUES
+    expected = _expected_fifteens_pairs_and_runs(ranks)
+    expected += _expected_flushes_and_nobs(ranks, suits)
+
+    crib_class_values = _crib_class_values()
+    if crib_class_values is not None:
+        expected += _expected_crib_scores(hands, is_dealer, crib_class_values)
+
+    return HOLD_POSITIONS[expected.argmax(axis=1)]
+
+
+def random_pegging(
+    _hands: np.ndarray, legal: np.ndarray, rng: np.random.Generator
+) -> np.ndarray:
+    """
+    Peg a random legal card
+    """
+    return np.where(legal, rng.random(legal.shape), -1.0).argmax(axis=1)
+
+
+def lowest_card_pegging(
+    hands: np.ndarray, legal: np.ndarray, _rng: np.random.Generator
+) -> np.ndarray:
+    """
+    Peg the first card with the lowest value, like RandomCribbagePlayer
+    """
+
+    values = _CARD_POINTS[hands]
+    return np.where(legal, values, PEGGING_LIMIT + 1).argmin(axis=1)
+
+
+DISCARD_POLICIES: Dict[str, DiscardPolicy] = {
+    "random": random_discard,
+    "expected_value": expected_value_discard,
+}
+
+PEGGING_POLICIES: Dict[str, PeggingPolicy] = {
+    "random": random_pegging,
+    "lowest": lowest_card_pegging,
+}
+
+
+class BatchedStrategy(NamedTuple):
+    """
+    The names of the discard and pegging policies a player uses
+    """
+
+    discard: str = "random"
+    pegging: str = "lowest"
+
+
+# the policies equivalent to each player class
+BATCHED_STRATEGIES: Dict[str, BatchedStrategy] = {
+    "RandomCribbagePlayer": BatchedStrategy("random", "lowest"),
+    "ExpectedValueCribbagePlayer": BatchedStrategy("expected_value", "lowest"),
+}
+
+
+@dataclass
+class BatchedGames:
+    """
+    The outcome of a batch of games. Players are 0 and 1 (their seats), and
+    every array has one entry per game. first_seats is the seat of the first
+    strategy in each game.
+    """
+
+    winners: np.ndarray
+    scores: np.ndarray
+    n_turns: np.ndarray
+    first_dealers: np.ndarray
+    first_seats: np.ndarray
+
+    @property
+    def n_games(self) -> int:
+        """
+        Number of games in the batch
+        """
+        return len(self.winners)
+
+    @property
+    def strategy_winners(self) -> np.ndarray:
+        """
+        The strategy (0 for the first, 1 for the second) which won each game
+        """
+        return np.where(
+            self.winners == _NO_WINNER, _NO_WINNER, self.winners ^ self.first_seats
+        )
+
+    @property
+    def strategy_scores(self) -> np.ndarray:
+        """
+        The scores of the first and second strategies in each game
+        """
+        seats = np.stack([self.first_seats, 1 - self.first_seats], axis=1)
+        return np.take_along_axis(self.scores, seats, axis=1)
+
+
+class _PeggingArrays:
+    """
+    The pegging hands, count, trailing face values and player to move of a
+    batch of games being pegged
+    """
+
+    def __init__(self, hands: np.ndarray, to_move: np.ndarray):
+
+        self.hands = hands.copy()
+        self.counts = np.zeros(len(hands), dtype=np.int64)
+        # trailing face values of the current sequences, most recent last
+        self.trails = np.full((len(hands), MAX_RUN_LENGTH), _NO_CARD, dtype=np.int64)
+        self.to_move = to_move
+
+    def legal(self, games: np.ndarray) -> np.ndarray:
+        """
+        Which cards in the hand of the player to move can be pegged
+        """
+
+        hands = self.hands[games, self.to_move[games]]
+        return (hands != _NO_CARD) & (
+            self.counts[games, None] + _CARD_POINTS[hands] <= PEGGING_LIMIT
+        )
+
+    def can_play(self, games: np.ndarray, seats: np.ndarray) -> np.ndarray:
+        """
+        Whether the players have a card they can peg
+        """
+        return _can_play(self.hands[games, seats], self.counts[games])
+
+    def has_cards(self, games: np.ndarray, seats: np.ndarray) -> np.ndarray:
+        """
+        Whether the players have any cards left to peg
+        """
+        return (self.hands[games, seats] != _NO_CARD).any(axis=1)
+
+    def play(self, games: np.ndarray, positions: np.ndarray) -> np.ndarray:
+        """
+        Pegs the card at each position in the hand of the player to move,
+        returning the points for it (not counting the point for the last card)
+        """
+
+        movers = self.to_move[games]
+        cards = self.hands[games, movers, positions]
+        self.hands[games, movers, positions] = _NO_CARD
+        self.counts[games] += _CARD_POINTS[cards]
+        self.trails[games] = np.concatenate(
+            [self.trails[games, 1:], (cards % N_FACE_VALUES)[:, None]], axis=1
+        )
+        return _pegging_points(self.trails[games], self.counts[games])
+
+    def end_sequences(self, games: np.ndarray):
+        """
+        Starts a new sequence, from a count of zero
+        """
+
+        self.counts[games] = 0
+        self.trails[games] = _NO_CARD
+
+
+class _BatchedGameState:
+    """
+    The arrays describing every game in a batch, and the rules which update
+    them in lockstep
+    """
+
+    def __init__(
+        self,
+        n_games: int,
+        strategies: Tuple[BatchedStrategy, BatchedStrategy],
+        winning_points: int,
+        rng: np.random.Generator,
+    ):
+
+        self.discard_policies = tuple(
+            DISCARD_POLICIES[strategy.discard] for strategy in strategies
+        )
+        self.pegging_policies = tuple(
+            PEGGING_POLICIES[strategy.pegging] for strategy in strategies
+        )
+        self.winning_points = winning_points
+        self.rng = rng
+
+        self.dealers = rng.integers(2, size=n_games)
+        self.games = BatchedGames(
+            winners=np.full(n_games, _NO_WINNER, dtype=np.int64),
+            scores=np.zeros((n_games, 2), dtype=np.int64),
+            n_turns=np.zeros(n_games, dtype=np.int64),
+            first_dealers=self.dealers.copy(),
+            first_seats=np.arange(n_games) % 2,
+        )
+
+    @property
+    def playing(self) -> np.ndarray:
+        """
+        Which games haven't been won yet
+        """
+        return self.games.winners == _NO_WINNER
+
+    def _add_points(self, games: np.ndarray, players: np.ndarray, points: np.ndarray):
+        """
+        Adds points to some of the players, and records any of them which have
+        won (games must be distinct)
+        """
+
+        scores = self.games.scores
+        scores[games, players] += points
+        won = scores[games, players] >= self.winning_points
+        self.games.winners[games[won]] = players[won]
+
+    def play_turn(self):
+        """
+        Plays one turn (a deal, up to scoring the crib) of every game which
+        hasn't been won yet
+        """
+
+        games = np.flatnonzero(self.playing)
+        self.games.n_turns[games] += 1
+
+        hands, crib, turn_ups = self._deal(games)
+        self._turn_up(games, turn_ups)
+
+        playing = self.playing[games]
+        self._peg(games[playing], hands[playing])
+
+        for seat in (0, 1):
+            playing = self.playing[games]
+            self._add_points(
+                games[playing],
+                np.full(playing.sum(), seat),
+                self._score(hands[playing, seat], turn_ups[playing]),
+            )
+
+        playing = self.playing[games]
+        self._add_points(
+            games[playing],
+            self.dealers[games[playing]],
+            self._score(crib[playing], turn_ups[playing]),
+        )
+
+        self.dealers = 1 - self.dealers
+
+    def _deal(self, games: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Deals the games, returning the held hands, crib and turn up of each
+        """
+
+        decks = get_backend("numpy").shuffled_decks(len(games), DECK_SIZE, self.rng)
+        decks = decks.astype(np.int64)
+        is_dealer = [self.dealers[games] == seat for seat in (0, 1)]
+
+        hands, cribs = [], []
+        for seat in (0, 1):
+            dealt = decks[:, seat * N_DEALT : (seat + 1) * N_DEALT]
+            strategies = seat ^ self.games.first_seats[games]
+            held = np.empty((len(games), HAND_SIZE), dtype=np.int64)
+            for strategy, policy in enumerate(self.discard_policies):
+                uses = strategies == strategy
+                if uses.any():
+                    held[uses] = policy(dealt[uses], is_dealer[seat][uses], self.rng)
+            hands.append(np.take_along_axis(dealt, held, axis=1))
+            discarded = np.ones(dealt.shape, dtype=bool)
+            np.put_along_axis(discarded, held, False, axis=1)
+            cribs.append(dealt[discarded].reshape(len(games), 2))
+
+        return (
+            np.stack(hands, axis=1),
+            np.concatenate(cribs, axis=1),
+            decks[:, 2 * N_DEALT],
+        )
+
+    def _turn_up(self, games: np.ndarray, turn_ups: np.ndarray):
+
+        jacks = turn_ups % N_FACE_VALUES == JACK_RANK
+        self._add_points(
+            games[jacks], self.dealers[games[jacks]], np.full(jacks.sum(), 2)
+        )
+
+    @staticmethod
+    def _score(hands: np.ndarray, turn_ups: np.ndarray) -> np.ndarray:
+        """
+        Score hands the way Cribbage.score_hand does (the crib is scored in
+        the same way as a hand, as in Cribbage._score_crib)
+        """
+
+        ranks = np.concatenate([hands, turn_ups[:, None]], axis=1) % N_FACE_VALUES
+        return lookup_fifteens_pairs_and_runs(ranks) + score_flushes_and_nobs(
+            hands, turn_ups, np.zeros(len(hands), dtype=bool)
+        )
+
+    def _choose_pegging_cards(
+        self, pegging: _PeggingArrays, active: np.ndarray, first_seats: np.ndarray
+    ) -> np.ndarray:
+        """
+        The position of the card each player to move pegs, from their policy.
+        first_seats are the seats of the first strategy in the active games.
+        """
+
+        movers = pegging.to_move[active]
+        hands = pegging.hands[active, movers]
+        legal = pegging.legal(active)
+
+        strategies = movers ^ first_seats
+        positions = np.empty(len(active), dtype=np.int64)
+        for strategy, policy in enumerate(self.pegging_policies):
+            uses = strategies == strategy
+            if uses.any():
+                positions[uses] = policy(hands[uses], legal[uses], self.rng)
+        return positions
+
+    def _peg(self, games: np.ndarray, hands: np.ndarray):
+        """
+        Plays the pegging phase of the games, one card at a time
+        """
+
+        pegging = _PeggingArrays(hands, 1 - self.dealers[games])
+        active = np.arange(len(games))
+
+        while len(active):
+            positions = self._choose_pegging_cards(
+                pegging, active, self.games.first_seats[games[active]]
+            )
+            points = pegging.play(active, positions)
+
+            movers = pegging.to_move[active]
+            others = 1 - movers
+            other_can_play = pegging.can_play(active, others)
+
+            # nobody can play, so the sequence ends and a new one starts
+            ends = ~other_can_play & ~pegging.can_play(active, movers)
+            points += ends & (pegging.counts[active] != PEGGING_LIMIT)
+            self._add_points(games[active], movers, points)
+
+            other_has_cards = pegging.has_cards(active, others)
+            pegging.to_move[active] = np.where(
+                other_can_play | (ends & other_has_cards), others, movers
+            )
+            pegging.end_sequences(active[ends])
+
+            finished = (
+                ends & ~other_has_cards & ~pegging.has_cards(active, movers)
+            ) | ~self.playing[games[active]]
+            active = active[~finished]
+
+
+def _can_play(hands: np.ndarray, counts: np.ndarray) -> np.ndarray:
+
+    return (
+        (hands != _NO_CARD) & (counts[:, None] + _CARD_POINTS[hands] <= PEGGING_LIMIT)
+    ).any(axis=1)
+
+
+def _pegging_points(trails: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """
+    Vectorised `pegging.pegging_points`, for the last card of each trail
+    """
+
+    # number of trailing cards with the same face value as the last one
+    same = trails == trails[:, -1:]
+    pair_lengths = np.cumprod(same[:, ::-1], axis=1).sum(axis=1)
+    points = _PAIR_POINTS[np.minimum(pair_lengths, len(PAIR_POINTS) - 1)]
+
+    # the longest run made by the trailing cards
+    run_lengths = np.zeros(len(trails), dtype=np.int64)
+    for length in range(3, MAX_RUN_LENGTH + 1):
+        window = trails[:, -length:]
+        masks = np.bitwise_or.reduce(np.left_shift(1, window.clip(0)), axis=1)
+        lowest = window.min(axis=1)
+        is_run = (lowest != _NO_CARD) & (masks == ((1 << length) - 1) << lowest.clip(0))
+        run_lengths[is_run] = length
+    points += run_lengths
+
+    points += 2 * ((counts == 15) | (counts == PEGGING_LIMIT))
+    return points
+
+
+def simulate_games(
+    n_games: int,
+    strategies: Tuple[BatchedStrategy, BatchedStrategy] = (
+        BatchedStrategy(),
+        BatchedStrategy(),
+    ),
+    winning_points: int = 121,
+    seed: Optional[Union[int, np.random.SeedSequence]] = None,
+    max_turns: int = 1000,
+) -> BatchedGames:
+    """
+    Plays n_games two player games in lockstep between the two strategies.
+    The first strategy sits at seat 0 in the even numbered games, and at
+    seat 1 in the odd ones.
+    """
+
+    for strategy in strategies:
+        if strategy.discard not in DISCARD_POLICIES:
+            raise ValueError(f"Unknown discard policy {strategy.discard}")
+        if strategy.pegging not in PEGGING_POLICIES:
+            raise ValueError(f"Unknown pegging policy {strategy.pegging}")
+
+    state = _BatchedGameState(
+        n_games, strategies, winning_points, np.random.default_rng(seed)
+    )
+
+    for _ in range(max_turns):
+        if not state.playing.any():
+            break
+        state.play_turn()
+    else:
+        raise TimeoutError("Too many turns taken")
+
+    return state.games
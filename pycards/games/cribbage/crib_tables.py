@@ -0,0 +1,405 @@
+"""
+Tables of the expected score of the crib, given the two cards thrown into it.
+
+The crib score only depends on the suits of the two discarded cards through
+whether or not they share a suit, so the 1326 possible discards fall into 169
+classes (a pair of face values, and whether they are suited).
+
+Three tables are generated:
+
+- uniform: the other player's discards are every pair of the remaining
+  cards with equal probability, and every turn up is enumerated exactly.
+- dealer: we are the dealer. The pone's hands are sampled, and they discard
+  to maximise their hand score minus the (uniform) crib score.
+- pone: we are the pone. The dealer's hands are sampled, and they discard
+  to maximise their hand score plus the (uniform) crib score.
+
+The cards we keep in hand are unknown to the tables, so they are treated as
+still being in the deck.
+
+Generate the tables (across a process pool, resuming from a checkpoint) with
+
+    python -m pycards.games.cribbage.crib_tables
+"""
+
+import argparse
+import json
+import struct
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+from itertools import combinations
+from logging import getLogger
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from pycards.cards import DECK_SIZE, N_FACE_VALUES, Card, Cards
+from pycards.games.cribbage.discard import best_discard
+from pycards.games.cribbage.vectorized import score_hands
+
+LOGGER = getLogger(__file__)
+
+CRIB_TABLE_MAGIC = b"PCCT"
+CRIB_TABLE_VERSION = 1
+HEADER_FORMAT = "<4sHI"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+TABLE_NAMES = ("uniform", "dealer", "pone")
+
+DEFAULT_CRIB_TABLE_PATH = Path(__file__).parent / "data" / "crib_table.bin"
+
+# (lower face value, higher face value, suited)
+DiscardClass = Tuple[int, int, bool]
+
+DISCARD_CLASSES: List[DiscardClass] = [
+    (low, high, suited)
+    for low in range(N_FACE_VALUES)
+    for high in range(low, N_FACE_VALUES)
+    for suited in (False, True)
+    if low != high or not suited
+]
+DISCARD_CLASS_INDICES: Dict[DiscardClass, int] = {
+    discard_class: i for i, discard_class in enumerate(DISCARD_CLASSES)
+}
+
+
+def discard_class_index(discard: Cards) -> int:
+    """
+    The index of the class of a two card discard
+    """
+
+    if len(discard) != 2:
+        raise ValueError("Crib tables are only defined for discards of 2 cards")
+
+    card1, card2 = discard
+    low, high = sorted((card1.value.value, card2.value.value))
+    return DISCARD_CLASS_INDICES[(low, high, card1.suit == card2.suit)]
+
+
+def representative_discard(discard_class: DiscardClass) -> Cards:
+    """
+    A pair of cards belonging to the discard class
+    """
+
+    low, high, suited = discard_class
+    return Cards(
+        [
+            Card.from_index(low),
+            Card.from_index((0 if suited else N_FACE_VALUES) + high),
+        ]
+    )
+
+
+class CribTable:
+    """
+    Expected crib scores, for each table and discard class
+    """
+
+    def __init__(self, values: Dict[str, List[float]]):
+
+        for name in TABLE_NAMES:
+            if len(values[name]) != len(DISCARD_CLASSES):
+                raise ValueError(f"The {name} table has the wrong number of entries")
+
+        self.values = values
+
+    def expected_crib_score(self, discard: Cards, is_dealer: bool) -> float:
+        """
+        Expected score of the crib after throwing in the discard. Matches the
+        crib_value signature used by `discard.evaluate_discards`.
+        """
+
+        table_name = "dealer" if is_dealer else "pone"
+        return self.values[table_name][discard_class_index(discard)]
+
+    def write(self, path: Path = DEFAULT_CRIB_TABLE_PATH) -> Path:
+        """
+        Write the tables to a versioned binary file of float32s
+        """
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        with path.open("wb") as f:
+            f.write(
+                struct.pack(
+                    HEADER_FORMAT,
+                    CRIB_TABLE_MAGIC,
+                    CRIB_TABLE_VERSION,
+                    len(DISCARD_CLASSES),
+                )
+            )
+            for name in TABLE_NAMES:
+                array("f", self.values[name]).tofile(f)
+
+        return path
+
+    @classmethod
+    def read(cls, path: Path) -> "CribTable":
+        """
+        Read tables written by CribTable.write
+        """
+
+        data = Path(path).read_bytes()
+        if len(data) < HEADER_SIZE:
+            raise ValueError(f"{path} is too short to be a crib table")
+
+        magic, version, n_classes = struct.unpack_from(HEADER_FORMAT, data)
+        if magic != CRIB_TABLE_MAGIC:
+            raise ValueError(f"{path} is not a crib table")
+        if version != CRIB_TABLE_VERSION:
+            raise ValueError(
+                f"{path} has version {version}, expected {CRIB_TABLE_VERSION}"
+            )
+
+        entries = array("f")
+        entries.frombytes(data[HEADER_SIZE:])
+        if n_classes != len(DISCARD_CLASSES) or len(entries) != 3 * n_classes:
+            raise ValueError(f"{path} has the wrong number of entries")
+
+        return cls(
+            {
+                name: entries[i * n_classes : (i + 1) * n_classes].tolist()
+                for i, name in enumerate(TABLE_NAMES)
+            }
+        )
+
+
+@lru_cache(maxsize=None)
+def load_default_crib_table() -> Optional[CribTable]:
+    """
+    Loads the crib tables shipped with the package, returning None if they
+    are missing or can't be used
+    """
+
+    if not DEFAULT_CRIB_TABLE_PATH.exists():
+        return None
+
+    try:
+        return CribTable.read(DEFAULT_CRIB_TABLE_PATH)
+    except ValueError as error:
+        LOGGER.warning(f"Not using the crib tables: {error}")
+        return None
+
+
+def uniform_expected_crib_score(class_index: int) -> float:
+    """
+    Exact expected crib score when the other discards and the turn up are
+    uniformly random amongst the remaining cards
+    """
+
+    discard = np.array(representative_discard(DISCARD_CLASSES[class_index]).indices())
+    remaining = np.setdiff1d(np.arange(DECK_SIZE), discard)
+
+    cribs, turn_ups = [], []
+    for other_discard in combinations(remaining.tolist(), 2):
+        turn_up_candidates = np.setdiff1d(remaining, other_discard)
+        crib = np.concatenate([discard, other_discard])
+        cribs.append(np.broadcast_to(crib, (len(turn_up_candidates), 4)))
+        turn_ups.append(turn_up_candidates)
+
+    return float(
+        score_hands(np.concatenate(cribs), np.concatenate(turn_ups), True).mean()
+    )
+
+
+def sampled_expected_crib_score(
+    class_index: int,
+    is_dealer: bool,
+    uniform_table: CribTable,
+    n_samples: int,
+    seed: int,
+) -> float:
+    """
+    Expected crib score when the other player is dealt a random hand and
+    discards it with `discard.best_discard`, valuing the crib with the
+    uniform table
+    """
+
+    rng = np.random.default_rng([seed, int(is_dealer), class_index])
+
+    discard = representative_discard(DISCARD_CLASSES[class_index])
+    remaining = np.setdiff1d(np.arange(DECK_SIZE), discard.indices())
+
+    total = 0.0
+    for _ in range(n_samples):
+        other_hand = Cards.from_indices(rng.choice(remaining, size=6, replace=False))
+        other_discard = best_discard(
+            other_hand,
+            is_dealer=not is_dealer,
+            crib_value=uniform_table.expected_crib_score,
+        ).discard
+
+        crib = discard.indices() + other_discard.indices()
+        turn_ups = np.setdiff1d(remaining, other_hand.indices())
+        total += score_hands(
+            np.broadcast_to(crib, (len(turn_ups), 4)), turn_ups, True
+        ).mean()
+
+    return total / n_samples
+
+
+# the tables which don't depend on the generation parameters, so can be
+# reused from a checkpoint made with any of them
+_UNPARAMETERISED_TABLES = ("uniform",)
+
+
+def _read_checkpoint(
+    checkpoint_path: Path, parameters: Dict[str, int]
+) -> Dict[Tuple[str, int], float]:
+    """
+    The results in the checkpoint. Raises a ValueError if any of them were
+    generated with different parameters, rather than mixing estimates from
+    different runs.
+    """
+
+    if not checkpoint_path.exists():
+        return {}
+
+    results = {}
+    with checkpoint_path.open() as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            entry_parameters = entry.get("parameters", {})
+            if (
+                entry["table"] not in _UNPARAMETERISED_TABLES
+                and entry_parameters != parameters
+            ):
+                raise ValueError(
+                    f"{checkpoint_path} was generated with {entry_parameters},"
+                    f" not {parameters}. Delete it or use another checkpoint."
+                )
+            results[(entry["table"], entry["index"])] = entry["value"]
+
+    return results
+
+
+def _run_tasks(
+    tasks: Dict[Tuple[str, int], tuple],
+    results: Dict[Tuple[str, int], float],
+    checkpoint_path: Path,
+    n_processes: Optional[int],
+    parameters: Dict[str, int],
+):
+    """
+    Runs each (function, *args) task on the process pool, appending each
+    result (and the parameters it was generated with) to the checkpoint as
+    soon as it is finished
+    """
+
+    pending = {key: task for key, task in tasks.items() if key not in results}
+    if not pending:
+        return
+
+    with ProcessPoolExecutor(max_workers=n_processes) as executor, checkpoint_path.open(
+        "a"
+    ) as checkpoint:
+        futures = {
+            executor.submit(task[0], *task[1:]): key for key, task in pending.items()
+        }
+        for i, future in enumerate(as_completed(futures)):
+            table_name, class_index = key = futures[future]
+            results[key] = future.result()
+            checkpoint.write(
+                json.dumps(
+                    {
+                        "table": table_name,
+                        "index": class_index,
+                        "value": results[key],
+                        "parameters": parameters,
+                    }
+                )
+                + "\n"
+            )
+            checkpoint.flush()
+            LOGGER.info(f"Finished {i + 1} of {len(pending)} {table_name} entries")
+
+
+def generate_crib_tables(
+    n_samples: int = 500,
+    n_processes: Optional[int] = None,
+    checkpoint_path: Path = Path("crib_tables.checkpoint.jsonl"),
+    seed: int = 0,
+) -> CribTable:
+    """
+    Generates all the crib tables, resuming from checkpoint_path if it exists.
+    The checkpoint must have been made with the same n_samples and seed.
+    """
+
+    checkpoint_path = Path(checkpoint_path)
+    parameters = {"n_samples": n_samples, "seed": seed}
+    results = _read_checkpoint(checkpoint_path, parameters)
+
+    _run_tasks(
+        {
+            ("uniform", i): (uniform_expected_crib_score, i)
+            for i in range(len(DISCARD_CLASSES))
+        },
+        results,
+        checkpoint_path,
+        n_processes,
+        {},
+    )
+
+    uniform_values = [results[("uniform", i)] for i in range(len(DISCARD_CLASSES))]
+    uniform_table = CribTable({name: uniform_values for name in TABLE_NAMES})
+
+    _run_tasks(
+        {
+            (name, i): (
+                sampled_expected_crib_score,
+                i,
+                name == "dealer",
+                uniform_table,
+                n_samples,
+                seed,
+            )
+            for name in ("dealer", "pone")
+            for i in range(len(DISCARD_CLASSES))
+        },
+        results,
+        checkpoint_path,
+        n_processes,
+        parameters,
+    )
+
+    return CribTable(
+        {
+            name: [results[(name, i)] for i in range(len(DISCARD_CLASSES))]
+            for name in TABLE_NAMES
+        }
+    )
+
+
+def main():
+    """
+    Command line entry point for generating the crib tables
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--n-samples", type=int, default=500)
+    parser.add_argument("--n-processes", type=int, default=None)
+    parser.add_argument(
+        "--checkpoint",
+        type=Path,
+        default=Path("crib_tables.checkpoint.jsonl"),
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=DEFAULT_CRIB_TABLE_PATH)
+    args = parser.parse_args()
+
+    crib_table = generate_crib_tables(
+        n_samples=args.n_samples,
+        n_processes=args.n_processes,
+        checkpoint_path=args.checkpoint,
+        seed=args.seed,
+    )
+    print(f"Crib tables written to {crib_table.write(args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,36 +2,142 @@
 Rules for the game of Cribbage
 """
 
-from copy import deepcopy
-from itertools import combinations
-from logging import getLogger
-
-import numpy as np
-
-from pycards.cards import Cards, FaceValue
-from pycards.games.cribbage.util import cribbage_card_value, sum_cribbage_card_values
+import time
+from typing import Any, Callable, List, Optional
+
+from pycards.backends import get_backend
+from pycards.cards import Card, Cards, Deck
+from pycards.games.cribbage import score_cache
+from pycards.games.cribbage.events import (
+    CribScoreEvent,
+    DealEvent,
+    DiscardEvent,
+    EventSubscriber,
+    GameEndEvent,
+    GameEvent,
+    GoEvent,
+    HandScoreEvent,
+    PegEvent,
+    TurnUpEvent,
+)
+from pycards.games.cribbage.game_state import (
+    PEGGING,
+    CribCard,
+    Deal,
+    Discard,
+    GameState,
+    Go,
+    Peg,
+    ScoreCrib,
+    ScoreHand,
+    TurnUp,
+)
+from pycards.games.cribbage.instrumentation import Instrumentation
+from pycards.games.cribbage.pegging import CARD_POINTS, PeggingState
+from pycards.games.cribbage.scoring import score_hand
 from pycards.players import Player, Players
 
-LOGGER = getLogger(__file__)
-
 
 class Cribbage:
     """
-    Rules and tracking variables for a game of cribbage
+    Rules and tracking variables for a game of cribbage.
+
+    All the randomness in the game, including the players' decisions, comes
+    from random number generators spawned from seed by the current backend
+    (see `pycards.backends`), so a game can be replayed exactly from its
+    seed. With the numpy backend seed can also be a SeedSequence.
+
+    The rules are applied by a `GameState` (the game's state attribute),
+    which the game feeds with the cards from its deck and the players'
+    decisions, and copies the scores from back to the players.
     """
 
-    def __init__(self, players: Players, winning_points: int = 121):
+    def __init__(
+        self,
+        players: Players,
+        winning_points: int = 121,
+        seed: Any = None,
+        instrumentation: Optional[Instrumentation] = None,
+    ):
 
         self.players = players
-        self.winning_points = winning_points
+        self.instrumentation = instrumentation
+
+        backend = get_backend()
+        game_seed, *player_seeds = backend.spawn_seeds(seed, 1 + self.n_players)
+        self.rng = backend.default_rng(game_seed)
+        for player, player_seed in zip(self.players, player_seeds):
+            player.rng = backend.default_rng(player_seed)
 
-        self.deal_pile = Cards.standard_deck()
+        self.deal_pile = Deck.standard(rng=self.rng)
         self.discard_pile = Cards.empty()
-        self.crib = Cards.empty()
-        self.turn_up_card = None
+
+        self._subscribers: List[EventSubscriber] = []
 
         self._decide_dealer()
 
+        self.state = GameState(
+            self.n_players,
+            dealer=self._dealer_seat(),
+            winning_points=winning_points,
+            scores=[player.score for player in self.players],
+            keep_history=False,
+            hand_scorer=self.score_hand,
+        )
+
+        for player in self.players:
+            player.observe_game(self)
+
+    def subscribe(self, subscriber: EventSubscriber) -> EventSubscriber:
+        """
+        Call subscriber with every event emitted by the game from now on
+        """
+        self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: EventSubscriber) -> None:
+        """
+        Stop sending events to subscriber
+        """
+        self._subscribers.remove(subscriber)
+
+    def _emit(self, event: GameEvent) -> None:
+        """
+        Send an event to all subscribers. Callers should check there are
+        subscribers before building the event, so that it costs nothing
+        when the game isn't being observed.
+        """
+        for subscriber in self._subscribers:
+            subscriber(event)
+
+    @property
+    def winning_points(self) -> int:
+        """
+        The number of points needed to win
+        """
+        return self.state.winning_points
+
+    @property
+    def crib(self) -> Cards:
+        """
+        The cards given to the crib this round
+        """
+        return Cards.from_indices(self.state.crib)
+
+    @property
+    def turn_up_card(self) -> Optional[Card]:
+        """
+        The turn up card, once it's been chosen this round
+        """
+
+        if self.state.turn_up is None:
+            return None
+        return Card.from_index(self.state.turn_up)
+
+    @turn_up_card.setter
+    def turn_up_card(self, card: Card) -> None:
+        self.state.turn_up = card.index
+
     @property
     def n_players(self):
         """
@@ -55,15 +161,31 @@ class Cribbage:
 
     def _decide_dealer(self) -> Player:
 
-        self.players.dealer = np.random.choice(self.players)
+        self.players.dealer = self.players[self.rng.integers(self.n_players)]
+
+    def _dealer_seat(self) -> int:
+
+        return next(
+            seat for seat, player in enumerate(self.players) if player.is_dealer
+        )
 
     def _find_winner(self) -> Player:
 
-        for player in self.players:
-            if player.score >= self.winning_points:
-                return player
+        if self.state.winner is None:
+            return None
+
+        return self.players[self.state.winner]
 
-        return None
+    def _update_score(self, seat: int) -> int:
+        """
+        Copies a seat's score from the state to its player, returning the
+        points they've just scored
+        """
+
+        player = self.players[seat]
+        points = self.state.scores[seat] - player.score
+        player.score = self.state.scores[seat]
+        return points
 
     def _fix_deal_pile(self, n_required_cards):
         """
@@ -71,8 +193,7 @@ class Cribbage:
         then shuffle the discard pile and append them
         """
         if n_required_cards > len(self.deal_pile):
-            self.discard_pile.shuffle()
-            self.deal_pile += self.discard_pile.play_all()
+            self.deal_pile.add_to_bottom(self.discard_pile.play_all(), rng=self.rng)
 
     def _deal_cards_to_players(self):
 
@@ -81,69 +202,52 @@ class Cribbage:
         self._fix_deal_pile(n_required_cards)
 
         for player in self.players:
-            for _ in range(self.cards_per_player):
-                dealt_card = self.deal_pile.deal_card()
-                player.hand += dealt_card
-
-    def _score_hand(self, hand: Cards, is_crib: bool = False):
-
-        hand_score = 0
-
-        effective_hand = deepcopy(hand)
-        effective_hand += self.turn_up_card
+            player.hand += self.deal_pile.deal_cards(self.cards_per_player)
 
-        # look for 15s
-        for n_cards in [2, 3, 4, 5]:
-            for cards in combinations(effective_hand, n_cards):
-                if sum(cribbage_card_value(card) for card in cards) == 15:
-                    hand_score += 2
-
-        # look for pairs
-        for card1, card2 in combinations(effective_hand, 2):
-            if card1.value == card2.value:
-                hand_score += 2
-
-        # look for flushes
-        if effective_hand.contains_flush(5):
-            hand_score += 5
-        # can only get flushes of 4 in certain situations
-        elif hand.contains_flush(4) and not is_crib:
-            hand_score += 4
+        self.state.apply(
+            Deal(tuple(tuple(player.hand.indices()) for player in self.players))
+        )
 
-        # look for runs
-        runs = effective_hand.get_straights(3, 5)
-        hand_score += sum(map(len, runs))
+    @staticmethod
+    def score_hand(hand: Cards, turn_up_card: Card, is_crib: bool = False) -> int:
+        """
+        Score a hand (or crib) together with the turn up card, see
+        `scoring.score_hand`
+        """
+        return score_hand(hand, turn_up_card, is_crib)
 
-        # look for knobs
-        for card in hand:
-            if card.value == FaceValue.JACK and card.suit == self.turn_up_card.suit:
-                hand_score += 1
+    def _score_hand(self, hand: Cards, is_crib: bool = False):
 
-        return hand_score
+        return self.score_hand(hand, self.turn_up_card, is_crib)
 
     def _receive_crib_cards_from_players(self):
 
+        n_required = self.state.n_discards
+
         for player in self.players:
-            if self.n_players == 2:
-                self.crib += player.give_cards_to_crib(n_required=2)
-            elif self.n_players in {3, 4}:
-                self.crib += player.give_cards_to_crib(n_required=1)
+            crib_cards = self._decide(player.give_cards_to_crib, n_required)
+            self.state.apply(Discard(tuple(crib_cards.indices())))
+
+            if self._subscribers:
+                self._emit(DiscardEvent(player, crib_cards))
 
         if self.n_players == 3:
             n_required_cards = 1
             self._fix_deal_pile(n_required_cards)
-            self.crib += self.deal_pile.deal_card()
+            crib_card = self.deal_pile.deal_card()
+            self.state.apply(CribCard(crib_card.index))
 
     def _choose_turn_up(self):
 
         self._fix_deal_pile(n_required_cards=1)
-        self.turn_up_card = self.deal_pile.play_random_card()
-        self.discard_pile += self.turn_up_card
+        turn_up_card = self.deal_pile.play_random_card(self.rng)
+        self.discard_pile += turn_up_card
+
+        self.state.apply(TurnUp(turn_up_card.index))
+        points = self._update_score(self.state.dealer)
 
-        LOGGER.info(f"turn up card is {self.turn_up_card}")
-        if self.turn_up_card.value == FaceValue.JACK:
-            self.players.dealer.score += 2
-            LOGGER.info(f"{self.players.dealer.name} score 2 points for that")
+        if self._subscribers:
+            self._emit(TurnUpEvent(turn_up_card, self.players.dealer, points))
 
         return self._find_winner()
 
@@ -151,153 +255,223 @@ class Cribbage:
     def score_pegging_contribution(pegged_cards: Cards, last_card: bool):
         """
         Given a sequence of pegged cards, compute what score would be
-        earned from pegging the final card in the sequence
+        earned from pegging the final card in the sequence. Uses the score
+        cache when it's enabled.
         """
 
-        score = 0
-
-        # score multiples
-        card_values = [card.value for card in pegged_cards]
-        if len(card_values) >= 4 and len(set(card_values[-4:])) == 1:
-            score += 12
-        elif len(card_values) >= 3 and len(set(card_values[-3:])) == 1:
-            score += 6
-        elif len(card_values) >= 2 and len(set(card_values[-2:])) == 1:
-            score += 2
-
-        # score runs
-        for i in range(len(pegged_cards) - 2):
-            if pegged_cards[i:].contains_straight(len(pegged_cards) - i):
-                score += len(pegged_cards) - i
-                break
-
-        current_pegging_total = sum_cribbage_card_values(pegged_cards)
-        # score 15
-        if current_pegging_total == 15:
-            score += 2
-
-        # score last card
-        if current_pegging_total == 31:
-            score += 2
-        elif last_card:
-            score += 1
+        cache = score_cache.CACHES.pegging
+        if cache is None:
+            return Cribbage._compute_pegging_contribution(pegged_cards, last_card)
 
+        key = score_cache.pegging_key(pegged_cards, last_card)
+        score = cache.get(key)
+        if score is None:
+            score = Cribbage._compute_pegging_contribution(pegged_cards, last_card)
+            cache.put(key, score)
         return score
 
-    def _count_players_that_can_peg(self, pegged_cards: Cards):
-        return sum(player.can_peg(pegged_cards) for player in self.players)
-
-    def _play_pegging_phase(self):
-
-        player_order_gen = self.players.get_player_order_generator()
-
-        for player in self.players:
-            player.pegging_hand = deepcopy(player.hand)
-
-        while any(len(player.pegging_hand) > 0 for player in self.players):
-
-            pegged_cards = Cards.empty()
+    @staticmethod
+    def _compute_pegging_contribution(pegged_cards: Cards, last_card: bool) -> int:
 
-            while self._count_players_that_can_peg(pegged_cards) > 0:
+        score = 0
+        pegging_state = PeggingState()
+        for card in pegged_cards:
+            score = pegging_state.play(card)
 
-                player = next(player_order_gen)
+        if last_card:
+            score += pegging_state.last_card_points()
 
-                if player.can_peg(pegged_cards):
-                    pegging_card_played = player.play_pegging_card(pegged_cards)
-                    pegged_cards += pegging_card_played
+        return score
 
-                    last_card = self._count_players_that_can_peg(pegged_cards) == 0
-                    scoring_contribution = self.score_pegging_contribution(
-                        pegged_cards, last_card
-                    )
-                    player.score += scoring_contribution
+    def _play_pegging_phase(self):
 
-                    current_pegging_total = sum_cribbage_card_values(pegged_cards)
-                    LOGGER.info(
-                        f"{player.name} played {pegging_card_played},"
-                        f" scoring {scoring_contribution}."
-                        f" The new pegging total is {current_pegging_total}"
+        for player in self.players:
+            player.pegging_hand = player.hand.copy()
+
+        pegging = self.state.pegging
+
+        while self.state.phase == PEGGING:
+
+            seat = self.state.to_move
+            player = self.players[seat]
+
+            if self.state.can_peg(seat):
+                pegging_card_played = self._decide(
+                    player.play_pegging_card, pegging.cards
+                )
+                pegging_total = pegging.count + CARD_POINTS[pegging_card_played.index]
+                self.state.apply(Peg(pegging_card_played.index))
+                scoring_contribution = self._update_score(seat)
+
+                if self._subscribers:
+                    self._emit(
+                        PegEvent(
+                            player,
+                            pegging_card_played,
+                            scoring_contribution,
+                            pegging_total,
+                        )
                     )
-                else:
-                    LOGGER.info(f"{player.name} can't go")
+            else:
+                self.state.apply(Go())
+                if self._subscribers:
+                    self._emit(GoEvent(player))
 
-                if self._find_winner():
-                    return True
+            if self._find_winner():
+                return True
 
         return False
 
     def _score_hands(self) -> None:
 
-        LOGGER.info(f"The turnup card is {self.turn_up_card}")
         for player in self.players:
-            score = self._score_hand(player.hand)
-            player.score += score
-            LOGGER.info(
-                f"{player.name} has ({player.hand}) scoring {score}."
-                f" Their total is {player.score}"
-            )
+            seat = self.state.to_move
+            self.state.apply(ScoreHand())
+            score = self._update_score(seat)
+            if self._subscribers:
+                self._emit(
+                    HandScoreEvent(
+                        player,
+                        player.hand.copy(),
+                        self.turn_up_card,
+                        score,
+                        player.score,
+                    )
+                )
             if self._find_winner() is not None:
                 return
 
     def _score_crib(self):
 
         dealer = self.players.dealer
-        crib_score = self._score_hand(self.crib)
-        dealer.score += crib_score
-        LOGGER.info(
-            f"{dealer.name} has crib ({self.crib}) scoring {crib_score}."
-            f" Their total is {dealer.score}"
-        )
+        seat = self.state.dealer
+        self.state.apply(ScoreCrib())
+        crib_score = self._update_score(seat)
+        if self._subscribers:
+            self._emit(
+                CribScoreEvent(
+                    dealer,
+                    self.crib,
+                    self.turn_up_card,
+                    crib_score,
+                    dealer.score,
+                )
+            )
 
     def _discard_hands_and_crib(self):
 
         for player in self.players:
             self.discard_pile += player.hand.play_all()
 
-        self.discard_pile += self.crib.play_all()
+        # the state forgets the crib when the next round is dealt
+        self.discard_pile += self.crib
 
     def play(self):
         """
         The main game loop
         """
 
+        if self.instrumentation is None:
+            return self._play()
+
+        self.instrumentation.start_game()
+        try:
+            return self._play()
+        finally:
+            self.instrumentation.end_game()
+
+    def _play(self):
+
         i = 0
         while i < 1000:
 
-            LOGGER.info(f"Starting turn {i+1}.")
-            LOGGER.info(
-                f"Player scores are {[player.score for player in self.players]}"
-            )
-            LOGGER.info(f"The dealer is {self.players.dealer.name}")
-
-            LOGGER.info("Dealing cards")
-            self._deal_cards_to_players()
+            self._run_phase("deal", self._deal_cards_to_players)
+            if self._subscribers:
+                self._emit(
+                    DealEvent(
+                        turn=i + 1,
+                        dealer=self.players.dealer,
+                        hands=tuple(player.hand.copy() for player in self.players),
+                        scores=tuple(player.score for player in self.players),
+                    )
+                )
 
-            LOGGER.info("Receiving crib cards")
-            self._receive_crib_cards_from_players()
-            LOGGER.info("Crib cards received")
+            self._run_phase("crib", self._receive_crib_cards_from_players)
 
-            for scoring_phase in (
-                self._choose_turn_up,
-                self._play_pegging_phase,
-                self._score_hands,
-                self._score_crib,
+            for phase_name, scoring_phase in (
+                ("turn_up", self._choose_turn_up),
+                ("pegging", self._play_pegging_phase),
+                ("score_hands", self._score_hands),
+                ("score_crib", self._score_crib),
             ):
-                LOGGER.info(f"Starting scoring phase {scoring_phase.__name__}")
-
-                scoring_phase()
+                self._run_phase(phase_name, scoring_phase)
 
                 winner_or_none = self._find_winner()
                 if winner_or_none is not None:
+                    if self._subscribers:
+                        self._emit(self._game_end_event(winner_or_none, i + 1))
                     return winner_or_none
 
-                LOGGER.info(f"Finishing scoring phase {scoring_phase.__name__}")
-
-            LOGGER.info("Discarding players' cards")
             self._discard_hands_and_crib()
 
             self.players.permute_dealer()
 
             i += 1
 
+        if self._subscribers:
+            self._emit(self._game_end_event(None, i))
         raise TimeoutError("Too many turns taken")
+
+    def _run_phase(self, name: str, phase: Callable[[], object]) -> None:
+        """
+        Runs a phase of the turn, timing it if the game is instrumented
+        """
+
+        if self.instrumentation is None:
+            phase()
+            return
+
+        start_time = time.perf_counter()
+        phase()
+        self.instrumentation.record_phase(
+            name, time.perf_counter() - start_time, self._cards_in_phase(name)
+        )
+
+    def _cards_in_phase(self, name: str) -> int:
+        """
+        The number of cards handled by a phase, for instrumentation
+        """
+
+        if name == "deal":
+            return self.n_players * self.cards_per_player
+        if name in ("crib", "score_crib"):
+            return len(self.state.crib)
+        if name == "turn_up":
+            return 1
+
+        return sum(len(player.hand) for player in self.players)
+
+    def _decide(self, decision: Callable, *args):
+        """
+        Asks a player for a decision, timing it if the game is instrumented
+        """
+
+        if self.instrumentation is None:
+            return decision(*args)
+
+        start_time = time.perf_counter()
+        result = decision(*args)
+        self.instrumentation.record_decision(
+            f"{type(decision.__self__).__name__}.{decision.__name__}",
+            time.perf_counter() - start_time,
+            len(result) if isinstance(result, Cards) else 1,
+        )
+        return result
+
+    def _game_end_event(self, winner: Player, turns: int) -> GameEndEvent:
+
+        return GameEndEvent(
+            winner=winner,
+            scores=tuple(player.score for player in self.players),
+            turns=turns,
+        )
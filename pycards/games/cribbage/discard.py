@@ -0,0 +1,162 @@
+"""
+Expected value analysis of which cards to give to the crib.
+
+For a hand of 5 or 6 cards, every possible hold of 4 cards is scored against
+every turn up card that could still come up. Since fifteens, pairs and runs
+only depend on face values, each hold is scored once per turn up face value
+rather than once per turn up card.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import combinations
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from pycards.cards import DECK_SIZE, N_FACE_VALUES, Cards
+from pycards.games.cribbage.util import HAND_SIZE
+from pycards.games.cribbage.vectorized import (
+    lookup_fifteens_pairs_and_runs,
+    score_flushes_and_nobs,
+)
+
+CribValueFunction = Callable[[Cards, bool], float]
+
+
+@dataclass(frozen=True)
+class DiscardOption:
+    """
+    The expected outcome of keeping some cards and giving the rest to the crib.
+
+    expected_crib_score is the expected score of the whole crib, for whoever
+    owns it, so it counts for the dealer and against the other players.
+    """
+
+    hold: Cards
+    discard: Cards
+    expected_hand_score: float
+    expected_crib_score: float = 0.0
+    is_dealer: Optional[bool] = None
+
+    @property
+    def expected_value(self) -> float:
+        """
+        Expected points gained by the player from this choice
+        """
+
+        if self.is_dealer is None:
+            return self.expected_hand_score
+        if self.is_dealer:
+            return self.expected_hand_score + self.expected_crib_score
+
+        return self.expected_hand_score - self.expected_crib_score
+
+
+@lru_cache(maxsize=None)
+def _hold_combinations(n_cards: int) -> np.ndarray:
+    """
+    Positions of the held cards, for every way of keeping 4 of n_cards cards
+    """
+    return np.array(list(combinations(range(n_cards), HAND_SIZE)), dtype=np.int64)
+
+
+@lru_cache(maxsize=None)
+def _split_positions(n_cards: int) -> List[Tuple[Tuple[int, ...], Tuple[int, ...]]]:
+    """
+    (held positions, discarded positions) in the same order as _hold_combinations
+    """
+    return [
+        (hold, tuple(position for position in range(n_cards) if position not in hold))
+        for hold in combinations(range(n_cards), HAND_SIZE)
+    ]
+
+
+def hold_score_matrix(hand: Cards) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Scores every hold of 4 cards from the hand against every possible turn up.
+
+    Returns the hold positions (H x 4 indices into the hand), the possible turn
+    up cards (T card indices) and an H x T matrix of hand scores.
+    """
+
+    if len(hand) <= HAND_SIZE:
+        raise ValueError(f"Need more than {HAND_SIZE} cards to choose a discard")
+
+    hand_indices = np.array(hand.indices(), dtype=np.int64)
+    hold_positions = _hold_combinations(len(hand))
+    holds = hand_indices[hold_positions]
+
+    turn_ups = np.setdiff1d(np.arange(DECK_SIZE), hand_indices)
+    n_holds, n_turn_ups = len(holds), len(turn_ups)
+
+    # fifteens, pairs and runs, for every hold and every turn up face value
+    hold_ranks = np.repeat(holds % N_FACE_VALUES, N_FACE_VALUES, axis=0)
+    turn_up_ranks = np.tile(np.arange(N_FACE_VALUES), n_holds)
+    rank_scores = lookup_fifteens_pairs_and_runs(
+        np.column_stack([hold_ranks, turn_up_ranks])
+    ).reshape(n_holds, N_FACE_VALUES)
+
+    scores = rank_scores[:, turn_ups % N_FACE_VALUES]
+    scores += score_flushes_and_nobs(
+        np.repeat(holds, n_turn_ups, axis=0),
+        np.tile(turn_ups, n_holds),
+        np.zeros(n_holds * n_turn_ups, dtype=bool),
+    ).reshape(n_holds, n_turn_ups)
+
+    return hold_positions, turn_ups, scores
+
+
+def evaluate_discards(
+    hand: Cards,
+    is_dealer: Optional[bool] = None,
+    crib_value: Optional[CribValueFunction] = None,
+) -> List[DiscardOption]:
+    """
+    The expected outcome of every possible discard from the hand, in the
+    order given by itertools.combinations.
+
+    If crib_value is given, it is called with the discarded cards and
+    is_dealer, and should return the expected score of the crib.
+    """
+
+    _, _, scores = hold_score_matrix(hand)
+    expected_hand_scores = scores.mean(axis=1)
+
+    options = []
+    for (held, discarded), expected_hand_score in zip(
+        _split_positions(len(hand)), expected_hand_scores.tolist()
+    ):
+        hold = Cards([hand.cards[position] for position in held])
+        discard = Cards([hand.cards[position] for position in discarded])
+
+        expected_crib_score = 0.0
+        if crib_value is not None and is_dealer is not None:
+            expected_crib_score = crib_value(discard, is_dealer)
+
+        options.append(
+            DiscardOption(
+                hold=hold,
+                discard=discard,
+                expected_hand_score=expected_hand_score,
+                expected_crib_score=expected_crib_score,
+                is_dealer=is_dealer,
+            )
+        )
+
+    return options
+
+
+def best_discard(
+    hand: Cards,
+    is_dealer: Optional[bool] = None,
+    crib_value: Optional[CribValueFunction] = None,
+) -> DiscardOption:
+    """
+    The discard with the highest expected value
+    """
+
+    return max(
+        evaluate_discards(hand, is_dealer, crib_value),
+        key=lambda option: option.expected_value,
+    )
@@ -0,0 +1,160 @@
+"""
+Typed events emitted by a game of cribbage.
+
+Subscribe to a game with `Cribbage.subscribe(callback)`. Events are only
+built when a game has at least one subscriber, so unobserved games (e.g.
+simulations) don't pay for them.
+"""
+
+from dataclasses import dataclass
+from logging import getLogger
+from typing import Callable, Optional, Tuple
+
+from pycards.cards import Card, Cards
+from pycards.players import Player
+
+LOGGER = getLogger(__file__)
+
+
+@dataclass(frozen=True)
+class GameEvent:
+    """
+    Base class for all cribbage events
+    """
+
+
+@dataclass(frozen=True)
+class DealEvent(GameEvent):
+    """
+    The cards have been dealt at the start of a turn
+    """
+
+    turn: int
+    dealer: Player
+    hands: Tuple[Cards, ...]
+    scores: Tuple[int, ...]
+
+
+@dataclass(frozen=True)
+class DiscardEvent(GameEvent):
+    """
+    A player has given cards to the crib
+    """
+
+    player: Player
+    cards: Cards
+
+
+@dataclass(frozen=True)
+class TurnUpEvent(GameEvent):
+    """
+    The turn up card has been chosen. points is what the dealer scored for it.
+    """
+
+    card: Card
+    dealer: Player
+    points: int
+
+
+@dataclass(frozen=True)
+class PegEvent(GameEvent):
+    """
+    A player has played a card in the pegging phase
+    """
+
+    player: Player
+    card: Card
+    points: int
+    pegging_total: int
+
+
+@dataclass(frozen=True)
+class GoEvent(GameEvent):
+    """
+    A player couldn't play a card in the pegging phase
+    """
+
+    player: Player
+
+
+@dataclass(frozen=True)
+class HandScoreEvent(GameEvent):
+    """
+    A player's hand has been scored
+    """
+
+    player: Player
+    hand: Cards
+    turn_up_card: Card
+    points: int
+    total: int
+
+
+@dataclass(frozen=True)
+class CribScoreEvent(GameEvent):
+    """
+    The dealer's crib has been scored
+    """
+
+    player: Player
+    crib: Cards
+    turn_up_card: Card
+    points: int
+    total: int
+
+
+@dataclass(frozen=True)
+class GameEndEvent(GameEvent):
+    """
+    The game has finished. winner is None if it was abandoned.
+    """
+
+    winner: Optional[Player]
+    scores: Tuple[int, ...]
+    turns: int
+
+
+EventSubscriber = Callable[[GameEvent], None]
+
+
+def log_event(event: GameEvent) -> None:
+    """
+    Subscriber which logs a human readable description of each event
+    """
+
+    if isinstance(event, DealEvent):
+        LOGGER.info(f"Starting turn {event.turn}.")
+        LOGGER.info(f"Player scores are {list(event.scores)}")
+        LOGGER.info(f"The dealer is {event.dealer.name}")
+    elif isinstance(event, DiscardEvent):
+        LOGGER.info(f"{event.player.name} gave {len(event.cards)} cards to the crib")
+    elif isinstance(event, TurnUpEvent):
+        LOGGER.info(f"turn up card is {event.card}")
+        if event.points:
+            LOGGER.info(f"{event.dealer.name} score {event.points} points for that")
+    elif isinstance(event, PegEvent):
+        LOGGER.info(
+            f"{event.player.name} played {event.card},"
+            f" scoring {event.points}."
+            f" The new pegging total is {event.pegging_total}"
+        )
+    elif isinstance(event, GoEvent):
+        LOGGER.info(f"{event.player.name} can't go")
+    elif isinstance(event, HandScoreEvent):
+        LOGGER.info(
+            f"{event.player.name} has ({event.hand}) scoring {event.points}."
+            f" Their total is {event.total}"
+        )
+    elif isinstance(event, CribScoreEvent):
+        LOGGER.info(
+            f"{event.player.name} has crib ({event.crib}) scoring {event.points}."
+            f" Their total is {event.total}"
+        )
+    elif isinstance(event, GameEndEvent):
+        if event.winner is None:
+            LOGGER.info(f"The game was abandoned after {event.turns} turns")
+        else:
+            LOGGER.info(
+                f"{event.winner.name} won after {event.turns} turns,"
+                f" the final scores were {list(event.scores)}"
+            )
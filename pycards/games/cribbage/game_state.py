@@ -0,0 +1,489 @@
+"""
+Compact, undoable state of a whole game of cribbage, for 2 to 4 players.
+
+`Cribbage.play` runs the game on a GameState, and lookahead strategies can
+branch from it without copying the game's players and piles of cards:
+`apply` an action, look at the result, then `undo` it, or `clone` the state
+(which copies a handful of short lists) to play on independently.
+
+Cards are card indices, and players are seats (their position in the
+game's Players). Each action is one step of the game:
+
+- `Deal`, `CribCard` and `TurnUp` are chance actions. The state doesn't
+  hold the deck, so whoever does (e.g. `Cribbage`, with its Deck and random
+  number generator) decides which cards come up.
+- `Discard` and `Peg` are the decisions of the player to move, and `Go` is
+  forced when they can't peg.
+- `ScoreHand` and `ScoreCrib` score each hand, then the crib.
+
+The game finishes as soon as a player reaches winning_points, even part way
+through a round, the same as `Cribbage.play`.
+"""
+
+from dataclasses import dataclass, field
+from itertools import combinations
+from typing import Callable, List, NamedTuple, Optional, Tuple, Union
+
+from pycards.cards import CARDS_BY_INDEX, N_FACE_VALUES, Card, Cards, FaceValue
+from pycards.games.cribbage import score_cache
+from pycards.games.cribbage.pegging import CARD_POINTS, PEGGING_LIMIT, PeggingState
+from pycards.games.cribbage.scoring import score_hand
+
+DEAL, DISCARD, CRIB_CARD, TURN_UP, PEGGING, SCORE_HANDS, SCORE_CRIB, FINISHED = (
+    "deal",
+    "discard",
+    "crib_card",
+    "turn_up",
+    "pegging",
+    "score_hands",
+    "score_crib",
+    "finished",
+)
+
+CHANCE_PHASES = (DEAL, CRIB_CARD, TURN_UP)
+
+# (hand, turn up card, is_crib) -> points, like Cribbage.score_hand
+HandScorer = Callable[[Cards, Card, bool], int]
+# (pegged cards of the sequence, is the last card) -> points for the last
+# card, like Cribbage.score_pegging_contribution
+PeggingScorer = Callable[[Cards, bool], int]
+
+
+class Deal(NamedTuple):
+    """
+    The start of a round: the cards dealt to each seat. Abandons the round
+    in progress, if it hasn't been scored.
+    """
+
+    hands: Tuple[Tuple[int, ...], ...]
+
+
+class Discard(NamedTuple):
+    """
+    The player to move gives cards to the crib
+    """
+
+    cards: Tuple[int, ...]
+
+
+class CribCard(NamedTuple):
+    """
+    In a three player game, the card dealt from the deck to the crib
+    """
+
+    card: int
+
+
+class TurnUp(NamedTuple):
+    """
+    The turn up card
+    """
+
+    card: int
+
+
+class Peg(NamedTuple):
+    """
+    The player to move pegs a card
+    """
+
+    card: int
+
+
+class Go(NamedTuple):
+    """
+    The player to move can't peg
+    """
+
+
+class ScoreHand(NamedTuple):
+    """
+    The hand of the player to move is scored
+    """
+
+
+class ScoreCrib(NamedTuple):
+    """
+    The dealer's crib is scored, which ends the round
+    """
+
+
+Action = Union[Deal, Discard, CribCard, TurnUp, Peg, Go, ScoreHand, ScoreCrib]
+
+
+@dataclass
+class GameState:  # pylint: disable=too-many-instance-attributes
+    """
+    A game of cribbage between n_players seats.
+
+    hands are the cards each seat holds (all they were dealt before
+    discarding), pegging_hands the cards they haven't pegged yet, and
+    pegging the sequence pegged since the count was last reset. turn is the
+    number of rounds dealt so far, and winner the seat which won, once the
+    game has finished.
+
+    Every action applied is remembered so that it can be undone, unless
+    keep_history is False (e.g. when playing a whole game with no lookahead).
+    hand_scorer scores the hands and crib, and pegging_scorer, if it's given,
+    each pegged card in place of the state's own pegging scoring (which uses
+    the pegging score cache when it's enabled).
+    """
+
+    n_players: int
+    dealer: int
+    winning_points: int = 121
+    scores: List[int] = field(default_factory=list)
+    turn: int = 0
+    phase: str = DEAL
+    to_move: int = 0
+    hands: List[List[int]] = field(default_factory=list)
+    crib: List[int] = field(default_factory=list)
+    turn_up: Optional[int] = None
+    pegging_hands: List[List[int]] = field(default_factory=list)
+    pegging: PeggingState = field(default_factory=PeggingState)
+    winner: Optional[int] = None
+    keep_history: bool = field(default=True, compare=False)
+    hand_scorer: HandScorer = field(default=score_hand, compare=False, repr=False)
+    pegging_scorer: Optional[PeggingScorer] = field(
+        default=None, compare=False, repr=False
+    )
+    _history: List[tuple] = field(
+        default_factory=list, init=False, compare=False, repr=False
+    )
+    _removed: List[Tuple[List[int], int, int]] = field(
+        default_factory=list, init=False, compare=False, repr=False
+    )
+
+    def __post_init__(self):
+
+        if not self.scores:
+            self.scores = [0] * self.n_players
+
+    @property
+    def n_discards(self) -> int:
+        """
+        The number of cards each player gives to the crib
+        """
+        return 2 if self.n_players == 2 else 1
+
+    @property
+    def is_finished(self) -> bool:
+        """
+        If a player has won
+        """
+        return self.phase == FINISHED
+
+    @property
+    def is_chance(self) -> bool:
+        """
+        If the next action comes from the deck, rather than a player
+        """
+        return self.phase in CHANCE_PHASES
+
+    def clone(self) -> "GameState":
+        """
+        A copy which can be changed without affecting this state. It can't
+        undo the actions applied before it was cloned.
+        """
+
+        return GameState(
+            n_players=self.n_players,
+            dealer=self.dealer,
+            winning_points=self.winning_points,
+            scores=self.scores.copy(),
+            turn=self.turn,
+            phase=self.phase,
+            to_move=self.to_move,
+            hands=[hand.copy() for hand in self.hands],
+            crib=self.crib.copy(),
+            turn_up=self.turn_up,
+            pegging_hands=[hand.copy() for hand in self.pegging_hands],
+            pegging=self.pegging.copy(),
+            winner=self.winner,
+            keep_history=self.keep_history,
+            hand_scorer=self.hand_scorer,
+            pegging_scorer=self.pegging_scorer,
+        )
+
+    def can_peg(self, seat: int) -> bool:
+        """
+        If the seat has a card it can peg without going over 31
+        """
+        return any(
+            self.pegging.count + CARD_POINTS[card] <= PEGGING_LIMIT
+            for card in self.pegging_hands[seat]
+        )
+
+    def legal_actions(self) -> List[Action]:
+        """
+        The actions the player to move can take. Chance actions aren't
+        listed, since they depend on the deck.
+        """
+
+        if self.phase == DISCARD:
+            return [
+                Discard(cards)
+                for cards in combinations(
+                    sorted(self.hands[self.to_move]), self.n_discards
+                )
+            ]
+        if self.phase == PEGGING:
+            pegs = [
+                Peg(card)
+                for card in self.pegging_hands[self.to_move]
+                if self.pegging.count + CARD_POINTS[card] <= PEGGING_LIMIT
+            ]
+            return pegs or [Go()]
+        if self.phase == SCORE_HANDS:
+            return [ScoreHand()]
+        if self.phase == SCORE_CRIB:
+            return [ScoreCrib()]
+
+        return []
+
+    def apply(self, action: Action) -> None:
+        """
+        Take the action, in place. Raises a ValueError, without changing
+        anything, if it isn't allowed.
+        """
+
+        if self.phase == FINISHED:
+            raise ValueError("The game has finished")
+
+        apply_action = self._ACTIONS.get(type(action))
+        if apply_action is None:
+            raise ValueError(f"Unknown action {action}")
+
+        self._removed = []
+        if not self.keep_history:
+            apply_action(self, action)
+            return
+
+        pegging = self.pegging
+        snapshot = (
+            action,
+            self.phase,
+            self.to_move,
+            self.dealer,
+            self.turn,
+            self.turn_up,
+            self.winner,
+            tuple(self.scores),
+            self.hands,
+            self.pegging_hands,
+            self.crib,
+            len(self.crib),
+            pegging.sequence,
+            len(pegging.sequence),
+            pegging.count,
+            pegging.pair_length,
+        )
+        apply_action(self, action)
+        self._history.append(snapshot + (self._removed,))
+
+    def undo(self) -> Action:
+        """
+        Undo the last action applied, returning it
+        """
+
+        if not self._history:
+            raise ValueError("There are no actions to undo")
+
+        *snapshot, removed = self._history.pop()
+        self._restore(snapshot, removed)
+        return snapshot[0]
+
+    def _restore(self, snapshot, removed: List[Tuple[List[int], int, int]]) -> None:
+
+        pegging = self.pegging
+        (
+            _,
+            self.phase,
+            self.to_move,
+            self.dealer,
+            self.turn,
+            self.turn_up,
+            self.winner,
+            scores,
+            self.hands,
+            self.pegging_hands,
+            self.crib,
+            n_crib,
+            pegging.sequence,
+            n_sequence,
+            pegging.count,
+            pegging.pair_length,
+        ) = snapshot
+
+        for cards, position, card in reversed(removed):
+            cards.insert(position, card)
+        del self.crib[n_crib:]
+        del pegging.sequence[n_sequence:]
+        self.scores = list(scores)
+
+    def _expect_phase(self, *phases: str) -> None:
+
+        if self.phase not in phases:
+            raise ValueError(f"Can't do that in the {self.phase} phase")
+
+    def _remove(self, cards: List[int], card: int) -> None:
+        """
+        Remove a card from a list, remembering where it was for undo
+        """
+
+        if card not in cards:
+            raise ValueError(f"{Card.from_index(card)} isn't in the hand")
+
+        position = cards.index(card)
+        del cards[position]
+        self._removed.append((cards, position, card))
+
+    def _add_points(self, seat: int, points: int) -> None:
+
+        self.scores[seat] += points
+        if self.scores[seat] >= self.winning_points:
+            self.winner = seat
+            self.phase = FINISHED
+
+    def _score_hand(self, cards: List[int]) -> int:
+
+        return self.hand_scorer(
+            Cards.from_indices(cards), Card.from_index(self.turn_up), False
+        )
+
+    def _deal(self, action: Deal) -> None:
+
+        if len(action.hands) != self.n_players:
+            raise ValueError(f"Deal {self.n_players} hands")
+
+        self.hands = [list(hand) for hand in action.hands]
+        self.pegging_hands = [[] for _ in range(self.n_players)]
+        self.crib = []
+        self.pegging.reset()
+        self.turn_up = None
+        self.turn += 1
+        self.to_move = 0
+        self.phase = DISCARD
+
+    def _discard(self, action: Discard) -> None:
+
+        self._expect_phase(DISCARD)
+        if len(set(action.cards)) != self.n_discards:
+            raise ValueError(f"Discard {self.n_discards} different cards")
+        if any(card not in self.hands[self.to_move] for card in action.cards):
+            raise ValueError("Can only discard cards from the hand")
+
+        for card in action.cards:
+            self._remove(self.hands[self.to_move], card)
+            self.crib.append(card)
+
+        self.to_move += 1
+        if self.to_move == self.n_players:
+            self.to_move = 0
+            self.phase = CRIB_CARD if self.n_players == 3 else TURN_UP
+
+    def _crib_card(self, action: CribCard) -> None:
+
+        self._expect_phase(CRIB_CARD)
+        self.crib.append(action.card)
+        self.phase = TURN_UP
+
+    def _turn_up(self, action: TurnUp) -> None:
+
+        self._expect_phase(TURN_UP)
+        self.turn_up = action.card
+        self.pegging_hands = [hand.copy() for hand in self.hands]
+        self.to_move = (self.dealer + 1) % self.n_players
+        self.phase = PEGGING
+
+        if action.card % N_FACE_VALUES == FaceValue.JACK.value:
+            self._add_points(self.dealer, 2)
+
+    def _peg(self, action: Peg) -> None:
+
+        self._expect_phase(PEGGING)
+        player = self.to_move
+        if action.card not in self.pegging_hands[player]:
+            raise ValueError(f"{CARDS_BY_INDEX[action.card]} isn't in the hand")
+
+        self.pegging.add(CARDS_BY_INDEX[action.card])
+        self._remove(self.pegging_hands[player], action.card)
+
+        is_last_card = not any(self.can_peg(seat) for seat in range(self.n_players))
+        points = self._pegging_points(is_last_card)
+
+        self._next_pegger(is_last_card)
+        self._add_points(player, points)
+
+    def _pegging_points(self, is_last_card: bool) -> int:
+        """
+        The points for the card just pegged
+        """
+
+        pegging = self.pegging
+        if self.pegging_scorer is not None:
+            return self.pegging_scorer(pegging.cards, is_last_card)
+
+        cache = score_cache.CACHES.pegging
+        if cache is None:
+            return pegging.points(is_last_card)
+
+        key = score_cache.pegging_sequence_key(
+            pegging.sequence, pegging.count, is_last_card
+        )
+        points = cache.get(key)
+        if points is None:
+            points = pegging.points(is_last_card)
+            cache.put(key, points)
+        return points
+
+    def _go(self, _: Go) -> None:
+
+        self._expect_phase(PEGGING)
+        if self.can_peg(self.to_move):
+            raise ValueError("Can't go when a card can be pegged")
+
+        self._next_pegger(False)
+
+    def _next_pegger(self, is_last_card: bool) -> None:
+
+        self.to_move = (self.to_move + 1) % self.n_players
+        if not is_last_card:
+            return
+
+        self.pegging.reset()
+        if not any(self.pegging_hands):
+            self.to_move = 0
+            self.phase = SCORE_HANDS
+
+    def _score_hand_of_player(self, _: ScoreHand) -> None:
+
+        self._expect_phase(SCORE_HANDS)
+        player = self.to_move
+        if player + 1 == self.n_players:
+            self.phase = SCORE_CRIB
+        else:
+            self.to_move += 1
+
+        self._add_points(player, self._score_hand(self.hands[player]))
+
+    def _score_crib(self, _: ScoreCrib) -> None:
+
+        self._expect_phase(SCORE_CRIB)
+        dealer = self.dealer
+        self.dealer = (dealer + 1) % self.n_players
+        self.phase = DEAL
+
+        # scored like a hand, as Cribbage always has
+        self._add_points(dealer, self._score_hand(self.crib))
+
+    _ACTIONS = {
+        Deal: _deal,
+        Discard: _discard,
+        CribCard: _crib_card,
+        TurnUp: _turn_up,
+        Peg: _peg,
+        Go: _go,
+        ScoreHand: _score_hand_of_player,
+        ScoreCrib: _score_crib,
+    }
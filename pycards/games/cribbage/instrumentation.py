@@ -0,0 +1,221 @@
+"""
+Opt-in timings and counters for games of cribbage.
+
+Pass an `Instrumentation` to `Cribbage` to record the wall time, number of
+calls and number of cards handled by each phase of the game and by each
+kind of player decision. One instance can be shared by many games, and
+instances from different processes can be added together. Games played
+without one pay nothing for it.
+
+Every Nth game can also be run under cProfile, or have the memory it
+allocates traced with tracemalloc.
+"""
+
+import cProfile
+import io
+import pstats
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+@dataclass
+class TimingStats:
+    """
+    Totals for one phase or decision
+    """
+
+    calls: int = 0
+    seconds: float = 0.0
+    cards: int = 0
+
+    def __add__(self, other: "TimingStats") -> "TimingStats":
+        return TimingStats(
+            calls=self.calls + other.calls,
+            seconds=self.seconds + other.seconds,
+            cards=self.cards + other.cards,
+        )
+
+
+class _ProfileData:  # pylint: disable=too-few-public-methods
+    """
+    Raw cProfile stats in the form pstats.Stats accepts, which (unlike a
+    Profile or Stats) can be pickled between processes
+    """
+
+    def __init__(self, stats: dict):
+        self.stats = stats
+
+    def create_stats(self):
+        """
+        Called by pstats.Stats. The stats have already been created.
+        """
+
+
+def _merge_timings(
+    first: Dict[str, TimingStats], second: Dict[str, TimingStats]
+) -> Dict[str, TimingStats]:
+
+    merged = dict(first)
+    for name, stats in second.items():
+        merged[name] = merged.get(name, TimingStats()) + stats
+    return merged
+
+
+@dataclass
+class Instrumentation:  # pylint: disable=too-many-instance-attributes
+    """
+    Timings and counters collected from any number of games.
+
+    If profile_every is set, every profile_every-th game (starting with the
+    first) is run under cProfile, and likewise trace_memory_every for
+    tracemalloc. Only the top_n_allocations biggest allocation sites of each
+    traced game are kept.
+    """
+
+    profile_every: Optional[int] = None
+    trace_memory_every: Optional[int] = None
+    top_n_allocations: int = 20
+
+    n_games: int = 0
+    phases: Dict[str, TimingStats] = field(default_factory=dict)
+    decisions: Dict[str, TimingStats] = field(default_factory=dict)
+    profiles: List[dict] = field(default_factory=list, repr=False)
+    allocations: List[List[str]] = field(default_factory=list, repr=False)
+
+    _profiler: Optional[cProfile.Profile] = field(
+        default=None, init=False, compare=False, repr=False
+    )
+
+    def __add__(self, other: "Instrumentation") -> "Instrumentation":
+        return Instrumentation(
+            profile_every=self.profile_every,
+            trace_memory_every=self.trace_memory_every,
+            top_n_allocations=self.top_n_allocations,
+            n_games=self.n_games + other.n_games,
+            phases=_merge_timings(self.phases, other.phases),
+            decisions=_merge_timings(self.decisions, other.decisions),
+            profiles=self.profiles + other.profiles,
+            allocations=self.allocations + other.allocations,
+        )
+
+    def __getstate__(self):
+        # a running profiler can't be pickled, and belongs to this process
+        state = self.__dict__.copy()
+        state["_profiler"] = None
+        return state
+
+    def start_game(self) -> None:
+        """
+        Called by Cribbage at the start of each game
+        """
+
+        if self.profile_every and self.n_games % self.profile_every == 0:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+        if self.trace_memory_every and self.n_games % self.trace_memory_every == 0:
+            tracemalloc.start()
+
+    def end_game(self) -> None:
+        """
+        Called by Cribbage at the end of each game
+        """
+
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profiler.create_stats()
+            self.profiles.append(self._profiler.stats)
+            self._profiler = None
+
+        if self.trace_memory_every and self.n_games % self.trace_memory_every == 0:
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                [
+                    tracemalloc.Filter(False, cProfile.__file__),
+                    tracemalloc.Filter(False, tracemalloc.__file__),
+                ]
+            )
+            tracemalloc.stop()
+            self.allocations.append(
+                [
+                    str(statistic)
+                    for statistic in snapshot.statistics("lineno")[
+                        : self.top_n_allocations
+                    ]
+                ]
+            )
+
+        self.n_games += 1
+
+    def record_phase(self, name: str, seconds: float, n_cards: int) -> None:
+        """
+        Add one call of a game phase
+        """
+        self._record(self.phases, name, seconds, n_cards)
+
+    def record_decision(self, name: str, seconds: float, n_cards: int) -> None:
+        """
+        Add one decision made by a player
+        """
+        self._record(self.decisions, name, seconds, n_cards)
+
+    @staticmethod
+    def _record(
+        table: Dict[str, TimingStats], name: str, seconds: float, n_cards: int
+    ) -> None:
+
+        stats = table.get(name)
+        if stats is None:
+            stats = table[name] = TimingStats()
+        stats.calls += 1
+        stats.seconds += seconds
+        stats.cards += n_cards
+
+    def profile_stats(self) -> Optional[pstats.Stats]:
+        """
+        The combined cProfile stats of every profiled game, or None if no
+        games were profiled
+        """
+
+        if not self.profiles:
+            return None
+
+        stats = pstats.Stats(_ProfileData(self.profiles[0]), stream=io.StringIO())
+        for profile in self.profiles[1:]:
+            stats.add(_ProfileData(profile))
+        return stats
+
+    def report(self) -> str:
+        """
+        A table of where the time went, for printing
+        """
+
+        total_seconds = sum(stats.seconds for stats in self.phases.values())
+
+        rows = [
+            (f"{heading} {name}", stats)
+            for heading, timings in (
+                ("phase", self.phases),
+                ("decision", self.decisions),
+            )
+            for name, stats in sorted(
+                timings.items(), key=lambda item: -item[1].seconds
+            )
+        ]
+        width = max((len(row_name) for row_name, _ in rows), default=0) + 2
+
+        lines = [
+            f"{'':<{width}}{'calls':>10}{'total s':>10}{'mean us':>10}"
+            f"{'% time':>8}{'cards':>10}"
+        ]
+        for row_name, stats in rows:
+            mean_us = 1e6 * stats.seconds / stats.calls if stats.calls else 0.0
+            percent = 100 * stats.seconds / total_seconds if total_seconds else 0.0
+            lines.append(
+                f"{row_name:<{width}}{stats.calls:>10}"
+                f"{stats.seconds:>10.3f}{mean_us:>10.1f}{percent:>8.1f}"
+                f"{stats.cards:>10}"
+            )
+
+        lines.append(f"{self.n_games} games, {total_seconds:.3f}s in game phases")
+        return "\n".join(lines)
@@ -0,0 +1,338 @@
+"""
+Information set Monte Carlo tree search (single observer ISMCTS) for two
+player cribbage.
+
+Each iteration deals the cards the searching player hasn't seen at random
+(a determinization, as a `GameState`), walks down the tree choosing amongst
+the actions which are possible in that determinization with UCB1, adds one
+new node and plays the round out with random moves. Turning up the card,
+goes and scoring are applied as soon as they come up, so the tree only
+holds the players' discards and pegs. Rewards are the points scored by each
+player from the decision to the end of the round, minus those of the other
+player, so the search ignores how close the players are to winning.
+
+`search` can spread the iterations of a single decision across a process
+pool: each process searches its own tree (root parallelism) and the visit
+counts at the root are added together. The caller owns the pool, e.g. an
+`ISMCTSCribbagePlayer` shuts its pool down when it's closed.
+"""
+
+import math
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from pycards.cards import CARDS_BY_INDEX, CardSet
+from pycards.games.cribbage.game_state import (
+    DEAL,
+    PEGGING,
+    SCORE_CRIB,
+    SCORE_HANDS,
+    TURN_UP,
+    Action,
+    Deal,
+    GameState,
+    TurnUp,
+)
+from pycards.games.cribbage.util import HAND_SIZE
+
+# (visits, total reward) of each action at the root
+RootStatistics = Dict[Action, Tuple[int, float]]
+
+# determinizations only play out one round, which nobody wins
+_UNREACHABLE_POINTS = 1_000_000
+
+
+@dataclass(frozen=True)
+class SearchOptions:
+    """
+    How long to search for each decision: n_iterations, or time_limit
+    seconds (whichever comes first), shared between n_processes trees.
+    exploration is the UCB1 constant, in points.
+    """
+
+    n_iterations: Optional[int] = 1000
+    time_limit: Optional[float] = None
+    exploration: float = 10.0
+    n_processes: int = 1
+
+    def __post_init__(self):
+
+        if self.n_iterations is None and self.time_limit is None:
+            raise ValueError("Need either a number of iterations or a time limit")
+
+
+@dataclass
+class PeggingInformation:
+    """
+    What a player knows once the turn up card is known: the cards they
+    haven't pegged yet, the cards the other player has pegged and how many
+    they have left, and the current pegging sequence
+    """
+
+    turn_up: int
+    pegging_hand: List[int]
+    other_pegged: List[int] = field(default_factory=list)
+    other_n_pegging_cards: int = HAND_SIZE
+    sequence: List[int] = field(default_factory=list)
+
+
+@dataclass
+class RoundInformation:
+    """
+    What a player knows about the current round when making a decision.
+    Cards are card indices. The searching player is `player`, and pegging
+    is None until the turn up card is known.
+    """
+
+    player: int
+    dealer: int
+    hand: List[int]
+    discard: List[int] = field(default_factory=list)
+    pegging: Optional[PeggingInformation] = None
+
+    def determinize(self, rng: np.random.Generator) -> Tuple[GameState, List[int]]:
+        """
+        A state of the round consistent with this information, with the
+        unseen cards dealt at random, and the rest of the deck (the turn up
+        is taken from its end). The searching player is seat 0 of the state.
+        """
+
+        pegging = self.pegging
+        seen = CardSet.from_indices(self.hand + self.discard)
+        if pegging is not None:
+            seen |= CardSet.from_indices(pegging.other_pegged + [pegging.turn_up])
+
+        unseen = (CardSet.full() - seen).indices()
+        rng.shuffle(unseen)
+
+        state = GameState(
+            2,
+            dealer=0 if self.dealer == self.player else 1,
+            winning_points=_UNREACHABLE_POINTS,
+            keep_history=False,
+        )
+
+        if pegging is None:
+            state.apply(Deal((tuple(self.hand), tuple(unseen[:6]))))
+            return state, unseen[6:]
+
+        n_other_cards = pegging.other_n_pegging_cards
+        other_pegging_hand = unseen[:n_other_cards]
+        other_discard = unseen[n_other_cards : n_other_cards + 2]
+
+        state.hands = [self.hand.copy(), pegging.other_pegged + other_pegging_hand]
+        state.pegging_hands = [pegging.pegging_hand.copy(), other_pegging_hand]
+        state.crib = self.discard + other_discard
+        state.turn_up = pegging.turn_up
+        for card in pegging.sequence:
+            state.pegging.play(CARDS_BY_INDEX[card])
+        state.phase = PEGGING
+
+        return state, unseen[n_other_cards + 2 :]
+
+
+def _apply_forced_actions(state: GameState, deck: List[int]) -> None:
+    """
+    Turns up a card from the end of the deck, goes and scores the hands and
+    crib, until a player has a decision to make or the round is over
+    """
+
+    while True:
+        if state.phase == TURN_UP:
+            state.apply(TurnUp(deck.pop()))
+        elif state.phase in (SCORE_HANDS, SCORE_CRIB) or (
+            state.phase == PEGGING and not state.can_peg(state.to_move)
+        ):
+            (action,) = state.legal_actions()
+            state.apply(action)
+        else:
+            return
+
+
+def _is_round_over(state: GameState) -> bool:
+    """
+    If the crib has been scored, so the state is waiting for the next deal
+    """
+    return state.phase == DEAL
+
+
+class Node:
+    """
+    A node of the search tree. player is who took the action leading here,
+    and rewards are from their point of view.
+    """
+
+    __slots__ = ("action", "player", "children", "visits", "availability", "reward")
+
+    def __init__(self, action: Optional[Action] = None, player: Optional[int] = None):
+
+        self.action = action
+        self.player = player
+        self.children: Dict[Action, "Node"] = {}
+        self.visits = 0
+        self.availability = 0
+        self.reward = 0.0
+
+    def select(self, actions: List[Action], exploration: float) -> "Node":
+        """
+        The child with the highest UCB1 value amongst the available actions,
+        counting each child as available whenever its action is
+        """
+
+        best_child, best_value = None, -math.inf
+        for action in actions:
+            child = self.children[action]
+            child.availability += 1
+            value = child.reward / child.visits + exploration * math.sqrt(
+                math.log(child.availability) / child.visits
+            )
+            if value > best_value:
+                best_child, best_value = child, value
+
+        return best_child
+
+    def expand(self, action: Action, player: int) -> "Node":
+        """
+        Adds a child for an action which hasn't been tried yet
+        """
+
+        child = Node(action, player)
+        self.children[action] = child
+        return child
+
+
+def _iterate(
+    root: Node,
+    information: RoundInformation,
+    rng: np.random.Generator,
+    exploration: float,
+) -> None:
+    """
+    One determinize, select, expand, simulate and backpropagate iteration
+    """
+
+    state, deck = information.determinize(rng)
+    _apply_forced_actions(state, deck)
+    node = root
+    path = [root]
+
+    # selection
+    actions = state.legal_actions()
+    while not _is_round_over(state) and all(
+        action in node.children for action in actions
+    ):
+        node = node.select(actions, exploration)
+        state.apply(node.action)
+        _apply_forced_actions(state, deck)
+        path.append(node)
+        actions = state.legal_actions()
+
+    # expansion
+    if not _is_round_over(state):
+        untried = [action for action in actions if action not in node.children]
+        action = untried[rng.integers(len(untried))]
+        child = node.expand(action, state.to_move)
+        state.apply(action)
+        _apply_forced_actions(state, deck)
+        path.append(child)
+
+    # simulation
+    while not _is_round_over(state):
+        actions = state.legal_actions()
+        state.apply(actions[rng.integers(len(actions))])
+        _apply_forced_actions(state, deck)
+
+    # backpropagation
+    for visited in path:
+        visited.visits += 1
+        if visited.player is not None:
+            visited.reward += (
+                state.scores[visited.player] - state.scores[1 - visited.player]
+            )
+
+
+def search_tree(
+    information: RoundInformation,
+    options: SearchOptions = SearchOptions(),
+    seed: Optional[np.random.SeedSequence] = None,
+) -> RootStatistics:
+    """
+    Searches from the information for the options' n_iterations, or until
+    their time_limit has passed (whichever comes first), in the current
+    process
+    """
+
+    rng = np.random.default_rng(seed)
+    root = Node()
+    deadline = (
+        None if options.time_limit is None else time.perf_counter() + options.time_limit
+    )
+
+    i = 0
+    while options.n_iterations is None or i < options.n_iterations:
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        _iterate(root, information, rng, options.exploration)
+        i += 1
+
+    return {
+        action: (child.visits, child.reward) for action, child in root.children.items()
+    }
+
+
+def search(
+    information: RoundInformation,
+    options: SearchOptions = SearchOptions(),
+    seed: Optional[np.random.SeedSequence] = None,
+    executor: Optional[Executor] = None,
+) -> Action:
+    """
+    The most visited action at the root, after searching with the options'
+    n_processes independent trees which share the iterations between them.
+    The trees are searched on executor (which should have n_processes
+    workers), or in this process if there's only one tree.
+    """
+
+    if information.pegging is None and len(information.hand) != 6:
+        raise ValueError("ISMCTS only supports discarding 2 of 6 cards")
+
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+
+    n_processes = options.n_processes
+    if n_processes == 1:
+        statistics = [search_tree(information, options, seed)]
+    else:
+        if executor is None:
+            raise ValueError(f"Need an executor to search {n_processes} trees")
+
+        tree_options = replace(
+            options,
+            n_iterations=(
+                None
+                if options.n_iterations is None
+                else -(-options.n_iterations // n_processes)
+            ),
+        )
+        statistics = list(
+            executor.map(
+                search_tree,
+                [information] * n_processes,
+                [tree_options] * n_processes,
+                seed.spawn(n_processes),
+            )
+        )
+
+    visits: Dict[Action, int] = {}
+    for tree_statistics in statistics:
+        for action, (action_visits, _) in tree_statistics.items():
+            visits[action] = visits.get(action, 0) + action_visits
+
+    if not visits:
+        raise ValueError("The search didn't complete any iterations")
+
+    return max(visits, key=visits.get)
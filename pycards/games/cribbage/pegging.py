@@ -0,0 +1,184 @@
+"""
+Incremental scoring of the pegging phase of cribbage
+"""
+
+from dataclasses import dataclass, field
+from typing import List, Sequence
+
+from pycards.cards import DECK_SIZE, N_FACE_VALUES, Card, Cards
+
+PEGGING_LIMIT = 31
+
+# the longest possible run is A-7, since A-8 adds up to more than 31
+MAX_RUN_LENGTH = 7
+
+# points for the trailing 2, 3 or 4 cards having the same face value
+PAIR_POINTS = (0, 0, 2, 6, 12)
+
+# cribbage value of each face value, and of each card by card index
+FACE_VALUE_POINTS = tuple(
+    min(face_value + 1, 10) for face_value in range(N_FACE_VALUES)
+)
+CARD_POINTS = tuple(
+    FACE_VALUE_POINTS[index % N_FACE_VALUES] for index in range(DECK_SIZE)
+)
+
+
+@dataclass
+class PeggingState:
+    """
+    The running state of one pegging sequence (up to a count of 31):
+    sequence holds the indices of the cards played, in order.
+
+    The count and the number of trailing cards with the same face value are
+    updated as each card is played, and runs are found by looking back at no
+    more than the last MAX_RUN_LENGTH cards, so playing a card takes constant
+    time however long the sequence is.
+    """
+
+    sequence: List[int] = field(default_factory=list)
+    count: int = 0
+    pair_length: int = 0
+
+    @property
+    def cards(self) -> Cards:
+        """
+        The cards played so far
+        """
+        return Cards.from_indices(self.sequence)
+
+    def copy(self) -> "PeggingState":
+        """
+        A copy which can be played on independently
+        """
+        return PeggingState(self.sequence.copy(), self.count, self.pair_length)
+
+    def reset(self):
+        """
+        Start a new sequence
+        """
+
+        self.sequence = []
+        self.count = 0
+        self.pair_length = 0
+
+    def can_play_card(self, card: Card) -> bool:
+        """
+        If the card can be played without going over 31
+        """
+        return self.count + CARD_POINTS[card.index] <= PEGGING_LIMIT
+
+    def can_play(self, hand: Cards) -> bool:
+        """
+        If any card in the hand can be played without going over 31
+        """
+        return any(self.can_play_card(card) for card in hand)
+
+    def play(self, card: Card) -> int:
+        """
+        Adds the card to the sequence, returning the points scored for pairs,
+        runs, 15 and 31. The point for the last card (a "go") isn't included,
+        since that depends on whether anyone can play next.
+        """
+
+        self.add(card)
+        return self.points()
+
+    def add(self, card: Card) -> None:
+        """
+        Adds the card to the sequence without scoring it
+        """
+
+        if not self.can_play_card(card):
+            raise ValueError(f"Playing {card} would take the count over 31")
+
+        face_value = card.index % N_FACE_VALUES
+
+        if self.sequence and self.sequence[-1] % N_FACE_VALUES == face_value:
+            self.pair_length += 1
+        else:
+            self.pair_length = 1
+
+        self.sequence.append(card.index)
+        self.count += CARD_POINTS[card.index]
+
+    def points(self, last_card: bool = False) -> int:
+        """
+        The points scored by the card added last, including the point for the
+        last card if last_card
+        """
+
+        points = PAIR_POINTS[min(self.pair_length, len(PAIR_POINTS) - 1)]
+        points += self._trailing_run_length()
+
+        if self.count == 15:
+            points += 2
+        if self.count == PEGGING_LIMIT:
+            points += 2
+        elif last_card:
+            points += 1
+
+        return points
+
+    def last_card_points(self) -> int:
+        """
+        The point for playing the last card of the sequence, which isn't due
+        if the count is exactly 31 (that already scored 2)
+        """
+        return 0 if self.count == PEGGING_LIMIT else 1
+
+    def _trailing_run_length(self) -> int:
+        """
+        The length of the longest run (of at least 3) made by the trailing cards
+        """
+        if len(self.sequence) < 3:
+            return 0
+        return trailing_run_length(
+            [card % N_FACE_VALUES for card in self.sequence[-MAX_RUN_LENGTH:]]
+        )
+
+
+def trailing_run_length(face_values: Sequence[int]) -> int:
+    """
+    The length of the longest run (of at least 3) made by the trailing face
+    values of a pegging sequence
+    """
+
+    run_length = 0
+    seen = 0
+    lowest = highest = face_values[-1]
+    for n_cards, face_value in enumerate(
+        reversed(face_values[-MAX_RUN_LENGTH:]), start=1
+    ):
+        if seen >> face_value & 1:
+            break
+        seen |= 1 << face_value
+        lowest = min(lowest, face_value)
+        highest = max(highest, face_value)
+        is_consecutive = highest - lowest + 1 == n_cards
+        if is_consecutive and n_cards >= 3:
+            run_length = n_cards
+
+    return run_length
+
+
+def pegging_points(face_values: Sequence[int], count: int) -> int:
+    """
+    Points for the last card of a pegging sequence, given the face values of
+    (at least the trailing cards of) the sequence and the count after the
+    last card. Matches `PeggingState.play`, without keeping any state.
+    """
+
+    pair_length = 1
+    while (
+        pair_length < len(face_values)
+        and face_values[-pair_length - 1] == face_values[-1]
+    ):
+        pair_length += 1
+
+    points = PAIR_POINTS[min(pair_length, len(PAIR_POINTS) - 1)]
+    points += trailing_run_length(face_values)
+    if count in (15, PEGGING_LIMIT):
+        points += 2
+
+    return points
@@ -0,0 +1,275 @@
+"""
+Exact game tree search of the pegging phase of a two player game.
+
+Suits don't matter when pegging, so positions are described by face values
+only: the face values left in the hand of the player to move and in their
+opponent's hand, the count, and the face values of the last few cards of
+the current sequence (nothing further back can affect pairs or runs). Each
+position is solved once by minimax and stored in a transposition table,
+keyed on that compact description.
+
+The value of a position is the number of points the player to move will
+peg from then until the end of the pegging phase, minus the number of
+points their opponent will peg, assuming both play perfectly.
+
+When the opponent's cards aren't known, `PeggingSolver.sampled_best_card`
+averages the value of each card over hands sampled from the unseen cards.
+"""
+
+import pickle
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+from pycards.backends import RandomGenerator, default_rng
+from pycards.cards import N_FACE_VALUES, Card, Cards
+from pycards.games.cribbage.pegging import (
+    FACE_VALUE_POINTS,
+    MAX_RUN_LENGTH,
+    PEGGING_LIMIT,
+    pegging_points,
+)
+
+# (face values in the hand of the player to move, face values in the other
+# hand, count, trailing face values of the sequence)
+PeggingPosition = Tuple[Tuple[int, ...], Tuple[int, ...], int, Tuple[int, ...]]
+
+
+class SamplingOptions(NamedTuple):
+    """
+    How `PeggingSolver.sampled_best_card` samples the other player's hands:
+    n_samples hands, drawn with rng (or a freshly seeded one, if it's None)
+    """
+
+    n_samples: int = 20
+    rng: Optional[RandomGenerator] = None
+
+
+def _can_play(face_values: Tuple[int, ...], count: int) -> bool:
+    """
+    If any of the (sorted) face values can be played without going over 31
+    """
+
+    if not face_values:
+        return False
+
+    return count + FACE_VALUE_POINTS[face_values[0]] <= PEGGING_LIMIT
+
+
+def _remove_one(face_values: Tuple[int, ...], face_value: int) -> Tuple[int, ...]:
+
+    position = face_values.index(face_value)
+    return face_values[:position] + face_values[position + 1 :]
+
+
+def _face_values(cards: Iterable[Card]) -> Tuple[int, ...]:
+    return tuple(sorted(card.index % N_FACE_VALUES for card in cards))
+
+
+class PeggingSolver:
+    """
+    Minimax search of pegging positions, with a transposition table.
+
+    The table is shared by every search made with the solver and can be
+    saved to and loaded from disk. If it grows past max_entries it is
+    cleared, to bound the memory used by long simulations.
+    """
+
+    def __init__(
+        self,
+        table: Optional[Dict[PeggingPosition, int]] = None,
+        max_entries: Optional[int] = 2_000_000,
+    ):
+
+        self.table = table if table is not None else {}
+        self.max_entries = max_entries
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    @staticmethod
+    def position(
+        hand: Iterable[Card], other_hand: Iterable[Card], pegged_cards: Cards
+    ) -> PeggingPosition:
+        """
+        The position when the player holding hand is to play, after the cards
+        of the current sequence have been pegged
+        """
+
+        trail = tuple(card.index % N_FACE_VALUES for card in pegged_cards)
+        count = sum(FACE_VALUE_POINTS[face_value] for face_value in trail)
+        return (
+            _face_values(hand),
+            _face_values(other_hand),
+            count,
+            trail[-(MAX_RUN_LENGTH - 1) :],
+        )
+
+    def value(self, position: PeggingPosition) -> int:
+        """
+        Net points for the player to move, with perfect play from both players
+        """
+
+        value = self.table.get(position)
+        if value is not None:
+            return value
+
+        hand, other_hand, count, trail = position
+
+        if not hand and not other_hand:
+            value = 0
+        elif _can_play(hand, count):
+            value = max(
+                self.move_value(position, face_value)
+                for face_value in set(hand)
+                if count + FACE_VALUE_POINTS[face_value] <= PEGGING_LIMIT
+            )
+        elif _can_play(other_hand, count):
+            # go
+            value = -self.value((other_hand, hand, count, trail))
+        else:
+            # only reachable from a position made up by the caller
+            value = self.value((hand, other_hand, 0, ()))
+
+        if self.max_entries is not None and len(self.table) >= self.max_entries:
+            self.table.clear()
+        self.table[position] = value
+
+        return value
+
+    def move_value(self, position: PeggingPosition, face_value: int) -> int:
+        """
+        Net points for the player to move if they play a card of face_value,
+        and then both players play perfectly
+        """
+
+        hand, other_hand, count, trail = position
+
+        hand = _remove_one(hand, face_value)
+        count += FACE_VALUE_POINTS[face_value]
+        if count > PEGGING_LIMIT:
+            raise ValueError("Playing that card would take the count over 31")
+
+        trail = trail + (face_value,)
+        points = pegging_points(trail, count)
+        trail = trail[-(MAX_RUN_LENGTH - 1) :]
+
+        if _can_play(other_hand, count):
+            return points - self.value((other_hand, hand, count, trail))
+        if _can_play(hand, count):
+            # the other player has to go, so we play again
+            return points + self.value((hand, other_hand, count, trail))
+
+        points += 0 if count == PEGGING_LIMIT else 1
+        if not hand and not other_hand:
+            return points
+
+        # a new sequence starts, led by the other player
+        return points - self.value((other_hand, hand, 0, ()))
+
+    def move_values(self, position: PeggingPosition) -> Dict[int, int]:
+        """
+        The value of playing each face value which can be played
+        """
+
+        hand, _, count, _ = position
+        return {
+            face_value: self.move_value(position, face_value)
+            for face_value in sorted(set(hand))
+            if count + FACE_VALUE_POINTS[face_value] <= PEGGING_LIMIT
+        }
+
+    def best_card(self, hand: Cards, other_hand: Cards, pegged_cards: Cards) -> Card:
+        """
+        The best card to play from hand when the other player's cards are known
+        """
+
+        move_values = self.move_values(self.position(hand, other_hand, pegged_cards))
+        if not move_values:
+            raise ValueError("No valid pegging card")
+
+        return _card_with_face_value(hand, max(move_values, key=move_values.get))
+
+    def sampled_best_card(
+        self,
+        hand: Cards,
+        unseen_cards: Cards,
+        n_other_cards: int,
+        pegged_cards: Cards,
+        sampling: SamplingOptions = SamplingOptions(),
+    ) -> Card:
+        """
+        The card with the best value averaged over sampled hands of
+        n_other_cards drawn from the unseen cards, for when the other
+        player's cards aren't known
+        """
+
+        rng = sampling.rng if sampling.rng is not None else default_rng()
+        unseen_face_values = [index % N_FACE_VALUES for index in unseen_cards.indices()]
+
+        hand_face_values, _, count, trail = self.position(hand, (), pegged_cards)
+
+        total_values: Dict[int, int] = {}
+        for _ in range(sampling.n_samples):
+            other_hand = tuple(
+                sorted(
+                    unseen_face_values[position]
+                    for position in rng.choice(
+                        len(unseen_face_values), size=n_other_cards, replace=False
+                    )
+                )
+            )
+            for face_value, move_value in self.move_values(
+                (hand_face_values, other_hand, count, trail)
+            ).items():
+                total_values[face_value] = total_values.get(face_value, 0) + move_value
+
+        if not total_values:
+            raise ValueError("No valid pegging card")
+
+        return _card_with_face_value(hand, max(total_values, key=total_values.get))
+
+    def save(self, path: Path) -> Path:
+        """
+        Write the transposition table to disk
+        """
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("wb") as f:
+            pickle.dump(self.table, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        return path
+
+    @classmethod
+    def load(
+        cls, path: Path, max_entries: Optional[int] = 2_000_000
+    ) -> "PeggingSolver":
+        """
+        Read a transposition table written by PeggingSolver.save
+        """
+
+        with Path(path).open("rb") as f:
+            table = pickle.load(f)
+
+        if not isinstance(table, dict):
+            raise ValueError(f"{path} is not a pegging transposition table")
+
+        return cls(table, max_entries=max_entries)
+
+
+def _card_with_face_value(hand: Cards, face_value: int) -> Card:
+
+    for card in hand:
+        if card.index % N_FACE_VALUES == face_value:
+            return card
+
+    raise ValueError(f"No card with face value {face_value} in {hand}")
+
+
+@lru_cache(maxsize=None)
+def default_pegging_solver() -> PeggingSolver:
+    """
+    A solver shared by every player in the process, so they share its table
+    """
+    return PeggingSolver()
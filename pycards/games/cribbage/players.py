@@ -2,12 +2,23 @@
 The different cribbage player innterfaces
 """
 
-import numpy as np
-
-from pycards.cards import Card, Cards
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, List, Optional
+
+from pycards.cards import Card, Cards, CardSet
+from pycards.games.cribbage.events import DealEvent, GameEvent, PegEvent, TurnUpEvent
+from pycards.games.cribbage.pegging_solver import (
+    PeggingSolver,
+    SamplingOptions,
+    default_pegging_solver,
+)
 from pycards.games.cribbage.util import cribbage_card_value, sum_cribbage_card_values
 from pycards.players import Player
 
+if TYPE_CHECKING:
+    from pycards.games.cribbage.ismcts import PeggingInformation, SearchOptions
+
 
 class CribbagePlayer(Player):
     """
@@ -61,9 +72,8 @@ class RandomCribbagePlayer(CribbagePlayer):
         if n_required not in {1, 2}:
             raise ValueError("Requested weird number of cards for crib")
 
-        cards_to_play = Cards(
-            np.random.choice(self.hand, size=n_required, replace=False)
-        )
+        positions = self.rng.choice(len(self.hand), size=n_required, replace=False)
+        cards_to_play = Cards([self.hand[position] for position in positions])
         return self.hand.play_cards(cards_to_play)
 
     def play_pegging_card(
@@ -85,6 +95,250 @@ class RandomCribbagePlayer(CribbagePlayer):
         raise ValueError("No valid pegging card")
 
 
+class ExpectedValueCribbagePlayer(RandomCribbagePlayer):
+    """
+    Gives the cards to the crib which maximise the expected score of the
+    cards kept in hand, plus or minus the expected score of the crib when
+    the crib tables are available. Pegs like RandomCribbagePlayer.
+    """
+
+    def give_cards_to_crib(self, n_required: int) -> Cards:
+        """
+        Choose which cards to give to the crib
+        """
+
+        if len(self.hand) - n_required != 4:
+            raise ValueError("Must keep exactly 4 cards after giving to the crib")
+
+        # imported here so that the players which don't need NumPy (which
+        # these use) can be imported without it
+        # pylint: disable=import-outside-toplevel
+        from pycards.games.cribbage.crib_tables import load_default_crib_table
+        from pycards.games.cribbage.discard import best_discard
+
+        crib_table = load_default_crib_table()
+        crib_value = None
+        if crib_table is not None and n_required == 2:
+            crib_value = crib_table.expected_crib_score
+
+        discard_option = best_discard(
+            self.hand, is_dealer=self.is_dealer, crib_value=crib_value
+        )
+        return self.hand.play_cards(discard_option.discard)
+
+
+@dataclass
+class PeggingSolverCribbagePlayer(ExpectedValueCribbagePlayer):
+    """
+    Discards like ExpectedValueCribbagePlayer, and pegs with the pegging game
+    tree solver in two player games.
+
+    With perfect_information the player looks at the other player's cards.
+    Otherwise they follow the game's events to work out which cards they
+    haven't seen, and average over n_samples possible hands for the other
+    player.
+    """
+
+    perfect_information: bool = False
+    n_samples: int = 20
+    solver: PeggingSolver = field(
+        default_factory=default_pegging_solver, compare=False, repr=False
+    )
+    _game: Optional[object] = field(default=None, init=False, compare=False, repr=False)
+    _seen_cards: CardSet = field(
+        default_factory=CardSet, init=False, compare=False, repr=False
+    )
+
+    def observe_game(self, game) -> None:
+        """
+        Keep track of the game, and of the cards seen during each round
+        """
+
+        self._game = game
+        if not self.perfect_information:
+            game.subscribe(self._observe_event)
+
+    def _observe_event(self, event: GameEvent) -> None:
+
+        if isinstance(event, DealEvent):
+            self._seen_cards = self.hand.to_card_set()
+        elif isinstance(event, TurnUpEvent):
+            self._seen_cards = self._seen_cards.add(event.card)
+        elif isinstance(event, PegEvent):
+            self._seen_cards = self._seen_cards.add(event.card)
+
+    def play_pegging_card(self, pegged_cards: Cards) -> Card:
+        """
+        Play the card with the best value according to the solver
+        """
+
+        if self._game is None or self._game.n_players != 2:
+            return super().play_pegging_card(pegged_cards)
+
+        # this player is the one to move
+        state = self._game.state
+        other_pegging_hand = state.pegging_hands[1 - state.to_move]
+
+        if self.perfect_information:
+            card = self.solver.best_card(
+                self.pegging_hand, Cards.from_indices(other_pegging_hand), pegged_cards
+            )
+        else:
+            unseen_cards = CardSet.full() - self._seen_cards
+            card = self.solver.sampled_best_card(
+                self.pegging_hand,
+                unseen_cards.to_cards(),
+                len(other_pegging_hand),
+                pegged_cards,
+                SamplingOptions(self.n_samples, self.rng),
+            )
+
+        return self.pegging_hand.play_card(card)
+
+
+@dataclass
+class ISMCTSCribbagePlayer(ExpectedValueCribbagePlayer):
+    """
+    Discards and pegs using information set Monte Carlo tree search in two
+    player games, following the game's events to keep track of the cards it
+    has seen. Each decision searches for as long as search_options (by
+    default SearchOptions()) says.
+
+    Searching with more than one process starts a process pool the first
+    time it's needed, which is shut down when the player is closed (or used
+    as a context manager) or garbage collected.
+
+    In other games it plays like ExpectedValueCribbagePlayer.
+    """
+
+    search_options: Optional["SearchOptions"] = None
+    _game: Optional[object] = field(default=None, init=False, compare=False, repr=False)
+    _discard: List[int] = field(
+        default_factory=list, init=False, compare=False, repr=False
+    )
+    _pegging: Optional["PeggingInformation"] = field(
+        default=None, init=False, compare=False, repr=False
+    )
+    _executor: Optional[ProcessPoolExecutor] = field(
+        default=None, init=False, compare=False, repr=False
+    )
+
+    def __post_init__(self):
+
+        if self.search_options is None:
+            # pylint: disable=import-outside-toplevel
+            from pycards.games.cribbage.ismcts import SearchOptions
+
+            self.search_options = SearchOptions()
+
+    def __enter__(self) -> "ISMCTSCribbagePlayer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Shut down the player's process pool, if it has started one
+        """
+
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def observe_game(self, game) -> None:
+        """
+        Keep track of the game, and of the cards seen during each round
+        """
+
+        self._game = game
+        game.subscribe(self._observe_event)
+
+    def _observe_event(self, event: GameEvent) -> None:
+
+        # pylint: disable=import-outside-toplevel
+        from pycards.games.cribbage.ismcts import PeggingInformation
+
+        if isinstance(event, DealEvent):
+            self._discard, self._pegging = [], None
+        elif isinstance(event, TurnUpEvent):
+            self._pegging = PeggingInformation(
+                turn_up=event.card.index, pegging_hand=[]
+            )
+        elif isinstance(event, PegEvent) and event.player is not self:
+            self._pegging.other_pegged.append(event.card.index)
+
+    def _can_search(self) -> bool:
+        return self._game is not None and self._game.n_players == 2
+
+    def _search(self, information):
+        """
+        Search from the RoundInformation
+        """
+
+        # pylint: disable=import-outside-toplevel
+        from pycards.games.cribbage.ismcts import search
+
+        if self._executor is None and self.search_options.n_processes > 1:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.search_options.n_processes
+            )
+
+        return search(
+            information,
+            self.search_options,
+            seed=self.rng.integers(2**63),
+            executor=self._executor,
+        )
+
+    def _round_information(self):
+        """
+        What the player knows about the round so far
+        """
+
+        # pylint: disable=import-outside-toplevel
+        from pycards.games.cribbage.ismcts import RoundInformation
+
+        return RoundInformation(
+            player=0,
+            dealer=0 if self.is_dealer else 1,
+            hand=self.hand.indices(),
+            discard=self._discard,
+            pegging=self._pegging,
+        )
+
+    def give_cards_to_crib(self, n_required: int) -> Cards:
+        """
+        Choose which cards to give to the crib
+        """
+
+        if not self._can_search():
+            return super().give_cards_to_crib(n_required)
+
+        discard = self._search(self._round_information())
+        self._discard = list(discard.cards)
+        return self.hand.play_cards(Cards.from_indices(discard.cards))
+
+    def play_pegging_card(self, pegged_cards: Cards) -> Card:
+        """
+        Choose a card from the players hand to play during the pegging phase
+        """
+
+        if not self._can_search():
+            return super().play_pegging_card(pegged_cards)
+
+        # this player is the one to move
+        state = self._game.state
+        self._pegging.pegging_hand = self.pegging_hand.indices()
+        self._pegging.other_n_pegging_cards = len(
+            state.pegging_hands[1 - state.to_move]
+        )
+        self._pegging.sequence = state.pegging.sequence.copy()
+
+        peg = self._search(self._round_information())
+        return self.pegging_hand.play_card(Card.from_index(peg.card))
+
+
 class CommandLinePlayer(CribbagePlayer):
     """
     Class to handle waiting for command line input from a player
@@ -0,0 +1,318 @@
+"""
+Compact binary records of games of cribbage, one fixed width record per
+round.
+
+A `GameRecordWriter` subscribes to games and streams a record of each round
+(the dealt hands, discards, turn up, pegging sequence and the points scored
+in each phase) to a file. `read_game_records` memory maps the file as a
+NumPy structured array of RECORD_DTYPE, so any number of games can be
+scanned without parsing them, e.g.
+
+    records = read_game_records(path)
+    dealer_crib_points = records["crib_points"].mean()
+
+Cards are stored as their index (see `Card.from_index`) in a single byte,
+and players as their seat (their position in the game's Players). Unused
+card slots, players and seats (e.g. the pegging sequence after the last
+card, or the winner of a round nobody won) are NO_ENTRY.
+"""
+
+import shutil
+import struct
+from contextlib import ExitStack
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional, Sequence
+
+import numpy as np
+
+from pycards.cards import Cards
+from pycards.games.cribbage.events import (
+    CribScoreEvent,
+    DealEvent,
+    DiscardEvent,
+    GameEndEvent,
+    GameEvent,
+    HandScoreEvent,
+    PegEvent,
+    TurnUpEvent,
+)
+
+GAME_RECORD_MAGIC = b"PCGR"
+GAME_RECORD_VERSION = 1
+HEADER_FORMAT = "<4sHH"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+MAX_PLAYERS = 4
+MAX_DEALT_CARDS = 6
+MAX_DISCARDS = 2
+CRIB_SIZE = 4
+MAX_PEGGED_CARDS = 16
+NO_ENTRY = 255
+
+RECORD_DTYPE = np.dtype(
+    [
+        ("game", "<u4"),
+        ("turn", "<u2"),
+        ("n_players", "u1"),
+        ("dealer", "u1"),
+        ("hands", "u1", (MAX_PLAYERS, MAX_DEALT_CARDS)),
+        ("discards", "u1", (MAX_PLAYERS, MAX_DISCARDS)),
+        ("crib", "u1", (CRIB_SIZE,)),
+        ("turn_up", "u1"),
+        ("pegged_cards", "u1", (MAX_PEGGED_CARDS,)),
+        ("pegged_by", "u1", (MAX_PEGGED_CARDS,)),
+        ("turn_up_points", "u1"),
+        ("pegging_points", "u1", (MAX_PLAYERS,)),
+        ("hand_points", "u1", (MAX_PLAYERS,)),
+        ("crib_points", "u1"),
+        ("scores", "<u2", (MAX_PLAYERS,)),
+        ("winner", "u1"),
+    ]
+)
+
+
+def empty_record() -> np.ndarray:
+    """
+    A 0-d record with no cards, players or points
+    """
+
+    record = np.zeros((), dtype=RECORD_DTYPE)
+    for name in (
+        "hands",
+        "discards",
+        "crib",
+        "turn_up",
+        "pegged_cards",
+        "pegged_by",
+        "winner",
+    ):
+        record[name] = NO_ENTRY
+
+    return record
+
+
+def _card_indices(cards: Cards, size: int) -> np.ndarray:
+
+    indices = np.full(size, NO_ENTRY, dtype=np.uint8)
+    indices[: len(cards)] = cards.indices()
+    return indices
+
+
+class GameRecordWriter:
+    """
+    Writes a record of every round of the games it's recording to path. The
+    file is open while it's used as a context manager, and records are
+    buffered, and written buffer_size at a time, until it exits (or close
+    is called).
+
+    Games are numbered from first_game, in the order they're recorded.
+    """
+
+    def __init__(self, path: Path, buffer_size: int = 4096, first_game: int = 0):
+
+        self.path = Path(path)
+        self._file: Optional[BinaryIO] = None
+        self._exit_stack = ExitStack()
+
+        self._buffer = np.zeros(buffer_size, dtype=RECORD_DTYPE)
+        self._n_buffered = 0
+        self.n_records = 0
+        self.next_game = first_game
+
+    def __enter__(self) -> "GameRecordWriter":
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with ExitStack() as stack:
+            self._file = stack.enter_context(self.path.open("wb"))
+            _write_header(self._file)
+            self._exit_stack = stack.pop_all()
+
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def record(self, game) -> None:
+        """
+        Record every round of a game (a Cribbage) played from now on
+        """
+
+        game.subscribe(_GameRecorder(self, game, self.next_game))
+        self.next_game += 1
+
+    def write(self, record: np.ndarray) -> None:
+        """
+        Add a record to the file
+        """
+
+        if self._n_buffered == len(self._buffer):
+            self.flush()
+
+        self._buffer[self._n_buffered] = record
+        self._n_buffered += 1
+
+    def flush(self) -> None:
+        """
+        Write any buffered records
+        """
+
+        if self._file is None:
+            raise ValueError(f"{self.path} isn't open")
+
+        self._buffer[: self._n_buffered].tofile(self._file)
+        self.n_records += self._n_buffered
+        self._n_buffered = 0
+        self._file.flush()
+
+    def close(self) -> None:
+        """
+        Write any buffered records and close the file
+        """
+
+        if self._file is None:
+            return
+
+        with self._exit_stack:
+            self.flush()
+        self._file = None
+
+
+class _GameRecorder:
+    """
+    Event subscriber filling in the records of one game's rounds. Rounds
+    are finished by the next deal, or the end of the game.
+    """
+
+    def __init__(self, writer: GameRecordWriter, game, game_number: int):
+
+        self.writer = writer
+        self.game = game
+        self.game_number = game_number
+        self.seats: Dict[int, int] = {
+            id(player): seat for seat, player in enumerate(game.players)
+        }
+        self.n_players = len(self.seats)
+        if self.n_players > MAX_PLAYERS:
+            raise ValueError(f"Can only record games of up to {MAX_PLAYERS} players")
+
+        self.record: Optional[np.ndarray] = None
+        self.n_pegged = 0
+
+    def __call__(self, event: GameEvent) -> None:
+
+        if isinstance(event, DealEvent):
+            self.finish_round(event.scores, None)
+            self.start_round(event)
+        elif self.record is None:
+            return
+        elif isinstance(event, DiscardEvent):
+            self.record["discards"][self.seats[id(event.player)]] = _card_indices(
+                event.cards, MAX_DISCARDS
+            )
+        elif isinstance(event, TurnUpEvent):
+            self.record["crib"] = _card_indices(self.game.crib, CRIB_SIZE)
+            self.record["turn_up"] = event.card.index
+            self.record["turn_up_points"] = event.points
+        elif isinstance(event, PegEvent):
+            seat = self.seats[id(event.player)]
+            self.record["pegged_cards"][self.n_pegged] = event.card.index
+            self.record["pegged_by"][self.n_pegged] = seat
+            self.record["pegging_points"][seat] += event.points
+            self.n_pegged += 1
+        elif isinstance(event, HandScoreEvent):
+            self.record["hand_points"][self.seats[id(event.player)]] = event.points
+        elif isinstance(event, CribScoreEvent):
+            self.record["crib_points"] = event.points
+        elif isinstance(event, GameEndEvent):
+            winner = None if event.winner is None else self.seats[id(event.winner)]
+            self.finish_round(event.scores, winner)
+
+    def start_round(self, event: DealEvent) -> None:
+        """
+        Start the record of the round just dealt
+        """
+
+        self.record = record = empty_record()
+        self.n_pegged = 0
+
+        record["game"] = self.game_number
+        record["turn"] = event.turn
+        record["n_players"] = self.n_players
+        record["dealer"] = self.seats[id(event.dealer)]
+        for seat, hand in enumerate(event.hands):
+            record["hands"][seat] = _card_indices(hand, MAX_DEALT_CARDS)
+
+    def finish_round(self, scores, winner: Optional[int]) -> None:
+        """
+        Write the record of the current round, if there is one
+        """
+
+        if self.record is None:
+            return
+
+        self.record["scores"][: len(scores)] = scores
+        if winner is not None:
+            self.record["winner"] = winner
+        self.writer.write(self.record)
+        self.record = None
+
+
+def _write_header(f: BinaryIO) -> None:
+
+    f.write(
+        struct.pack(
+            HEADER_FORMAT,
+            GAME_RECORD_MAGIC,
+            GAME_RECORD_VERSION,
+            RECORD_DTYPE.itemsize,
+        )
+    )
+
+
+def concatenate_game_records(paths: Sequence[Path], path: Path) -> Path:
+    """
+    Write the records from each of paths, in order, to a single file
+    """
+
+    path = Path(path)
+    with path.open("wb") as f:
+        _write_header(f)
+        for part_path in paths:
+            # checks the header
+            read_game_records(part_path)
+            with Path(part_path).open("rb") as part:
+                part.seek(HEADER_SIZE)
+                shutil.copyfileobj(part, f)
+
+    return path
+
+
+def read_game_records(path: Path) -> np.ndarray:
+    """
+    Memory map the records written by a GameRecordWriter, as a read only
+    structured array of RECORD_DTYPE
+    """
+
+    path = Path(path)
+    with path.open("rb") as f:
+        header = f.read(HEADER_SIZE)
+
+    if len(header) < HEADER_SIZE:
+        raise ValueError(f"{path} is too short to be a game record file")
+
+    magic, version, record_size = struct.unpack(HEADER_FORMAT, header)
+    if magic != GAME_RECORD_MAGIC:
+        raise ValueError(f"{path} is not a game record file")
+    if version != GAME_RECORD_VERSION:
+        raise ValueError(
+            f"{path} has version {version}, expected {GAME_RECORD_VERSION}"
+        )
+
+    data_size = path.stat().st_size - HEADER_SIZE
+    if record_size != RECORD_DTYPE.itemsize or data_size % record_size:
+        raise ValueError(f"{path} has the wrong record size")
+
+    if data_size == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+
+    return np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE)
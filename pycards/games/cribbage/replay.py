@@ -0,0 +1,265 @@
+"""
+Deterministic replay of recorded games of cribbage.
+
+Each round written by a `records.GameRecordWriter` holds every card and
+decision, so its points can be worked out again by the rules alone, with
+no players or random numbers. `rescore_records` replays whole archives of
+records (across a process pool for big ones) with any implementation of
+the hand and pegging scoring, and `verify_records` compares the replayed
+points with the recorded ones, e.g. to check an optimised scorer:
+
+    mismatches = verify_records(path, rules=ReplayRules(hand_scorer=my_scorer))
+
+Rounds are replayed in order within each game, starting from the previous
+round's scores, by applying their actions to a `GameState`, so they stop
+scoring as soon as a player reaches winning_points, the same as
+`Cribbage.play`.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from pycards.games.cribbage.game_state import (
+    PEGGING,
+    Action,
+    CribCard,
+    Deal,
+    Discard,
+    GameState,
+    Go,
+    HandScorer,
+    Peg,
+    PeggingScorer,
+    ScoreCrib,
+    ScoreHand,
+    TurnUp,
+)
+from pycards.games.cribbage.records import NO_ENTRY, read_game_records
+from pycards.games.cribbage.scoring import score_hand
+
+POINTS_FIELDS = (
+    "turn_up_points",
+    "pegging_points",
+    "hand_points",
+    "crib_points",
+    "scores",
+    "winner",
+)
+# the points fields scored by the dealer, rather than the seat to move
+_DEALER_POINTS = ("turn_up_points", "crib_points")
+
+
+class ReplayRules(NamedTuple):
+    """
+    How rounds are scored when they're replayed. The pegging is scored by
+    `GameState` itself unless a pegging_scorer is given.
+    """
+
+    winning_points: int = 121
+    hand_scorer: HandScorer = score_hand
+    pegging_scorer: Optional[PeggingScorer] = None
+
+
+def _indices(indices: np.ndarray) -> Tuple[int, ...]:
+
+    return tuple(int(index) for index in indices if index != NO_ENTRY)
+
+
+def _round_actions(
+    record: np.ndarray, state: GameState
+) -> Iterator[Tuple[Action, Optional[str]]]:
+    """
+    The actions of a recorded round, with the name of the points field each
+    one scores for. The goes aren't recorded, so they're taken whenever the
+    seat to move isn't the one which pegged the next card, and a round which
+    ends part way through the pegging isn't scored any further.
+    """
+
+    n_players = state.n_players
+    hands = tuple(_indices(record["hands"][seat]) for seat in range(n_players))
+    yield Deal(hands), None
+
+    discards = [_indices(record["discards"][seat]) for seat in range(n_players)]
+    for cards in discards:
+        yield Discard(cards), None
+
+    if n_players == 3:
+        discarded = {card for cards in discards for card in cards}
+        for card in _indices(record["crib"]):
+            if card not in discarded:
+                yield CribCard(card), None
+
+    yield TurnUp(int(record["turn_up"])), "turn_up_points"
+
+    for card, seat in zip(record["pegged_cards"], record["pegged_by"]):
+        if card == NO_ENTRY:
+            break
+        while state.to_move != seat:
+            yield Go(), None
+        yield Peg(int(card)), "pegging_points"
+
+    # the rest of a round cut short by the end of its game wasn't recorded
+    if state.phase == PEGGING:
+        return
+
+    for _ in range(n_players):
+        yield ScoreHand(), "hand_points"
+    yield ScoreCrib(), "crib_points"
+
+
+def _replay_round(
+    record: np.ndarray, start_scores: List[int], rules: ReplayRules
+) -> np.ndarray:
+    """
+    A copy of the record with its points and scores worked out again, by
+    applying its actions to a GameState
+    """
+
+    replayed = np.zeros((), dtype=record.dtype)
+    replayed[()] = record
+    for name in POINTS_FIELDS:
+        replayed[name] = 0
+    replayed["winner"] = NO_ENTRY
+
+    state = GameState(
+        n_players=int(record["n_players"]),
+        dealer=int(record["dealer"]),
+        winning_points=rules.winning_points,
+        scores=start_scores.copy(),
+        keep_history=False,
+        hand_scorer=rules.hand_scorer,
+        pegging_scorer=rules.pegging_scorer,
+    )
+
+    for action, points_name in _round_actions(record, state):
+        if state.is_finished:
+            break
+
+        seat = state.dealer if points_name in _DEALER_POINTS else state.to_move
+        points = state.scores[seat]
+        try:
+            state.apply(action)
+        except ValueError as error:
+            raise ValueError(
+                f"Game {record['game']} turn {record['turn']}: seat {seat}"
+                f" can't {type(action).__name__}: {error}"
+            ) from error
+        points = state.scores[seat] - points
+
+        if points_name is None:
+            continue
+        if replayed[points_name].ndim:
+            replayed[points_name][seat] += points
+        else:
+            replayed[points_name] += points
+
+    replayed["scores"][: state.n_players] = state.scores
+    if state.winner is not None:
+        replayed["winner"] = state.winner
+
+    return replayed
+
+
+def replay_records(
+    records: np.ndarray, rules: ReplayRules = ReplayRules()
+) -> np.ndarray:
+    """
+    Replays the scoring of each round, returning new records with the
+    replayed points, scores and winners. Each game's rounds must be
+    consecutive and in order, as GameRecordWriter writes them.
+    """
+
+    replayed = np.empty_like(records)
+
+    game = None
+    scores: List[int] = []
+    for i, record in enumerate(records):
+        if record["game"] != game:
+            game = record["game"]
+            scores = [0] * int(record["n_players"])
+
+        replayed[i] = _replay_round(record, scores, rules)
+        scores = replayed[i]["scores"][: len(scores)].tolist()
+
+    return replayed
+
+
+def _game_chunks(records: np.ndarray, chunk_size: int) -> List[Tuple[int, int]]:
+    """
+    (start, stop) ranges of about chunk_size records, which don't split games
+    """
+
+    game_starts = np.flatnonzero(np.diff(records["game"].astype(np.int64))) + 1
+    boundaries = [0]
+    for start in game_starts.tolist():
+        if start - boundaries[-1] >= chunk_size:
+            boundaries.append(start)
+    boundaries.append(len(records))
+
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def _replay_chunk(path: Path, start: int, stop: int, rules: ReplayRules) -> np.ndarray:
+
+    return replay_records(read_game_records(path)[start:stop], rules)
+
+
+def rescore_records(
+    path: Path,
+    rules: ReplayRules = ReplayRules(),
+    n_processes: Optional[int] = 1,
+    chunk_size: int = 10000,
+) -> np.ndarray:
+    """
+    Replays every round in a game record file, split into chunks of about
+    chunk_size records across n_processes processes (None for the CPU
+    count). The scorers have to be picklable, e.g. module level functions,
+    to use more than one process.
+    """
+
+    records = read_game_records(path)
+    chunks = _game_chunks(records, chunk_size)
+
+    if n_processes == 1:
+        replayed = [_replay_chunk(path, start, stop, rules) for start, stop in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_processes) as executor:
+            replayed = list(
+                executor.map(
+                    _replay_chunk,
+                    [path] * len(chunks),
+                    *zip(*chunks),
+                    [rules] * len(chunks),
+                )
+            )
+
+    return np.concatenate(replayed) if replayed else records[:0].copy()
+
+
+def mismatched_records(
+    records: np.ndarray,
+    replayed: np.ndarray,
+    fields: Sequence[str] = POINTS_FIELDS,
+) -> np.ndarray:
+    """
+    Indices of the records whose points differ from the replayed ones
+    """
+
+    mismatched = np.zeros(len(records), dtype=bool)
+    for name in fields:
+        differs = records[name] != replayed[name]
+        mismatched |= differs.reshape(len(records), -1).any(axis=1)
+
+    return np.flatnonzero(mismatched)
+
+
+def verify_records(path: Path, **kwargs) -> np.ndarray:
+    """
+    Indices of the records in a file whose recorded points differ from the
+    points replayed with rescore_records (which takes the same kwargs)
+    """
+
+    return mismatched_records(read_game_records(path), rescore_records(path, **kwargs))
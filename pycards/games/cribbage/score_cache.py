@@ -0,0 +1,212 @@
+"""
+Opt-in memoization of cribbage hand and pegging scores.
+
+The same hands, turn up cards and pegging sequences come up again and again,
+both within a game and in strategies which score the same candidates many
+times (e.g. ISMCTS playing out thousands of rounds from one deal). With the
+caches enabled, hands (`Cribbage.score_hand`) and pegged cards
+(`GameState`, and `Cribbage.score_pegging_contribution`) look up each score
+before working it out, keyed on a compact integer encoding of what it
+depends on:
+
+    with score_caches(capacity=100_000, policy="lru"):
+        ...
+    print(score_cache_stats())
+
+The caches are off by default, so nothing changes (and nothing is cached)
+unless they're switched on, and `disable_score_caches` switches them off
+again, e.g. to check results against uncached scoring. They're per process,
+and so are their hit, miss and eviction counters.
+"""
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional, Sequence
+
+from pycards.cards import DECK_SIZE, N_FACE_VALUES, Card, Cards
+from pycards.games.cribbage.pegging import CARD_POINTS, MAX_RUN_LENGTH
+
+EVICTION_POLICIES = ("lru", "fifo")
+
+# bits per face value in a pegging key, which leaves 0 for "no card"
+_FACE_VALUE_BITS = 4
+
+
+@dataclass
+class CacheStats:
+    """
+    Counters for one cache
+    """
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        Fraction of lookups that found a score
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ScoreCache:
+    """
+    A mapping of at most capacity scores. When it's full, adding a score
+    evicts the least recently used one ("lru") or the oldest one ("fifo").
+    """
+
+    def __init__(self, capacity: int = 100_000, policy: str = "lru"):
+
+        if capacity < 1:
+            raise ValueError("The capacity must be at least 1")
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(
+                f"Unknown eviction policy {policy},"
+                f" expected one of {', '.join(EVICTION_POLICIES)}"
+            )
+
+        self.capacity = capacity
+        self.policy = policy
+        self.stats = CacheStats()
+        self._scores: "OrderedDict[int, int]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def get(self, key: int) -> Optional[int]:
+        """
+        The cached score, or None if it isn't cached
+        """
+
+        score = self._scores.get(key)
+        if score is None:
+            self.stats.misses += 1
+            return None
+
+        self.stats.hits += 1
+        if self.policy == "lru":
+            self._scores.move_to_end(key)
+        return score
+
+    def put(self, key: int, score: int) -> None:
+        """
+        Cache a score, evicting another one if the cache is full
+        """
+
+        if len(self._scores) >= self.capacity:
+            self._scores.popitem(last=False)
+            self.stats.evictions += 1
+        self._scores[key] = score
+
+    def clear(self) -> None:
+        """
+        Forget every score, and reset the counters
+        """
+        self._scores.clear()
+        self.stats = CacheStats()
+
+
+def hand_key(hand: Cards, turn_up_card: Card, is_crib: bool) -> int:
+    """
+    The arguments of Cribbage.score_hand as an int: a bitmask of the hand's
+    cards, then the turn up card's index and is_crib
+    """
+
+    mask = 0
+    for card in hand:
+        mask |= 1 << card.index
+
+    return mask | (turn_up_card.index << DECK_SIZE) | (int(is_crib) << (DECK_SIZE + 6))
+
+
+def pegging_key(pegged_cards: Cards, last_card: bool) -> int:
+    """
+    The arguments of Cribbage.score_pegging_contribution as an int. The
+    score only depends on the count and the face values of the last
+    MAX_RUN_LENGTH cards (nothing further back can make a pair or a run).
+    """
+
+    sequence = pegged_cards.indices()
+    count = sum(CARD_POINTS[index] for index in sequence)
+    return pegging_sequence_key(sequence, count, last_card)
+
+
+def pegging_sequence_key(sequence: Sequence[int], count: int, last_card: bool) -> int:
+    """
+    pegging_key of a sequence of card indices (e.g. `PeggingState.sequence`)
+    which adds up to count
+    """
+
+    key = count << 1 | int(last_card)
+    for index in sequence[-MAX_RUN_LENGTH:]:
+        key = key << _FACE_VALUE_BITS | (index % N_FACE_VALUES + 1)
+
+    # the number of cards, so that keys can't collide
+    return key << 3 | min(len(sequence), MAX_RUN_LENGTH)
+
+
+@dataclass
+class ScoreCaches:
+    """
+    The caches in use, each None when caching is off
+    """
+
+    hand: Optional[ScoreCache] = None
+    pegging: Optional[ScoreCache] = None
+
+
+CACHES = ScoreCaches()
+
+
+def enable_score_caches(capacity: int = 100_000, policy: str = "lru") -> None:
+    """
+    Start caching hand and pegging scores, in new empty caches
+    """
+
+    CACHES.hand = ScoreCache(capacity, policy)
+    CACHES.pegging = ScoreCache(capacity, policy)
+
+
+def disable_score_caches() -> None:
+    """
+    Stop caching scores, and drop the caches
+    """
+
+    CACHES.hand = CACHES.pegging = None
+
+
+def score_caches_enabled() -> bool:
+    """
+    If scores are being cached
+    """
+    return CACHES.hand is not None
+
+
+def score_cache_stats() -> Dict[str, CacheStats]:
+    """
+    The counters of each cache in use, by name
+    """
+
+    return {
+        name: cache.stats
+        for name, cache in (("hand", CACHES.hand), ("pegging", CACHES.pegging))
+        if cache is not None
+    }
+
+
+@contextmanager
+def score_caches(capacity: int = 100_000, policy: str = "lru") -> Iterator[None]:
+    """
+    Cache scores within a with block, then go back to what was being done
+    before
+    """
+
+    previous = CACHES.hand, CACHES.pegging
+    enable_score_caches(capacity, policy)
+    try:
+        yield
+    finally:
+        CACHES.hand, CACHES.pegging = previous
@@ -0,0 +1,378 @@
+"""
+Distributions of the hand points of every hold from every starting hand.
+
+The expected hand score of a hold (see `discard.evaluate_discards`) hides
+how spread out its points are, which matters when a few points decide the
+game. For every canonical starting hand of 6 cards (two players) and 5
+cards (three or four players), and every hold of 4 of its cards, this
+counts how many of the possible turn up cards give each hand score, and
+stores the counts as a histogram of one byte per score.
+
+Starting hands which only differ by their suits have the same
+distributions, so only their canonical forms (see
+`pycards.cards.canonical_card_sets`) are analysed, which still makes about
+15 million histograms (around 550MB). Generate them (across a process pool,
+resuming from the chunks already checkpointed) with
+
+    python -m pycards.games.cribbage.score_distributions
+
+then look up any hold with
+
+    distribution = hold_distribution(hand, discard)
+    distribution.mean, distribution.variance, distribution.probability_at_least(12)
+"""
+
+import argparse
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from functools import lru_cache
+from logging import getLogger
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from pycards.cards import (
+    DECK_SIZE,
+    N_FACE_VALUES,
+    Cards,
+    canonical_card_sets,
+    canonical_form,
+)
+from pycards.games.cribbage.discard import hold_score_matrix
+
+LOGGER = getLogger(__file__)
+
+SCORE_DISTRIBUTIONS_MAGIC = b"PCSD"
+SCORE_DISTRIBUTIONS_VERSION = 1
+HEADER_FORMAT = "<4sHI"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+# number of records written to the file at a time
+_WRITE_BLOCK_SIZE = 1 << 20
+
+# Cribbage.cards_per_player, for two players and for three or four
+STARTING_HAND_SIZES = (6, 5)
+
+# hands score between 0 and 29 points
+N_SCORES = 30
+
+DISTRIBUTION_DTYPE = np.dtype([("key", "<u8"), ("counts", "u1", (N_SCORES,))])
+
+DEFAULT_SCORE_DISTRIBUTIONS_PATH = (
+    Path(__file__).parent / "data" / "score_distributions.bin"
+)
+
+
+@dataclass(frozen=True)
+class ScoreDistribution:
+    """
+    How many of the possible turn up cards give a hold each hand score,
+    counts[score]
+    """
+
+    counts: Tuple[int, ...]
+
+    @property
+    def n_turn_ups(self) -> int:
+        """
+        The number of possible turn up cards
+        """
+        return sum(self.counts)
+
+    @property
+    def mean(self) -> float:
+        """
+        Expected hand score
+        """
+        return (
+            sum(score * count for score, count in enumerate(self.counts))
+            / self.n_turn_ups
+        )
+
+    @property
+    def variance(self) -> float:
+        """
+        Variance of the hand score
+        """
+
+        mean = self.mean
+        return (
+            sum((score - mean) ** 2 * count for score, count in enumerate(self.counts))
+            / self.n_turn_ups
+        )
+
+    def probability_at_least(self, points: int) -> float:
+        """
+        Probability of the hand scoring at least points
+        """
+        return sum(self.counts[max(points, 0) :]) / self.n_turn_ups
+
+
+def distribution_key(hand: Sequence[int], discard_positions: Sequence[int]) -> int:
+    """
+    A canonical starting hand (sorted card indices) and the positions in it
+    of the discarded cards, as an int: a bitmask of the hand's cards, then a
+    bitmask of the discarded positions
+    """
+
+    key = 0
+    for index in hand:
+        key |= 1 << index
+    for position in discard_positions:
+        key |= 1 << (DECK_SIZE + position)
+
+    return key
+
+
+def hold_distribution_key(hand: Cards, discard: Cards) -> int:
+    """
+    The key of the distribution of holding the rest of the hand after
+    throwing away discard
+    """
+
+    if len(hand) not in STARTING_HAND_SIZES:
+        raise ValueError(
+            f"Starting hands have {' or '.join(map(str, STARTING_HAND_SIZES))} cards"
+        )
+    if len(hand) - len(discard) != 4 or any(card not in hand for card in discard):
+        raise ValueError("The discard must be all but 4 cards of the hand")
+
+    form = canonical_form(hand.indices())
+    (canonical_hand,) = form.groups
+    canonical_discard = [
+        form.suit_map[index // N_FACE_VALUES] * N_FACE_VALUES + index % N_FACE_VALUES
+        for index in discard.indices()
+    ]
+
+    return distribution_key(
+        canonical_hand,
+        sorted(canonical_hand.index(index) for index in canonical_discard),
+    )
+
+
+def analyse_hands(hands: Sequence[Sequence[int]]) -> np.ndarray:
+    """
+    The score distribution of every hold of each hand (sorted card indices),
+    as DISTRIBUTION_DTYPE records
+    """
+
+    records = []
+    for hand in hands:
+        hold_positions, _, scores = hold_score_matrix(Cards.from_indices(hand))
+        n_holds = len(hold_positions)
+
+        hand_records = np.zeros(n_holds, dtype=DISTRIBUTION_DTYPE)
+        hand_records["counts"] = np.bincount(
+            (np.arange(n_holds)[:, None] * N_SCORES + scores).ravel(),
+            minlength=n_holds * N_SCORES,
+        ).reshape(n_holds, N_SCORES)
+        hand_records["key"] = [
+            distribution_key(
+                hand, sorted(set(range(len(hand))) - set(positions.tolist()))
+            )
+            for positions in hold_positions
+        ]
+        records.append(hand_records)
+
+    return np.concatenate(records) if records else np.zeros(0, DISTRIBUTION_DTYPE)
+
+
+def _chunk_path(checkpoint_dir: Path, n_cards: int, start: int, stop: int) -> Path:
+
+    return checkpoint_dir / f"{n_cards}_cards_{start:07d}_{stop:07d}.npy"
+
+
+def _analyse_chunk(hands: List[Tuple[int, ...]], path: Path) -> Path:
+    """
+    Analyses a chunk of hands into a checkpoint file, which only appears
+    once it's complete
+    """
+
+    partial_path = path.with_suffix(".partial")
+    with partial_path.open("wb") as f:
+        np.save(f, analyse_hands(hands))
+    os.replace(partial_path, path)
+
+    return path
+
+
+def generate_score_distributions(
+    path: Path = DEFAULT_SCORE_DISTRIBUTIONS_PATH,
+    hand_sizes: Sequence[int] = STARTING_HAND_SIZES,
+    n_processes: Optional[int] = None,
+    chunk_size: int = 20000,
+    checkpoint_dir: Path = Path("score_distributions.checkpoint"),
+) -> Path:
+    """
+    Analyses every canonical starting hand of each of hand_sizes, in chunks
+    of chunk_size hands across n_processes processes (None for the CPU
+    count), and writes the sorted distributions to path. Chunks already in
+    checkpoint_dir aren't analysed again.
+    """
+
+    checkpoint_dir = Path(checkpoint_dir)
+    checkpoint_dir.mkdir(parents=True, exist_ok=True)
+
+    chunks: Dict[Path, List[Tuple[int, ...]]] = {}
+    for n_cards in hand_sizes:
+        hands = [form.groups[0] for form in canonical_card_sets(n_cards)]
+        for start in range(0, len(hands), chunk_size):
+            stop = min(start + chunk_size, len(hands))
+            chunks[_chunk_path(checkpoint_dir, n_cards, start, stop)] = hands[
+                start:stop
+            ]
+
+    pending = {
+        chunk_path: hands
+        for chunk_path, hands in chunks.items()
+        if not chunk_path.exists()
+    }
+    if pending:
+        with ProcessPoolExecutor(max_workers=n_processes) as executor:
+            futures = [
+                executor.submit(_analyse_chunk, hands, chunk_path)
+                for chunk_path, hands in pending.items()
+            ]
+            for i, future in enumerate(as_completed(futures)):
+                LOGGER.info(f"Finished {future.result()}, {i + 1} of {len(pending)}")
+
+    return write_score_distributions(
+        np.concatenate([np.load(chunk_path) for chunk_path in chunks]), path
+    )
+
+
+def write_score_distributions(records: np.ndarray, path: Path) -> Path:
+    """
+    Write distribution records, sorted by key, to a versioned binary file
+    """
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # the sorted order is found all at once, but the records are gathered
+    # into it and written a block at a time, rather than making a sorted
+    # copy of all of them
+    order = np.argsort(records["key"], kind="stable")
+    with path.open("wb") as f:
+        f.write(
+            struct.pack(
+                HEADER_FORMAT,
+                SCORE_DISTRIBUTIONS_MAGIC,
+                SCORE_DISTRIBUTIONS_VERSION,
+                len(records),
+            )
+        )
+        for start in range(0, len(order), _WRITE_BLOCK_SIZE):
+            block = order[start : start + _WRITE_BLOCK_SIZE]
+            records[block].astype(DISTRIBUTION_DTYPE).tofile(f)
+
+    return path
+
+
+class ScoreDistributionTable:
+    """
+    Read only, memory-mapped view of a score distributions file, searched by
+    key
+    """
+
+    def __init__(self, path: Path):
+
+        self.path = Path(path)
+
+        with self.path.open("rb") as f:
+            header = f.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE:
+            raise ValueError(
+                f"{self.path} is too short to be a score distributions file"
+            )
+
+        magic, version, n_records = struct.unpack(HEADER_FORMAT, header)
+        if magic != SCORE_DISTRIBUTIONS_MAGIC:
+            raise ValueError(f"{self.path} is not a score distributions file")
+        if version != SCORE_DISTRIBUTIONS_VERSION:
+            raise ValueError(
+                f"{self.path} has version {version},"
+                f" expected {SCORE_DISTRIBUTIONS_VERSION}"
+            )
+        if (
+            self.path.stat().st_size
+            != HEADER_SIZE + n_records * DISTRIBUTION_DTYPE.itemsize
+        ):
+            raise ValueError(f"{self.path} has the wrong number of records")
+
+        self.records = (
+            np.memmap(self.path, dtype=DISTRIBUTION_DTYPE, mode="r", offset=HEADER_SIZE)
+            if n_records
+            else np.zeros(0, dtype=DISTRIBUTION_DTYPE)
+        )
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def hold_distribution(self, hand: Cards, discard: Cards) -> ScoreDistribution:
+        """
+        The distribution of the hand score of holding the rest of a starting
+        hand after throwing away discard
+        """
+
+        key = np.uint64(hold_distribution_key(hand, discard))
+        keys = self.records["key"]
+        i = int(np.searchsorted(keys, key))
+        if i == len(keys) or keys[i] != key:
+            raise KeyError(f"{self.path} has no distribution for {hand} - {discard}")
+
+        return ScoreDistribution(tuple(self.records["counts"][i].tolist()))
+
+
+@lru_cache(maxsize=None)
+def load_score_distributions(
+    path: Path = DEFAULT_SCORE_DISTRIBUTIONS_PATH,
+) -> ScoreDistributionTable:
+    """
+    Memory maps a score distributions file, once per path
+    """
+    return ScoreDistributionTable(path)
+
+
+def hold_distribution(
+    hand: Cards, discard: Cards, path: Path = DEFAULT_SCORE_DISTRIBUTIONS_PATH
+) -> ScoreDistribution:
+    """
+    The distribution of the hand score of holding the rest of a starting
+    hand after throwing away discard, from the generated file at path
+    """
+    return load_score_distributions(Path(path)).hold_distribution(hand, discard)
+
+
+def main():
+    """
+    Command line entry point for generating the score distributions
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument(
+        "--hand-sizes", type=int, nargs="+", default=list(STARTING_HAND_SIZES)
+    )
+    parser.add_argument("--n-processes", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=20000)
+    parser.add_argument(
+        "--checkpoint-dir", type=Path, default=Path("score_distributions.checkpoint")
+    )
+    parser.add_argument("--output", type=Path, default=DEFAULT_SCORE_DISTRIBUTIONS_PATH)
+    args = parser.parse_args()
+
+    path = generate_score_distributions(
+        path=args.output,
+        hand_sizes=args.hand_sizes,
+        n_processes=args.n_processes,
+        chunk_size=args.chunk_size,
+        checkpoint_dir=args.checkpoint_dir,
+    )
+    print(f"Score distributions written to {path}")
+
+
+if __name__ == "__main__":
+    main()
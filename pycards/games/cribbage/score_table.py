@@ -0,0 +1,169 @@
+"""
+Precomputed lookup table for scoring cribbage hands.
+
+Fifteens, pairs and runs only depend on the multiset of face values in the
+hand and turn up card, so they are tabulated once for every possible multiset
+of 5 face values. The table is stored in a small versioned binary file which
+is memory-mapped when first needed.
+
+The table can be regenerated with
+
+    python -m pycards.games.cribbage.score_table
+"""
+
+import mmap
+import struct
+from functools import lru_cache
+from itertools import combinations_with_replacement
+from logging import getLogger
+from math import comb
+from pathlib import Path
+from typing import Optional, Sequence
+
+from pycards.cards import N_FACE_VALUES, N_SUITS, Card, Cards
+from pycards.games.cribbage.util import score_fifteens_pairs_and_runs
+
+LOGGER = getLogger(__file__)
+
+SCORE_TABLE_MAGIC = b"PCST"
+SCORE_TABLE_VERSION = 1
+HEADER_FORMAT = "<4sHI"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+N_TABLE_CARDS = 5
+N_RANK_MULTISETS = comb(N_FACE_VALUES + N_TABLE_CARDS - 1, N_TABLE_CARDS)
+
+DEFAULT_SCORE_TABLE_PATH = Path(__file__).parent / "data" / "hand_score_table.bin"
+
+# _BINOMIALS[i][c] == comb(c, i + 1), for the combinatorial number system
+_BINOMIALS = tuple(
+    tuple(comb(c, i + 1) for c in range(N_FACE_VALUES + N_TABLE_CARDS))
+    for i in range(N_TABLE_CARDS)
+)
+
+
+def rank_multiset_index(ranks: Sequence[int]) -> int:
+    """
+    Maps a multiset of 5 face values (each between 0 and 12) to a unique
+    index between 0 and N_RANK_MULTISETS - 1
+    """
+
+    index = 0
+    for i, rank in enumerate(sorted(ranks)):
+        index += _BINOMIALS[i][rank + i]
+
+    return index
+
+
+def generate_score_table() -> bytes:
+    """
+    Scores the fifteens, pairs and runs of every multiset of 5 face values.
+    Impossible multisets (5 of a kind) score 0.
+    """
+
+    table = bytearray(N_RANK_MULTISETS)
+    for ranks in combinations_with_replacement(range(N_FACE_VALUES), N_TABLE_CARDS):
+        if len(set(ranks)) == 1:
+            continue
+        # suits don't matter here, they just need to keep the cards distinct
+        cards = Cards(
+            [
+                Card.from_index((i % N_SUITS) * N_FACE_VALUES + rank)
+                for i, rank in enumerate(ranks)
+            ]
+        )
+        table[rank_multiset_index(ranks)] = score_fifteens_pairs_and_runs(cards)
+
+    return bytes(table)
+
+
+def write_score_table(path: Path = DEFAULT_SCORE_TABLE_PATH) -> Path:
+    """
+    Generates the score table and writes it, with a versioned header, to path
+    """
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    table = generate_score_table()
+    with path.open("wb") as f:
+        f.write(
+            struct.pack(
+                HEADER_FORMAT, SCORE_TABLE_MAGIC, SCORE_TABLE_VERSION, len(table)
+            )
+        )
+        f.write(table)
+
+    return path
+
+
+class ScoreTable:
+    """
+    Read only, memory-mapped view of a score table file
+    """
+
+    def __init__(self, path: Path):
+
+        self.path = Path(path)
+
+        with self.path.open("rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mmap) < HEADER_SIZE:
+            raise ValueError(f"{self.path} is too short to be a score table")
+
+        magic, version, n_entries = struct.unpack_from(HEADER_FORMAT, self._mmap)
+        if magic != SCORE_TABLE_MAGIC:
+            raise ValueError(f"{self.path} is not a score table")
+        if version != SCORE_TABLE_VERSION:
+            raise ValueError(
+                f"{self.path} has version {version}," f" expected {SCORE_TABLE_VERSION}"
+            )
+        if n_entries != N_RANK_MULTISETS or len(self._mmap) != HEADER_SIZE + n_entries:
+            raise ValueError(f"{self.path} has the wrong number of entries")
+
+    def __len__(self):
+        return N_RANK_MULTISETS
+
+    @property
+    def entries(self) -> memoryview:
+        """
+        Zero copy view of the table entries, one byte per rank multiset index
+        """
+        return memoryview(self._mmap)[HEADER_SIZE:]
+
+    def score_ranks(self, ranks: Sequence[int]) -> int:
+        """
+        The fifteens, pairs and runs score of 5 face values
+        """
+        return self._mmap[HEADER_SIZE + rank_multiset_index(ranks)]
+
+    def score_fifteens_pairs_and_runs(self, hand: Cards, turn_up_card: Card) -> int:
+        """
+        Table equivalent of util.score_fifteens_pairs_and_runs for a 4 card hand
+        plus the turn up card
+        """
+        ranks = [card.value.value for card in hand]
+        ranks.append(turn_up_card.value.value)
+        return self.score_ranks(ranks)
+
+
+@lru_cache(maxsize=None)
+def load_default_score_table() -> Optional[ScoreTable]:
+    """
+    Loads the score table shipped with the package, returning None if it
+    is missing or can't be used
+    """
+
+    if not DEFAULT_SCORE_TABLE_PATH.exists():
+        return None
+
+    try:
+        return ScoreTable(DEFAULT_SCORE_TABLE_PATH)
+    except ValueError as error:
+        LOGGER.warning(f"Not using the cribbage score table: {error}")
+        return None
+
+
+if __name__ == "__main__":
+    print(f"Score table written to {write_score_table()}")
@@ -0,0 +1,58 @@
+"""
+Scoring of cribbage hands, shared by `Cribbage`, `GameState` and the
+python backend
+"""
+
+from typing import List, Sequence
+
+from pycards.cards import CARDS_BY_INDEX, Card, Cards
+from pycards.games.cribbage import score_cache
+from pycards.games.cribbage.score_table import load_default_score_table
+from pycards.games.cribbage.util import (
+    score_fifteens_pairs_and_runs,
+    score_flushes_and_nobs,
+)
+
+
+def score_hand(hand: Cards, turn_up_card: Card, is_crib: bool = False) -> int:
+    """
+    Score a hand (or crib) together with the turn up card. Uses the
+    precomputed score table when it is available, and the score cache when
+    it's enabled.
+    """
+
+    cache = score_cache.CACHES.hand
+    if cache is None:
+        return _compute_hand_score(hand, turn_up_card, is_crib)
+
+    key = score_cache.hand_key(hand, turn_up_card, is_crib)
+    score = cache.get(key)
+    if score is None:
+        score = _compute_hand_score(hand, turn_up_card, is_crib)
+        cache.put(key, score)
+    return score
+
+
+def _compute_hand_score(hand: Cards, turn_up_card: Card, is_crib: bool) -> int:
+
+    score_table = load_default_score_table()
+    if score_table is not None and len(hand) == 4:
+        hand_score = score_table.score_fifteens_pairs_and_runs(hand, turn_up_card)
+    else:
+        hand_score = score_fifteens_pairs_and_runs(hand + turn_up_card)
+
+    return hand_score + score_flushes_and_nobs(hand, turn_up_card, is_crib)
+
+
+def score_hands(
+    hands: Sequence[Sequence[int]], turn_ups: Sequence[int], is_crib: bool = False
+) -> List[int]:
+    """
+    score_hand of N 4 card hands (as card indices) with their turn up cards.
+    The python backend's score_hands.
+    """
+
+    return [
+        score_hand(Cards.from_indices(hand), CARDS_BY_INDEX[turn_up], is_crib)
+        for hand, turn_up in zip(hands, turn_ups)
+    ]
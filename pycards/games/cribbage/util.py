@@ -2,8 +2,15 @@
 Util functions for cribbage
 """
 
+from itertools import combinations
+
 from pycards.cards import Card, Cards, FaceValue
 
+# the number of cards in a hand, once the crib has been dealt
+HAND_SIZE = 4
+# the face value (see `Card.index`) of a jack, for his nobs and his heels
+JACK_RANK = FaceValue.JACK.value
+
 
 def cribbage_card_value(card: Card):
     """
@@ -21,3 +28,52 @@ def sum_cribbage_card_values(cards: Cards):
     Sums the (cribbage) values of the cards
     """
     return sum(map(cribbage_card_value, cards))
+
+
+def score_fifteens_pairs_and_runs(cards: Cards) -> int:
+    """
+    Scores the parts of a cribbage hand which only depend on the face values
+    of the cards (fifteens, pairs and runs)
+    """
+
+    score = 0
+
+    # look for 15s
+    for n_cards in range(2, len(cards) + 1):
+        for combination in combinations(cards, n_cards):
+            if sum(cribbage_card_value(card) for card in combination) == 15:
+                score += 2
+
+    # look for pairs
+    for card1, card2 in combinations(cards, 2):
+        if card1.value == card2.value:
+            score += 2
+
+    # look for runs
+    for run_count in cards.count_straights(3, 5):
+        score += run_count.length * run_count.multiplicity
+
+    return score
+
+
+def score_flushes_and_nobs(hand: Cards, turn_up_card: Card, is_crib: bool) -> int:
+    """
+    Scores the parts of a cribbage hand which depend on the suits of the cards
+    (flushes and nobs)
+    """
+
+    score = 0
+
+    # look for flushes
+    if (hand + turn_up_card).contains_flush(5):
+        score += 5
+    # can only get flushes of 4 in certain situations
+    elif hand.contains_flush(4) and not is_crib:
+        score += 4
+
+    # look for knobs
+    for card in hand:
+        if card.value == FaceValue.JACK and card.suit == turn_up_card.suit:
+            score += 1
+
+    return score
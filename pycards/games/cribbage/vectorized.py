@@ -0,0 +1,213 @@
+"""
+Vectorised scoring of many cribbage hands at once.
+
+Cards are represented by their integer index (see `pycards.cards.Card.index`),
+so a batch of hands is just an integer array.
+"""
+
+from functools import lru_cache
+from itertools import combinations
+from math import comb
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+from pycards.cards import N_FACE_VALUES
+from pycards.games.cribbage.score_table import (
+    N_TABLE_CARDS,
+    load_default_score_table,
+)
+from pycards.games.cribbage.util import HAND_SIZE, JACK_RANK
+
+# at most 3 separate runs of 3 or more fit into 13 face values
+MAX_RUNS = 3
+
+# _BINOMIALS[i, c] == comb(c, i + 1), as in score_table
+_BINOMIALS = np.array(
+    [
+        [comb(c, i + 1) for c in range(N_FACE_VALUES + N_TABLE_CARDS)]
+        for i in range(N_TABLE_CARDS)
+    ],
+    dtype=np.int64,
+)
+
+
+@lru_cache(maxsize=None)
+def _subset_masks(n_cards: int) -> np.ndarray:
+    """
+    0/1 matrix with a row for every subset of at least 2 of n_cards cards
+    """
+
+    subsets = [
+        subset
+        for subset_size in range(2, n_cards + 1)
+        for subset in combinations(range(n_cards), subset_size)
+    ]
+
+    masks = np.zeros((len(subsets), n_cards), dtype=np.int64)
+    for row, subset in enumerate(subsets):
+        masks[row, list(subset)] = 1
+
+    return masks
+
+
+def rank_histograms(ranks: np.ndarray) -> np.ndarray:
+    """
+    Counts of each face value, for an N x M array of face values
+    """
+
+    n_hands = ranks.shape[0]
+    offsets = ranks + N_FACE_VALUES * np.arange(n_hands)[:, None]
+
+    return np.bincount(offsets.ravel(), minlength=n_hands * N_FACE_VALUES).reshape(
+        n_hands, N_FACE_VALUES
+    )
+
+
+@lru_cache(maxsize=None)
+def _maximal_runs_table() -> Tuple[np.ndarray, np.ndarray]:
+    """
+    For every 13 bit mask of present face values, the start and end (exclusive)
+    of each maximal run of at least 3 consecutive values. There can be at most
+    MAX_RUNS of these, unused slots have start == end.
+    """
+
+    n_masks = 1 << N_FACE_VALUES
+    starts = np.zeros((n_masks, MAX_RUNS), dtype=np.int64)
+    ends = np.zeros((n_masks, MAX_RUNS), dtype=np.int64)
+
+    for mask in range(n_masks):
+        n_runs = 0
+        run_start = None
+        for rank in range(N_FACE_VALUES + 1):
+            if rank < N_FACE_VALUES and mask >> rank & 1:
+                if run_start is None:
+                    run_start = rank
+                continue
+            if run_start is not None and rank - run_start >= 3:
+                starts[mask, n_runs] = run_start
+                ends[mask, n_runs] = rank
+                n_runs += 1
+            run_start = None
+
+    return starts, ends
+
+
+def score_runs(histograms: np.ndarray) -> np.ndarray:
+    """
+    Points for runs, given N x 13 face value histograms. Every maximal run of
+    at least 3 distinct values scores its length times the number of ways of
+    picking one card of each value.
+    """
+
+    present_masks = (histograms > 0) @ (1 << np.arange(N_FACE_VALUES))
+    run_table_starts, run_table_ends = _maximal_runs_table()
+    starts = run_table_starts[present_masks]
+    ends = run_table_ends[present_masks]
+
+    # the number of ways of choosing a run is a ratio of these cumulative
+    # products, since every count inside a run is at least 1
+    cumulative_products = np.ones(
+        (histograms.shape[0], N_FACE_VALUES + 1), dtype=np.int64
+    )
+    np.cumprod(np.maximum(histograms, 1), axis=1, out=cumulative_products[:, 1:])
+    multiplicities = np.take_along_axis(
+        cumulative_products, ends, axis=1
+    ) // np.take_along_axis(cumulative_products, starts, axis=1)
+
+    return ((ends - starts) * multiplicities).sum(axis=1)
+
+
+def score_fifteens_pairs_and_runs(ranks: np.ndarray) -> np.ndarray:
+    """
+    Vectorised version of `util.score_fifteens_pairs_and_runs`, for an
+    N x M array of face values (0 to 12)
+    """
+
+    card_values = np.minimum(ranks + 1, 10)
+
+    subset_sums = card_values @ _subset_masks(ranks.shape[1]).T
+    fifteens = 2 * (subset_sums == 15).sum(axis=1)
+
+    histograms = rank_histograms(ranks)
+    pairs = (histograms * (histograms - 1)).sum(axis=1)
+
+    return fifteens + pairs + score_runs(histograms)
+
+
+@lru_cache(maxsize=None)
+def _score_table_entries() -> Optional[np.ndarray]:
+
+    score_table = load_default_score_table()
+    if score_table is None:
+        return None
+
+    return np.frombuffer(score_table.entries, dtype=np.uint8)
+
+
+def lookup_fifteens_pairs_and_runs(ranks: np.ndarray) -> np.ndarray:
+    """
+    Same as score_fifteens_pairs_and_runs for an N x 5 array of face values,
+    but read from the precomputed score table when it is available
+    """
+
+    entries = _score_table_entries()
+    if entries is None or ranks.shape[1] != N_TABLE_CARDS:
+        return score_fifteens_pairs_and_runs(ranks)
+
+    # vectorised score_table.rank_multiset_index
+    positions = np.arange(N_TABLE_CARDS)
+    indices = _BINOMIALS[positions, np.sort(ranks, axis=1) + positions].sum(axis=1)
+
+    return entries[indices].astype(np.int64)
+
+
+def score_flushes_and_nobs(
+    hands: np.ndarray, turn_ups: np.ndarray, is_crib: np.ndarray
+) -> np.ndarray:
+    """
+    Vectorised version of `util.score_flushes_and_nobs` for 4 card hands
+    """
+
+    hand_suits = hands // N_FACE_VALUES
+    turn_up_suits = turn_ups // N_FACE_VALUES
+
+    four_flush = (hand_suits == hand_suits[:, :1]).all(axis=1)
+    five_flush = four_flush & (turn_up_suits == hand_suits[:, 0])
+    flushes = np.where(five_flush, 5, np.where(four_flush & ~is_crib, 4, 0))
+
+    nobs = (
+        (hands % N_FACE_VALUES == JACK_RANK) & (hand_suits == turn_up_suits[:, None])
+    ).sum(axis=1)
+
+    return flushes + nobs
+
+
+def score_hands(
+    hands: np.ndarray,
+    turn_ups: np.ndarray,
+    is_crib: Union[bool, np.ndarray] = False,
+) -> np.ndarray:
+    """
+    Score N cribbage hands at once, giving the same scores as
+    `Cribbage.score_hand`.
+
+    hands is an N x 4 array of card indices, turn_ups an array of N card
+    indices and is_crib either a single bool or an array of N bools.
+    """
+
+    hands = np.asarray(hands, dtype=np.int64)
+    turn_ups = np.asarray(turn_ups, dtype=np.int64)
+
+    if hands.ndim != 2 or hands.shape[1] != HAND_SIZE:
+        raise ValueError(f"hands must be an N x {HAND_SIZE} array of card indices")
+    if turn_ups.shape != (hands.shape[0],):
+        raise ValueError("There must be exactly one turn up card per hand")
+
+    is_crib = np.broadcast_to(np.asarray(is_crib, dtype=bool), turn_ups.shape)
+
+    ranks = np.concatenate([hands, turn_ups[:, None]], axis=1) % N_FACE_VALUES
+
+    return score_fifteens_pairs_and_runs(ranks) + score_flushes_and_nobs(
+        hands, turn_ups, is_crib
+    )
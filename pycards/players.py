@@ -5,6 +5,7 @@ All the functionality to handle a card player or group of card players
 from dataclasses import dataclass, field
 from typing import Generator, List
 
+from pycards.backends import RandomGenerator, default_rng
 from pycards.cards import Cards
 
 
@@ -20,6 +21,14 @@ class Player:
 
     hand: Cards = field(default_factory=Cards.empty)
     score: int = 0
+    rng: RandomGenerator = field(default_factory=default_rng, compare=False, repr=False)
+
+    def observe_game(self, game) -> None:
+        """
+        Called when the player joins a game, so that strategies which need to
+        follow the game (e.g. by subscribing to its events) can do so. Does
+        nothing by default.
+        """
 
 
 @dataclass
@@ -0,0 +1,447 @@
+"""
+Headless head-to-head simulation of cribbage strategies.
+
+Plays many games between two player classes across a process pool, e.g.
+
+    python -m pycards.simulate RandomCribbagePlayer ExpectedValueCribbagePlayer \
+        --n-games 10000 --n-processes 4
+
+Add --batched to play the games in lockstep with `batched.simulate_games`,
+which is much faster for the strategies it supports.
+"""
+
+import argparse
+import importlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass
+from itertools import accumulate
+from pathlib import Path
+from typing import Any, List, Optional, Tuple, Type
+
+from pycards.backends import get_backend
+from pycards.games.cribbage import players as cribbage_players
+from pycards.games.cribbage.cribbage import Cribbage
+from pycards.games.cribbage.instrumentation import Instrumentation
+from pycards.games.cribbage.players import CribbagePlayer
+from pycards.players import Players
+
+
+@dataclass
+class SimulationConfig:
+    """
+    How `simulate` plays its games: in chunks of chunk_size games spread
+    across a pool of n_processes, seeded from seed. Games are recorded in
+    instrumentation and written to record_path, if they're given.
+    """
+
+    n_processes: Optional[int] = None
+    chunk_size: int = 100
+    seed: Any = None
+    instrumentation: Optional[Instrumentation] = None
+    record_path: Optional[Path] = None
+
+    def __post_init__(self):
+
+        if self.chunk_size <= 0:
+            raise ValueError(f"chunk_size must be positive, not {self.chunk_size}")
+
+
+@dataclass
+class GameChunk:
+    """
+    Games played together in one process: n_games, each seeded from its own
+    seed spawned from seed. If record_path is given, the rounds of every game
+    are written there, numbering the games from first_game.
+    """
+
+    n_games: int
+    seed: Any
+    record_path: Optional[Path] = None
+    first_game: int = 0
+
+
+@dataclass
+class SimulationResult:
+    """
+    Aggregated outcome of a set of games between two strategies.
+
+    The strategies take turns to sit at seat 0, which counts its hand first,
+    so wins and margins are per strategy: margins are the final score of the
+    first strategy minus the final score of the second. first_seat_wins
+    counts the games won from seat 0, whichever strategy sat there.
+    instrumentation is only collected when asked for.
+    """
+
+    n_games: int = 0
+    first_wins: int = 0
+    second_wins: int = 0
+    total_margin: int = 0
+    elapsed_seconds: float = 0.0
+    instrumentation: Optional[Instrumentation] = None
+    first_seat_wins: int = 0
+
+    def __add__(self, other: "SimulationResult") -> "SimulationResult":
+
+        instrumentation = self.instrumentation or other.instrumentation
+        if self.instrumentation is not None and other.instrumentation is not None:
+            instrumentation = self.instrumentation + other.instrumentation
+
+        return SimulationResult(
+            n_games=self.n_games + other.n_games,
+            first_wins=self.first_wins + other.first_wins,
+            second_wins=self.second_wins + other.second_wins,
+            total_margin=self.total_margin + other.total_margin,
+            elapsed_seconds=self.elapsed_seconds + other.elapsed_seconds,
+            instrumentation=instrumentation,
+            first_seat_wins=self.first_seat_wins + other.first_seat_wins,
+        )
+
+    @property
+    def first_win_rate(self) -> float:
+        """
+        Fraction of games won by the first strategy
+        """
+        return self.first_wins / self.n_games if self.n_games else 0.0
+
+    @property
+    def second_win_rate(self) -> float:
+        """
+        Fraction of games won by the second strategy
+        """
+        return self.second_wins / self.n_games if self.n_games else 0.0
+
+    @property
+    def average_margin(self) -> float:
+        """
+        Average final score difference, in favour of the first strategy
+        """
+        return self.total_margin / self.n_games if self.n_games else 0.0
+
+    @property
+    def first_seat_win_rate(self) -> float:
+        """
+        Fraction of games won from seat 0
+        """
+        return self.first_seat_wins / self.n_games if self.n_games else 0.0
+
+
+def resolve_strategy(name: str) -> Type[CribbagePlayer]:
+    """
+    Finds a player class from either its name in
+    pycards.games.cribbage.players, or a full "module.ClassName" path
+    """
+
+    if "." in name:
+        module_name, class_name = name.rsplit(".", 1)
+        module = importlib.import_module(module_name)
+    else:
+        module, class_name = cribbage_players, name
+
+    strategy = getattr(module, class_name, None)
+    if not isinstance(strategy, type) or not issubclass(strategy, CribbagePlayer):
+        raise ValueError(f"{name} is not a CribbagePlayer class")
+
+    return strategy
+
+
+def _seat_game(
+    strategies: List[Type[CribbagePlayer]],
+    swap_seats: bool,
+    seed: Any,
+    instrumentation: Optional[Instrumentation],
+) -> Cribbage:
+    """
+    A game between the strategies, with the second one at seat 0 if
+    swap_seats
+    """
+
+    seated = strategies[::-1] if swap_seats else strategies
+    players = Players(
+        [
+            strategy(
+                is_dealer=i == 0,
+                name=f"{strategy.__name__} {i + 1}",
+                seat_position=i,
+            )
+            for i, strategy in enumerate(seated)
+        ]
+    )
+    return Cribbage(players, seed=seed, instrumentation=instrumentation)
+
+
+def _play_game(game: Cribbage, swap_seats: bool) -> SimulationResult:
+    """
+    Plays a game made by _seat_game, returning its result for each strategy.
+    Players with a close method (e.g. ISMCTSCribbagePlayer, to shut down its
+    process pool) are closed afterwards.
+    """
+
+    try:
+        winner = game.play()
+    finally:
+        for player in game.players:
+            close = getattr(player, "close", None)
+            if close is not None:
+                close()
+
+    players = game.players
+    first, second = players[int(swap_seats)], players[1 - int(swap_seats)]
+    return SimulationResult(
+        n_games=1,
+        first_wins=int(winner is first),
+        second_wins=int(winner is second),
+        total_margin=first.score - second.score,
+        first_seat_wins=int(winner is players[0]),
+    )
+
+
+def play_games(
+    strategy_names: Tuple[str, str],
+    chunk: GameChunk,
+    instrumentation: Optional[Instrumentation] = None,
+) -> SimulationResult:
+    """
+    Plays a chunk of games between the two strategies, in the current
+    process, recording them in instrumentation if it is given. The first
+    strategy sits at seat 0 in the even numbered games, and the second in
+    the odd ones.
+    """
+
+    strategies = [resolve_strategy(name) for name in strategy_names]
+
+    result = SimulationResult(instrumentation=instrumentation)
+    start_time = time.perf_counter()
+    with ExitStack() as stack:
+        writer = None
+        if chunk.record_path is not None:
+            # pylint: disable=import-outside-toplevel
+            from pycards.games.cribbage.records import GameRecordWriter
+
+            writer = stack.enter_context(
+                GameRecordWriter(chunk.record_path, first_game=chunk.first_game)
+            )
+
+        game_seeds = get_backend().spawn_seeds(chunk.seed, chunk.n_games)
+        for game_number, game_seed in enumerate(game_seeds, chunk.first_game):
+            swap_seats = game_number % 2 == 1
+            game = _seat_game(strategies, swap_seats, game_seed, instrumentation)
+            if writer is not None:
+                writer.record(game)
+            result += _play_game(game, swap_seats)
+
+    result.elapsed_seconds = time.perf_counter() - start_time
+
+    return result
+
+
+def simulate(
+    strategy_names: Tuple[str, str],
+    n_games: int,
+    config: Optional[SimulationConfig] = None,
+) -> SimulationResult:
+    """
+    Plays n_games between the two strategies, split into chunks spread
+    across a process pool as the config (by default SimulationConfig())
+    says. Each chunk gets its own seed, spawned from the config's seed, so
+    results don't depend on how chunks are scheduled.
+
+    If the config has instrumentation, each chunk records into a copy of it
+    and the result holds their sum (so profiling every Nth game counts games
+    within each chunk).
+
+    If the config has a record_path, every game is recorded there (see
+    `records.read_game_records`), numbered in the order of the chunks.
+    """
+
+    config = config if config is not None else SimulationConfig()
+
+    # fail before starting any workers if the names are wrong
+    for name in strategy_names:
+        resolve_strategy(name)
+
+    chunk_size = config.chunk_size
+    chunk_sizes: List[int] = [chunk_size] * (n_games // chunk_size)
+    if n_games % chunk_size:
+        chunk_sizes.append(n_games % chunk_size)
+
+    chunk_seeds = get_backend().spawn_seeds(config.seed, len(chunk_sizes))
+
+    chunk_record_paths = [None] * len(chunk_sizes)
+    if config.record_path is not None:
+        record_path = Path(config.record_path)
+        chunk_record_paths = [
+            record_path.with_name(f"{record_path.name}.{i}")
+            for i in range(len(chunk_sizes))
+        ]
+
+    chunks = [
+        GameChunk(*chunk)
+        for chunk in zip(
+            chunk_sizes,
+            chunk_seeds,
+            chunk_record_paths,
+            accumulate([0] + chunk_sizes[:-1]),
+        )
+    ]
+
+    with ProcessPoolExecutor(max_workers=config.n_processes) as executor:
+        chunk_results = executor.map(
+            play_games,
+            [tuple(strategy_names)] * len(chunks),
+            chunks,
+            [config.instrumentation] * len(chunks),
+        )
+        result = sum(chunk_results, SimulationResult())
+
+    if config.record_path is not None:
+        # pylint: disable=import-outside-toplevel
+        from pycards.games.cribbage.records import concatenate_game_records
+
+        concatenate_game_records(chunk_record_paths, record_path)
+        for chunk_record_path in chunk_record_paths:
+            chunk_record_path.unlink()
+
+    return result
+
+
+def simulate_batched(
+    strategy_names: Tuple[str, str], n_games: int, seed: Optional[int] = None
+) -> SimulationResult:
+    """
+    Plays n_games between the two strategies in lockstep with
+    `batched.simulate_games`, which only supports the strategies in
+    BATCHED_STRATEGIES
+    """
+
+    # imported here, since it needs NumPy
+    # pylint: disable=import-outside-toplevel
+    from pycards.games.cribbage.batched import BATCHED_STRATEGIES, simulate_games
+
+    for name in strategy_names:
+        if name not in BATCHED_STRATEGIES:
+            raise ValueError(f"{name} can't be simulated in batches")
+
+    strategies = tuple(BATCHED_STRATEGIES[name] for name in strategy_names)
+
+    start_time = time.perf_counter()
+    games = simulate_games(n_games, strategies, seed=seed)
+
+    winners = games.strategy_winners
+    scores = games.strategy_scores
+    return SimulationResult(
+        n_games=n_games,
+        first_wins=int((winners == 0).sum()),
+        second_wins=int((winners == 1).sum()),
+        total_margin=int((scores[:, 0] - scores[:, 1]).sum()),
+        elapsed_seconds=time.perf_counter() - start_time,
+        first_seat_wins=int((games.winners == 0).sum()),
+    )
+
+
+def main():
+    """
+    Command line entry point
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("first_strategy")
+    parser.add_argument("second_strategy")
+    parser.add_argument("--n-games", type=int, default=1000)
+    parser.add_argument(
+        "--n-processes", type=int, default=None, help="defaults to the CPU count"
+    )
+    parser.add_argument("--chunk-size", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument(
+        "--instrument",
+        action="store_true",
+        help="report the time spent in each phase of the game and each decision",
+    )
+    parser.add_argument(
+        "--profile-every",
+        type=int,
+        default=None,
+        help="with --instrument, run every Nth game of each chunk under cProfile",
+    )
+    parser.add_argument(
+        "--trace-memory-every",
+        type=int,
+        default=None,
+        help="with --instrument, trace the allocations of every Nth game of each chunk",
+    )
+    parser.add_argument(
+        "--batched",
+        action="store_true",
+        help="play all the games in lockstep in one process, for the strategies"
+        " in batched.BATCHED_STRATEGIES",
+    )
+    parser.add_argument(
+        "--record",
+        type=Path,
+        default=None,
+        help="write a binary record of every round of every game to this file",
+    )
+    args = parser.parse_args()
+
+    if args.chunk_size <= 0:
+        parser.error("--chunk-size must be positive")
+    if args.batched and (args.instrument or args.record):
+        parser.error("--instrument and --record can't be used with --batched")
+
+    instrumentation = None
+    if args.instrument:
+        instrumentation = Instrumentation(
+            profile_every=args.profile_every,
+            trace_memory_every=args.trace_memory_every,
+        )
+
+    start_time = time.perf_counter()
+    if args.batched:
+        result = simulate_batched(
+            (args.first_strategy, args.second_strategy),
+            n_games=args.n_games,
+            seed=args.seed,
+        )
+        n_processes = 1
+    else:
+        result = simulate(
+            (args.first_strategy, args.second_strategy),
+            n_games=args.n_games,
+            config=SimulationConfig(
+                n_processes=args.n_processes,
+                chunk_size=args.chunk_size,
+                seed=args.seed,
+                instrumentation=instrumentation,
+                record_path=args.record,
+            ),
+        )
+        n_processes = args.n_processes or os.cpu_count()
+    wall_time = time.perf_counter() - start_time
+
+    print(f"Played {result.n_games} games on {n_processes} processes")
+    print(f"{args.first_strategy} win rate: {result.first_win_rate:.4f}")
+    print(f"{args.second_strategy} win rate: {result.second_win_rate:.4f}")
+    print(f"Average margin: {result.average_margin:+.2f}")
+    print(f"Seat 0 win rate: {result.first_seat_win_rate:.4f}")
+    print(f"Games per second: {result.n_games / wall_time:.1f}")
+
+    if result.instrumentation is not None:
+        print()
+        print(result.instrumentation.report())
+
+        profile_stats = result.instrumentation.profile_stats()
+        if profile_stats is not None:
+            profile_stats.stream = sys.stdout
+            profile_stats.sort_stats("cumulative").print_stats(20)
+
+        if result.instrumentation.allocations:
+            print("Largest allocations in the first traced game:")
+            print("\n".join(result.instrumentation.allocations[0]))
+
+
+if __name__ == "__main__":
+    main()
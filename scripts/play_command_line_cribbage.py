@@ -1,10 +1,19 @@
+import logging
+
+from pycards.backends import set_backend
 from pycards.games.cribbage.cribbage import Cribbage
+from pycards.games.cribbage.events import log_event
 from pycards.games.cribbage.players import CommandLinePlayer, RandomCribbagePlayer
 from pycards.players import Players
 
+logging.basicConfig(level=logging.INFO)
+
+# neither player needs NumPy, so don't spend time importing it
+set_backend("python")
 
 cribbage_game = Cribbage(Players([CommandLinePlayer(is_dealer=True, name='Jimmy', seat_position=0), RandomCribbagePlayer(is_dealer=False, name='Rando', seat_position=0)]))
+cribbage_game.subscribe(log_event)
 
 winner = cribbage_game.play()
 
-print(winner.name)
\ No newline at end of file
+print(winner.name)
@@ -0,0 +1,391 @@
+"""
+Benchmarks of the card handling, scoring and game hot paths.
+
+Each benchmark reports operations per second (the best of several repeats)
+and the peak memory allocated while running it once, and is compared
+against the committed baseline in baseline.json. Run from the repo root with
+
+    python -m tests.benchmarks.run_benchmarks
+
+which exits with an error if any benchmark is more than --threshold slower
+(or allocates that much more) than the baseline. After an intended change
+in performance, or on a new machine, record a new baseline with
+
+    python -m tests.benchmarks.run_benchmarks --update-baseline
+"""
+
+import argparse
+import csv
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from pycards.cards import CARDS_BY_INDEX, Card, Cards
+from pycards.games.cribbage.cribbage import Cribbage
+from pycards.games.cribbage.players import RandomCribbagePlayer
+from pycards.games.cribbage.score_cache import score_caches
+from pycards.players import Players
+from pycards.util import get_repo_root
+
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+
+DEFAULT_THRESHOLD = 0.25
+
+# peak memory can move by a few hundred bytes between runs of the same code,
+# which matters for the benchmarks that hardly allocate anything
+PEAK_BYTES_TOLERANCE = 512
+
+# a benchmark's setup returns a function doing some work, and how many
+# operations that work counts as
+BenchmarkSetup = Callable[[], Tuple[Callable[[], None], int]]
+
+
+@dataclass
+class BenchmarkResult:
+    """
+    Speed and memory use of one benchmark
+    """
+
+    ops_per_sec: float
+    peak_bytes: int
+
+
+def _read_csv(name: str) -> List[List[str]]:
+
+    with (get_repo_root() / "tests" / "data" / name).open() as f:
+        reader = csv.reader(f)
+        next(reader)
+        return list(reader)
+
+
+def _random_players(n_players: int = 2) -> Players:
+
+    return Players(
+        [
+            RandomCribbagePlayer(
+                is_dealer=i == 0, name=f"Player {i + 1}", seat_position=i
+            )
+            for i in range(n_players)
+        ]
+    )
+
+
+def card_from_string() -> Tuple[Callable[[], None], int]:
+    """
+    Parsing every card's string
+    """
+
+    card_strs = [repr(card) for card in CARDS_BY_INDEX] * 20
+
+    def run():
+        for card_str in card_strs:
+            Card.from_string(card_str)
+
+    return run, len(card_strs)
+
+
+def get_straights_and_flushes() -> Tuple[Callable[[], None], int]:
+    """
+    Finding the straights and flushes in random 6 card hands
+    """
+
+    rng = np.random.default_rng(0)
+    hands = [
+        Cards.from_indices(rng.choice(len(CARDS_BY_INDEX), 6, replace=False).tolist())
+        for _ in range(200)
+    ]
+
+    def run():
+        for hand in hands:
+            hand.get_straights(3, 5)
+            hand.get_flushes(4, 5)
+
+    return run, len(hands)
+
+
+def score_hands() -> Tuple[Callable[[], None], int]:
+    """
+    Cribbage._score_hand over the example hands
+    """
+
+    game = Cribbage(_random_players(), seed=0)
+    examples = [
+        (Cards.from_string(hand), Card.from_string(turn_up), is_crib == "1")
+        for hand, turn_up, is_crib, _ in _read_csv("cribbage_hands.csv")
+    ] * 20
+
+    def run():
+        for hand, turn_up, is_crib in examples:
+            game.turn_up_card = turn_up
+            game._score_hand(hand, is_crib)  # pylint: disable=protected-access
+
+    return run, len(examples)
+
+
+def score_pegging() -> Tuple[Callable[[], None], int]:
+    """
+    Cribbage.score_pegging_contribution over every prefix of the example
+    pegging sequences
+    """
+
+    examples = []
+    for cards_str, last_card, _ in _read_csv("cribbage_pegging_sequences.csv"):
+        cards = Cards.from_string(cards_str)
+        for i in range(len(cards)):
+            examples.append(
+                (Cards(cards[: i + 1]), last_card == "1" and i == len(cards) - 1)
+            )
+    examples *= 20
+
+    def run():
+        for pegged_cards, last_card in examples:
+            Cribbage.score_pegging_contribution(pegged_cards, last_card)
+
+    return run, len(examples)
+
+
+def deal() -> Tuple[Callable[[], None], int]:
+    """
+    Dealing the hands for a round of a two player game, and collecting them
+    back into the discard pile
+    """
+
+    game = Cribbage(_random_players(), seed=0)
+    n_rounds = 500
+
+    def run():
+        for _ in range(n_rounds):
+            game._deal_cards_to_players()  # pylint: disable=protected-access
+            game._discard_hands_and_crib()  # pylint: disable=protected-access
+
+    return run, n_rounds
+
+
+def play_games() -> Tuple[Callable[[], None], int]:
+    """
+    Full two player games between RandomCribbagePlayers
+    """
+
+    n_games = 20
+
+    def run():
+        for seed in range(n_games):
+            Cribbage(_random_players(), seed=seed).play()
+
+    return run, n_games
+
+
+def play_games_cached() -> Tuple[Callable[[], None], int]:
+    """
+    play_games, with hand and pegging scores cached across the games
+    """
+
+    n_games = 20
+
+    def run():
+        with score_caches():
+            for seed in range(n_games):
+                Cribbage(_random_players(), seed=seed).play()
+
+    return run, n_games
+
+
+def branch_game_state() -> Tuple[Callable[[], None], int]:
+    """
+    Cloning a game's state at the start of pegging, then applying and
+    undoing each of the first player's pegs, as lookahead players do
+    """
+
+    game = Cribbage(_random_players(), seed=0)
+    game._deal_cards_to_players()  # pylint: disable=protected-access
+    game._receive_crib_cards_from_players()  # pylint: disable=protected-access
+    game._choose_turn_up()  # pylint: disable=protected-access
+    n_branches = 500
+
+    def run():
+        for _ in range(n_branches):
+            state = game.state.clone()
+            state.keep_history = True
+            for action in state.legal_actions():
+                state.apply(action)
+                state.undo()
+
+    return run, n_branches
+
+
+def import_pycards() -> Tuple[Callable[[], None], int]:
+    """
+    Starting a Python process which imports what it needs to play a game
+    between RandomCribbagePlayers, as worker processes and scripts do
+    """
+
+    command = [
+        sys.executable,
+        "-c",
+        "import pycards.games.cribbage.cribbage, pycards.games.cribbage.players",
+    ]
+
+    def run():
+        subprocess.run(command, check=True, cwd=get_repo_root())
+
+    return run, 1
+
+
+BENCHMARKS: Dict[str, BenchmarkSetup] = {
+    "card_from_string": card_from_string,
+    "get_straights_and_flushes": get_straights_and_flushes,
+    "score_hands": score_hands,
+    "score_pegging": score_pegging,
+    "deal": deal,
+    "play_games": play_games,
+    "play_games_cached": play_games_cached,
+    "branch_game_state": branch_game_state,
+    "import_pycards": import_pycards,
+}
+
+
+def run_benchmark(setup: BenchmarkSetup, n_repeats: int = 5) -> BenchmarkResult:
+    """
+    Times the best of n_repeats runs, then measures the peak memory
+    allocated by one more run
+    """
+
+    run, n_ops = setup()
+
+    # warm up caches (e.g. the score tables) before timing
+    run()
+
+    best_time = float("inf")
+    for _ in range(n_repeats):
+        start_time = time.perf_counter()
+        run()
+        best_time = min(best_time, time.perf_counter() - start_time)
+
+    tracemalloc.start()
+    try:
+        run()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return BenchmarkResult(ops_per_sec=n_ops / best_time, peak_bytes=peak_bytes)
+
+
+def find_regressions(
+    results: Dict[str, BenchmarkResult],
+    baseline: Dict[str, BenchmarkResult],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[str]:
+    """
+    Descriptions of every benchmark which is more than threshold (a fraction)
+    slower, or allocates more than threshold more, than its baseline
+    """
+
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        expected = baseline[name]
+
+        if result.ops_per_sec < expected.ops_per_sec * (1 - threshold):
+            regressions.append(
+                f"{name}: {result.ops_per_sec:.1f} ops/sec,"
+                f" baseline {expected.ops_per_sec:.1f}"
+            )
+        if result.peak_bytes > (
+            expected.peak_bytes * (1 + threshold) + PEAK_BYTES_TOLERANCE
+        ):
+            regressions.append(
+                f"{name}: {result.peak_bytes} peak bytes,"
+                f" baseline {expected.peak_bytes}"
+            )
+
+    return regressions
+
+
+def read_baseline(path: Path = BASELINE_PATH) -> Dict[str, BenchmarkResult]:
+    """
+    Read the baseline results, if there are any
+    """
+
+    if not Path(path).exists():
+        return {}
+
+    data = json.loads(Path(path).read_text())
+    return {
+        name: BenchmarkResult(**result) for name, result in data["benchmarks"].items()
+    }
+
+
+def write_baseline(
+    results: Dict[str, BenchmarkResult], path: Path = BASELINE_PATH
+) -> Path:
+    """
+    Write the results as the new baseline, noting where they were measured
+    """
+
+    data = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "benchmarks": {name: asdict(result) for name, result in results.items()},
+    }
+    Path(path).write_text(json.dumps(data, indent=2) + "\n")
+    return Path(path)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Command line entry point
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "names", nargs="*", help="benchmarks to run, defaults to all of them"
+    )
+    parser.add_argument("--n-repeats", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    names = args.names or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            parser.error(f"Unknown benchmark {name}")
+
+    baseline = read_baseline(args.baseline)
+
+    results = {}
+    for name in names:
+        results[name] = result = run_benchmark(BENCHMARKS[name], args.n_repeats)
+        change = ""
+        if name in baseline:
+            change = f" ({result.ops_per_sec / baseline[name].ops_per_sec - 1:+.1%})"
+        print(
+            f"{name:<28}{result.ops_per_sec:>14.1f} ops/sec{change:<10}"
+            f"{result.peak_bytes / 1024:>10.1f} KiB peak"
+        )
+
+    if args.update_baseline:
+        print(
+            f"Baseline written to {write_baseline({**baseline, **results}, args.baseline)}"
+        )
+        return 0
+
+    regressions = find_regressions(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f"Regression: {regression}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+# pylint: disable=missing-function-docstring,protected-access
+
+"""
+Checks the benchmarks still run. This doesn't time anything, see
+run_benchmarks.py for that.
+"""
+
+from tests.benchmarks.run_benchmarks import (
+    BENCHMARKS,
+    BenchmarkResult,
+    find_regressions,
+    read_baseline,
+    write_baseline,
+)
+
+
+def test_benchmarks_run():
+
+    for setup in BENCHMARKS.values():
+        run, n_ops = setup()
+        run()
+        assert n_ops > 0
+
+
+def test_baseline_covers_every_benchmark():
+
+    assert set(read_baseline()) == set(BENCHMARKS)
+
+
+def test_find_regressions(tmp_path):
+
+    baseline = {
+        "fast": BenchmarkResult(ops_per_sec=100.0, peak_bytes=1000),
+        "lean": BenchmarkResult(ops_per_sec=100.0, peak_bytes=1000),
+    }
+    results = {
+        "fast": BenchmarkResult(ops_per_sec=80.0, peak_bytes=1000),
+        "lean": BenchmarkResult(ops_per_sec=100.0, peak_bytes=2000),
+        "new": BenchmarkResult(ops_per_sec=1.0, peak_bytes=1),
+    }
+
+    assert find_regressions(results, baseline, threshold=0.25) == [
+        "lean: 2000 peak bytes, baseline 1000"
+    ]
+    assert len(find_regressions(results, baseline, threshold=0.1)) == 2
+
+    path = write_baseline(baseline, tmp_path / "baseline.json")
+    assert read_baseline(path) == baseline
@@ -0,0 +1,107 @@
+# pylint: disable=missing-function-docstring,protected-access
+
+import numpy as np
+import pytest
+
+from pycards.backends import get_backend
+from pycards.cards import DECK_SIZE, Cards
+from pycards.games.cribbage.batched import (
+    HOLD_POSITIONS,
+    BatchedStrategy,
+    _pegging_points,
+    expected_value_discard,
+    lowest_card_pegging,
+    simulate_games,
+)
+from pycards.games.cribbage.crib_tables import load_default_crib_table
+from pycards.games.cribbage.discard import evaluate_discards
+from pycards.games.cribbage.pegging import pegging_points
+from pycards.simulate import GameChunk, play_games, simulate_batched
+
+
+def test_expected_value_discard_matches_evaluate_discards():
+
+    rng = np.random.default_rng(0)
+    hands = (
+        get_backend("numpy").shuffled_decks(50, DECK_SIZE, rng)[:, :6].astype(np.int64)
+    )
+    is_dealer = rng.random(50) < 0.5
+    crib_table = load_default_crib_table()
+    crib_value = crib_table.expected_crib_score if crib_table is not None else None
+
+    holds = [tuple(hold) for hold in HOLD_POSITIONS.tolist()]
+    for hand, dealer, held in zip(
+        hands, is_dealer, expected_value_discard(hands, is_dealer, rng)
+    ):
+        options = evaluate_discards(
+            Cards.from_indices(hand.tolist()), bool(dealer), crib_value
+        )
+        best = max(option.expected_value for option in options)
+        chosen = options[holds.index(tuple(held.tolist()))]
+        assert chosen.expected_value == pytest.approx(best, abs=1e-6)
+
+
+def test_pegging_points_match_pegging():
+
+    rng = np.random.default_rng(1)
+    trails = np.full((500, 7), -1)
+    counts = np.zeros(500, dtype=np.int64)
+    for i in range(500):
+        length = rng.integers(1, 8)
+        face_values = rng.integers(0, 6, size=length)
+        trails[i, -length:] = face_values
+        counts[i] = np.minimum(face_values + 1, 10).sum()
+
+    expected = [
+        pegging_points([value for value in trail if value >= 0], count)
+        for trail, count in zip(trails.tolist(), counts.tolist())
+    ]
+    assert _pegging_points(trails, counts).tolist() == expected
+
+
+def test_lowest_card_pegging():
+
+    hands = np.array([Cards.from_string("KH 2C 2D 5S").indices()])
+    assert lowest_card_pegging(hands, np.array([[True] * 4]), None).tolist() == [1]
+    assert lowest_card_pegging(
+        hands, np.array([[True, False, True, True]]), None
+    ).tolist() == [2]
+
+
+def test_simulate_games():
+
+    strategies = (BatchedStrategy("random"), BatchedStrategy("expected_value"))
+    games = simulate_games(200, strategies, seed=0)
+
+    assert games.n_games == 200
+    assert set(games.winners.tolist()) <= {0, 1}
+    assert (games.scores.max(axis=1) >= 121).all()
+    assert (games.scores[np.arange(200), games.winners] >= 121).all()
+    assert (games.scores[np.arange(200), 1 - games.winners] < 121).all()
+    assert (games.n_turns > 0).all()
+
+    assert games.first_seats.tolist() == [0, 1] * 100
+    assert (games.strategy_winners == games.winners ^ games.first_seats).all()
+    strategy_scores = games.strategy_scores[np.arange(200), games.strategy_winners]
+    assert (strategy_scores >= 121).all()
+
+    again = simulate_games(200, strategies, seed=0)
+    assert (again.scores == games.scores).all()
+
+    with pytest.raises(ValueError):
+        simulate_games(1, (BatchedStrategy(), BatchedStrategy("best")))
+
+
+def test_batched_games_match_engine():
+
+    engine = play_games(
+        ("RandomCribbagePlayer", "RandomCribbagePlayer"),
+        GameChunk(300, np.random.SeedSequence(0)),
+    )
+    batched = simulate_batched(
+        ("RandomCribbagePlayer", "RandomCribbagePlayer"), 3000, seed=0
+    )
+
+    # within about 4 standard errors of each other
+    assert abs(engine.first_win_rate - batched.first_win_rate) < 0.12
+    assert abs(engine.average_margin - batched.average_margin) < 6
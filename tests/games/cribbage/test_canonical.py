@@ -0,0 +1,55 @@
+# pylint: disable=missing-function-docstring,protected-access
+
+from hypothesis import given
+from hypothesis import strategies as st
+
+from pycards.cards import CARDS_BY_INDEX, Cards
+from pycards.games.cribbage.canonical import (
+    canonical_discard,
+    canonical_hand,
+    from_canonical,
+    hand_score_counts,
+)
+from pycards.games.cribbage.cribbage import Cribbage
+
+
+@given(st.lists(st.integers(0, 51), min_size=5, max_size=5, unique=True))
+def test_canonical_hands_score_the_same(indices):
+
+    hand, turn_up_card = Cards.from_indices(indices[:4]), CARDS_BY_INDEX[indices[4]]
+    form = canonical_hand(hand, turn_up_card)
+    canonical_cards, (turn_up_index,) = form.groups
+
+    for is_crib in (False, True):
+        assert Cribbage.score_hand(
+            Cards.from_indices(canonical_cards), CARDS_BY_INDEX[turn_up_index], is_crib
+        ) == Cribbage.score_hand(hand, turn_up_card, is_crib)
+
+    assert set(from_canonical(canonical_cards, form.suit_map)) == set(hand)
+
+
+def test_canonical_discard():
+
+    form = canonical_discard(
+        Cards.from_string("5H 5D JC TS"), Cards.from_string("2C 9H")
+    )
+    other = canonical_discard(
+        Cards.from_string("5S 5C JD TH"), Cards.from_string("2D 9S")
+    )
+    assert form.groups == other.groups
+    assert (
+        canonical_discard(
+            Cards.from_string("5H 5D JC TS"), Cards.from_string("2H 9C")
+        ).groups
+        != form.groups
+    )
+
+
+def test_hand_score_counts():
+
+    counts = hand_score_counts()
+
+    assert sum(counts.values()) == 52 * 51 * 50 * 49 // 24 * 48
+    assert counts[0] == 1009008
+    assert counts[29] == 4
+    assert 19 not in counts
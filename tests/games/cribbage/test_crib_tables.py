@@ -0,0 +1,96 @@
+# pylint: disable=missing-function-docstring,protected-access
+
+import json
+from itertools import combinations
+
+import pytest
+
+from pycards.cards import Cards
+from pycards.games.cribbage.crib_tables import (
+    DISCARD_CLASSES,
+    TABLE_NAMES,
+    CribTable,
+    discard_class_index,
+    generate_crib_tables,
+    representative_discard,
+    uniform_expected_crib_score,
+)
+
+
+def test_discard_classes():
+
+    deck = Cards.standard_deck(shuffle=False)
+    class_sizes = [0] * len(DISCARD_CLASSES)
+    for discard in combinations(deck, 2):
+        class_sizes[discard_class_index(Cards(list(discard)))] += 1
+
+    assert len(DISCARD_CLASSES) == 169
+    assert sum(class_sizes) == 1326
+    for discard_class, class_size in zip(DISCARD_CLASSES, class_sizes):
+        low, high, suited = discard_class
+        if low == high:
+            assert class_size == 6
+        else:
+            assert class_size == (4 if suited else 12)
+
+    for i, discard_class in enumerate(DISCARD_CLASSES):
+        assert discard_class_index(representative_discard(discard_class)) == i
+
+    with pytest.raises(ValueError):
+        discard_class_index(Cards.from_string("AH 2H 3H"))
+
+
+def test_uniform_crib_scores_are_sensible():
+
+    pair_of_fives = discard_class_index(Cards.from_string("5H 5D"))
+    ace_king = discard_class_index(Cards.from_string("AH KD"))
+
+    assert uniform_expected_crib_score(pair_of_fives) > uniform_expected_crib_score(
+        ace_king
+    )
+
+
+def test_crib_table_round_trip(tmp_path):
+
+    values = {
+        name: [float(i + j) for j in range(len(DISCARD_CLASSES))]
+        for i, name in enumerate(TABLE_NAMES)
+    }
+    crib_table = CribTable.read(CribTable(values).write(tmp_path / "crib.bin"))
+
+    assert crib_table.values == values
+
+    discard = Cards.from_string("5H 5D")
+    index = discard_class_index(discard)
+    assert crib_table.expected_crib_score(discard, is_dealer=True) == 1 + index
+    assert crib_table.expected_crib_score(discard, is_dealer=False) == 2 + index
+
+    (tmp_path / "bad.bin").write_bytes(b"XXXX" + b"\0" * 100)
+    with pytest.raises(ValueError):
+        CribTable.read(tmp_path / "bad.bin")
+
+
+def test_generate_resumes_from_checkpoint(tmp_path):
+
+    # pretend the (slow) uniform table has already been checkpointed
+    checkpoint_path = tmp_path / "checkpoint.jsonl"
+    with checkpoint_path.open("w") as f:
+        for i in range(len(DISCARD_CLASSES)):
+            f.write(json.dumps({"table": "uniform", "index": i, "value": 4.0}) + "\n")
+
+    crib_table = generate_crib_tables(
+        n_samples=1, n_processes=1, checkpoint_path=checkpoint_path
+    )
+
+    assert crib_table.values["uniform"] == [4.0] * len(DISCARD_CLASSES)
+    for name in ("dealer", "pone"):
+        assert all(value >= 0 for value in crib_table.values[name])
+
+    with checkpoint_path.open() as f:
+        assert len(f.readlines()) == 3 * len(DISCARD_CLASSES)
+
+    # the dealer and pone entries can't be reused with different parameters
+    with pytest.raises(ValueError):
+        generate_crib_tables(
+            n_samples=1, n_processes=1, checkpoint_path=checkpoint_path, seed=1
+        )
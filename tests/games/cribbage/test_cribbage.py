@@ -4,6 +4,7 @@ import csv
 
 from pycards.cards import Card, Cards
 from pycards.games.cribbage.cribbage import Cribbage
+from pycards.games.cribbage.events import DealEvent, GameEndEvent
 from pycards.games.cribbage.players import RandomCribbagePlayer
 from pycards.players import Players
 from pycards.util import get_repo_root
@@ -106,4 +107,23 @@ def test_score_pegging_sequence():
                 score_sequence.append(Cribbage.score_pegging_contribution(cards[:i+1], last_card_played))
 
             print(cards)
-            assert score_sequence == correct_score_sequence
\ No newline at end of file
+            assert score_sequence == correct_score_sequence
+
+
+def test_game_replays_from_seed():
+
+    def play_seeded_game(seed):
+        players = make_basic_cribbage_game(n_players=2).players
+        game = Cribbage(players, seed=seed)
+        events = []
+        game.subscribe(events.append)
+        game.play()
+        return [
+            (type(event).__name__, getattr(event, "card", None), event.scores)
+            if isinstance(event, (DealEvent, GameEndEvent))
+            else (type(event).__name__, getattr(event, "card", None))
+            for event in events
+        ]
+
+    assert play_seeded_game(42) == play_seeded_game(42)
+    assert play_seeded_game(42) != play_seeded_game(43)
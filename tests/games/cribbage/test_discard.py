@@ -0,0 +1,102 @@
+# pylint: disable=missing-function-docstring,protected-access
+
+from itertools import combinations
+
+import pytest
+
+from pycards.cards import Cards
+from pycards.games.cribbage.cribbage import Cribbage
+from pycards.games.cribbage.discard import (
+    DiscardOption,
+    best_discard,
+    evaluate_discards,
+)
+from pycards.games.cribbage.players import ExpectedValueCribbagePlayer
+from pycards.players import Players
+
+
+def _brute_force_expected_scores(hand: Cards):
+
+    turn_ups = [card for card in Cards.standard_deck() if card not in hand]
+
+    expected_scores = []
+    for hold in combinations(hand, 4):
+        total = sum(
+            Cribbage.score_hand(Cards(list(hold)), turn_up) for turn_up in turn_ups
+        )
+        expected_scores.append(total / len(turn_ups))
+
+    return expected_scores
+
+
+@pytest.mark.parametrize(
+    "hand_str", ["5H 5D JS 4C 6C KD", "AH 2H 3H 4H JH 9C", "7S 8S 9D TC QH"]
+)
+def test_evaluate_discards_matches_brute_force(hand_str):
+
+    hand = Cards.from_string(hand_str)
+    options = evaluate_discards(hand)
+
+    assert [option.expected_hand_score for option in options] == pytest.approx(
+        _brute_force_expected_scores(hand)
+    )
+
+    for option in options:
+        assert len(option.hold) == 4
+        assert len(option.discard) == len(hand) - 4
+        assert set(option.hold + option.discard) == set(hand)
+
+
+def test_expected_value_includes_crib():
+
+    option = DiscardOption(
+        hold=Cards.empty(), discard=Cards.empty(), expected_hand_score=8.0
+    )
+    assert option.expected_value == 8.0
+
+    for is_dealer, expected_value in ((True, 12.5), (False, 3.5)):
+        option = DiscardOption(
+            hold=Cards.empty(),
+            discard=Cards.empty(),
+            expected_hand_score=8.0,
+            expected_crib_score=4.5,
+            is_dealer=is_dealer,
+        )
+        assert option.expected_value == expected_value
+
+    hand = Cards.from_string("5H 5D JS 4C 6C KD")
+    # a crib valuation which prefers throwing the fives away
+    choice = best_discard(
+        hand,
+        is_dealer=True,
+        crib_value=lambda discard, _: 100.0 * sum(c.value.value == 4 for c in discard),
+    )
+    assert set(choice.discard) == set(Cards.from_string("5H 5D"))
+
+
+def test_expected_value_player_discards():
+
+    player = ExpectedValueCribbagePlayer(is_dealer=False, name="Eve", seat_position=0)
+    player.hand = Cards.from_string("5H 5D JS 4C 6C KD")
+
+    crib_cards = player.give_cards_to_crib(n_required=2)
+
+    assert set(crib_cards) == set(Cards.from_string("JS KD"))
+    assert set(player.hand) == set(Cards.from_string("5H 5D 4C 6C"))
+
+    with pytest.raises(ValueError):
+        player.give_cards_to_crib(n_required=2)
+
+
+def test_expected_value_players_complete_a_game():
+
+    players = Players(
+        [
+            ExpectedValueCribbagePlayer(is_dealer=True, name="Eve", seat_position=1),
+            ExpectedValueCribbagePlayer(is_dealer=False, name="Val", seat_position=2),
+        ]
+    )
+
+    winner = Cribbage(players).play()
+
+    assert winner.score >= 121
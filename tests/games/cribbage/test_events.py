@@ -0,0 +1,66 @@
+# pylint: disable=missing-function-docstring,protected-access
+
+import logging
+
+from pycards.games.cribbage.events import (
+    CribScoreEvent,
+    DealEvent,
+    DiscardEvent,
+    GameEndEvent,
+    HandScoreEvent,
+    PegEvent,
+    TurnUpEvent,
+    log_event,
+)
+from tests.games.cribbage.test_cribbage import make_basic_cribbage_game
+
+
+def test_events_account_for_every_point():
+
+    for n_players in [2, 3, 4]:
+        game = make_basic_cribbage_game(n_players)
+        events = []
+        game.subscribe(events.append)
+
+        winner = game.play()
+
+        assert isinstance(events[0], DealEvent)
+        assert isinstance(events[-1], GameEndEvent)
+        assert events[-1].winner is winner
+        assert list(events[-1].scores) == [player.score for player in game.players]
+
+        points = {player.name: 0 for player in game.players}
+        for event in events:
+            if isinstance(event, TurnUpEvent):
+                points[event.dealer.name] += event.points
+            elif isinstance(event, (PegEvent, HandScoreEvent, CribScoreEvent)):
+                points[event.player.name] += event.points
+
+        assert points == {player.name: player.score for player in game.players}
+
+        n_deals = sum(isinstance(event, DealEvent) for event in events)
+        n_discards = sum(isinstance(event, DiscardEvent) for event in events)
+        assert n_discards == n_deals * n_players
+
+
+def test_unsubscribe():
+
+    game = make_basic_cribbage_game(2)
+    events = []
+    game.unsubscribe(game.subscribe(events.append))
+
+    game.play()
+
+    assert not events
+
+
+def test_log_event(caplog):
+
+    game = make_basic_cribbage_game(2)
+    game.subscribe(log_event)
+
+    with caplog.at_level(logging.INFO):
+        winner = game.play()
+
+    assert "Starting turn 1." in caplog.text
+    assert f"{winner.name} won after" in caplog.text
@@ -0,0 +1,173 @@
+# pylint: disable=missing-function-docstring,protected-access
+
+import random
+
+import pytest
+
+from pycards.cards import DECK_SIZE
+from pycards.games.cribbage.cribbage import Cribbage
+from pycards.games.cribbage.events import GameEndEvent
+from pycards.games.cribbage.game_state import (
+    CRIB_CARD,
+    DEAL,
+    PEGGING,
+    TURN_UP,
+    CribCard,
+    Deal,
+    Discard,
+    GameState,
+    Go,
+    Peg,
+    ScoreHand,
+    TurnUp,
+)
+from tests.games.cribbage.test_cribbage import make_basic_cribbage_game
+
+
+def play_random_actions(state: GameState, rng: random.Random):
+    """
+    Applies random actions until the game finishes, yielding after each
+    """
+
+    deck = []
+    while not state.is_finished:
+        if state.phase == DEAL:
+            deck = list(range(DECK_SIZE))
+            rng.shuffle(deck)
+            n_cards = 6 if state.n_players == 2 else 5
+            action = Deal(
+                tuple(
+                    tuple(deck.pop() for _ in range(n_cards))
+                    for _ in range(state.n_players)
+                )
+            )
+        elif state.phase == CRIB_CARD:
+            action = CribCard(deck.pop())
+        elif state.phase == TURN_UP:
+            action = TurnUp(deck.pop())
+        else:
+            action = rng.choice(state.legal_actions())
+
+        state.apply(action)
+        yield action
+
+
+def test_random_games_finish():
+
+    rng = random.Random(0)
+    for n_players in (2, 3, 4):
+        for _ in range(10):
+            state = GameState(n_players, dealer=0)
+            for _ in play_random_actions(state, rng):
+                pass
+
+            assert state.scores[state.winner] >= 121
+            assert max(state.scores) == state.scores[state.winner]
+
+
+def test_undo_restores_every_state():
+
+    rng = random.Random(1)
+    for n_players in (2, 3, 4):
+        state = GameState(n_players, dealer=1)
+        states = [state.clone()]
+        actions = []
+        for action in play_random_actions(state, rng):
+            states.append(state.clone())
+            actions.append(action)
+
+        for action, previous in zip(reversed(actions), reversed(states[:-1])):
+            assert state.undo() == action
+            assert state == previous
+
+        with pytest.raises(ValueError):
+            state.undo()
+
+
+def test_clones_are_independent():
+
+    state = GameState(2, dealer=0)
+    actions = play_random_actions(state, random.Random(2))
+    while state.phase != PEGGING:
+        next(actions)
+
+    clone = state.clone()
+    clone.apply(clone.legal_actions()[0])
+
+    assert clone != state
+    assert clone.pegging_hands != state.pegging_hands
+
+    clone.undo()
+    assert clone == state
+    with pytest.raises(ValueError):
+        clone.undo()
+
+
+def test_illegal_actions_change_nothing():
+
+    state = GameState(2, dealer=0)
+    state.apply(Deal(((0, 1, 2, 3, 4, 5), (9, 10, 11, 12, 22, 23))))
+    before = state.clone()
+
+    for action in (
+        Discard((0, 9)),
+        Discard((0, 0)),
+        Discard((0,)),
+        Peg(0),
+        TurnUp(30),
+        ScoreHand(),
+    ):
+        with pytest.raises(ValueError):
+            state.apply(action)
+        assert state == before
+
+    state.apply(Discard((4, 5)))
+    state.apply(Discard((22, 23)))
+    state.apply(TurnUp(30))
+
+    # the pone (seat 1) has a ten, jack, queen and king, and pegs first
+    state.apply(Peg(12))
+    state.apply(Peg(3))
+    state.apply(Peg(11))
+    state.apply(Peg(2))
+    assert state.pegging.count == 27
+    assert state.legal_actions() == [Go()]
+    with pytest.raises(ValueError):
+        state.apply(Peg(10))
+
+    state.apply(Go())
+    with pytest.raises(ValueError):
+        state.apply(Go())
+
+
+def test_game_is_played_on_its_state():
+
+    for n_players in (2, 3, 4):
+        game = make_basic_cribbage_game(n_players)
+        events = []
+        game.subscribe(events.append)
+        winner = game.play()
+
+        assert game.state.is_finished
+        assert game.state.scores == [player.score for player in game.players]
+        assert game.players[game.state.winner] is winner
+        assert game.state.turn == events[-1].turns
+        assert isinstance(events[-1], GameEndEvent)
+
+
+def test_engine_state_can_branch():
+
+    game = Cribbage(make_basic_cribbage_game(2).players, seed=3)
+    game._deal_cards_to_players()
+    game._receive_crib_cards_from_players()
+    game._choose_turn_up()
+
+    state = game.state.clone()
+    state.keep_history = True
+    scores = state.scores.copy()
+    for action in state.legal_actions():
+        state.apply(action)
+        state.undo()
+
+    assert state == game.state
+    assert state.scores == scores
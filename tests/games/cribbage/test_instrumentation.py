@@ -0,0 +1,60 @@
+# pylint: disable=missing-function-docstring,protected-access
+
+import pickle
+
+from pycards.games.cribbage.cribbage import Cribbage
+from pycards.games.cribbage.instrumentation import Instrumentation, TimingStats
+from tests.games.cribbage.test_cribbage import make_basic_cribbage_game
+
+
+def _play_instrumented_games(instrumentation: Instrumentation, n_games: int):
+
+    for seed in range(n_games):
+        players = make_basic_cribbage_game(n_players=2).players
+        Cribbage(players, seed=seed, instrumentation=instrumentation).play()
+
+
+def test_phases_and_decisions_are_counted():
+
+    instrumentation = Instrumentation()
+    _play_instrumented_games(instrumentation, 3)
+
+    assert instrumentation.n_games == 3
+
+    deals = instrumentation.phases["deal"]
+    assert deals.cards == 12 * deals.calls
+    assert instrumentation.phases["crib"].calls == deals.calls
+    assert instrumentation.phases["turn_up"].cards == deals.calls
+
+    discards = instrumentation.decisions["RandomCribbagePlayer.give_cards_to_crib"]
+    assert discards.calls == 2 * deals.calls
+    assert discards.cards == 4 * deals.calls
+
+    pegs = instrumentation.decisions["RandomCribbagePlayer.play_pegging_card"]
+    assert pegs.calls == pegs.cards > 0
+    assert all(stats.seconds > 0 for stats in instrumentation.phases.values())
+
+    report = instrumentation.report()
+    assert "phase pegging" in report
+    assert "3 games" in report
+
+
+def test_instrumentation_merges_and_pickles():
+
+    instrumentation = Instrumentation(profile_every=2, trace_memory_every=3)
+    _play_instrumented_games(instrumentation, 4)
+
+    assert len(instrumentation.profiles) == 2
+    assert len(instrumentation.allocations) == 2
+    assert instrumentation.profile_stats().total_calls > 0
+
+    merged = pickle.loads(pickle.dumps(instrumentation)) + instrumentation
+    assert merged.n_games == 8
+    assert len(merged.profiles) == 4
+    assert merged.phases["deal"] == TimingStats(
+        calls=2 * instrumentation.phases["deal"].calls,
+        seconds=2 * instrumentation.phases["deal"].seconds,
+        cards=2 * instrumentation.phases["deal"].cards,
+    )
+
+    assert Instrumentation().profile_stats() is None
@@ -0,0 +1,142 @@
+# pylint: disable=missing-function-docstring,protected-access
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+from pycards.cards import Cards
+from pycards.games.cribbage.cribbage import Cribbage
+from pycards.games.cribbage.game_state import DISCARD, PEGGING, GameState
+from pycards.games.cribbage.ismcts import (
+    PeggingInformation,
+    RoundInformation,
+    SearchOptions,
+    _apply_forced_actions,
+    _is_round_over,
+    search,
+    search_tree,
+)
+from pycards.games.cribbage.players import ISMCTSCribbagePlayer, RandomCribbagePlayer
+from pycards.players import Players
+
+
+def _play_randomly(state: GameState, deck, rng: np.random.Generator) -> GameState:
+
+    _apply_forced_actions(state, deck)
+    while not _is_round_over(state):
+        actions = state.legal_actions()
+        state.apply(actions[rng.integers(len(actions))])
+        _apply_forced_actions(state, deck)
+
+    return state
+
+
+def test_determinize_deals_the_unseen_cards():
+
+    rng = np.random.default_rng(0)
+    hand = Cards.from_string("5H 5D JC TS 2C 9H").indices()
+    information = RoundInformation(player=1, dealer=1, hand=hand)
+    state, deck = information.determinize(rng)
+
+    assert state.phase == DISCARD
+    assert state.to_move == 0
+    assert state.dealer == 0
+    assert state.hands[0] == hand
+    assert len(set(state.hands[1] + deck) | set(hand)) == 52
+
+    finished = _play_randomly(state.clone(), deck.copy(), rng)
+    assert len(finished.crib) == 4
+    assert not any(finished.pegging_hands)
+    assert state.scores == [0, 0]
+
+
+def test_determinize_continues_the_pegging():
+
+    rng = np.random.default_rng(1)
+    information = RoundInformation(
+        player=0,
+        dealer=0,
+        hand=Cards.from_string("5H 5D JC TS").indices(),
+        discard=Cards.from_string("2C 9H").indices(),
+        pegging=PeggingInformation(
+            turn_up=Cards.from_string("AS")[0].index,
+            pegging_hand=Cards.from_string("5H 5D JC TS").indices(),
+            other_pegged=Cards.from_string("KD").indices(),
+            other_n_pegging_cards=3,
+            sequence=Cards.from_string("KD").indices(),
+        ),
+    )
+    state, deck = information.determinize(rng)
+
+    assert state.phase == PEGGING
+    assert state.to_move == 0
+    assert state.pegging.count == 10
+    assert len(state.pegging_hands[1]) == 3
+    assert len(state.crib) == 4
+    # less the hand, discard, turn up, other player's cards and their discard
+    assert len(deck) == 52 - 6 - 1 - 4 - 2
+
+    finished = _play_randomly(state, deck, rng)
+    # the hands and crib are scored, as well as the pegging
+    assert sum(finished.scores) > 0
+
+
+def test_search_discards_from_hand():
+
+    hand = Cards.from_string("5H 5D JC TS 2C 9H")
+    information = RoundInformation(player=0, dealer=0, hand=hand.indices())
+
+    options = SearchOptions(n_iterations=200)
+    statistics = search_tree(information, options, seed=0)
+    assert sum(visits for visits, _ in statistics.values()) == 200
+
+    discard = search(information, options, seed=0)
+    assert len(discard.cards) == 2
+    assert all(index in hand.indices() for index in discard.cards)
+
+    parallel_options = SearchOptions(n_iterations=200, n_processes=2)
+    with pytest.raises(ValueError):
+        search(information, parallel_options, seed=0)
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        assert search(information, parallel_options, 0, executor) in statistics
+
+
+def test_ismcts_player_plays_a_game():
+
+    players = Players(
+        [
+            ISMCTSCribbagePlayer(
+                is_dealer=True,
+                name="Alice",
+                seat_position=1,
+                search_options=SearchOptions(n_iterations=20),
+            ),
+            RandomCribbagePlayer(is_dealer=False, name="Bob", seat_position=2),
+        ]
+    )
+
+    winner = Cribbage(players, seed=0).play()
+    assert winner.score >= 121
+
+
+def test_ismcts_player_shuts_down_its_pool():
+
+    with ISMCTSCribbagePlayer(
+        is_dealer=True,
+        name="Alice",
+        seat_position=1,
+        search_options=SearchOptions(n_iterations=20, n_processes=2),
+    ) as player:
+        Cribbage(
+            Players(
+                [
+                    player,
+                    RandomCribbagePlayer(is_dealer=False, name="Bob", seat_position=2),
+                ]
+            ),
+            seed=0,
+        ).play()
+        assert player._executor is not None
+
+    assert player._executor is None
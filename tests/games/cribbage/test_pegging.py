@@ -0,0 +1,87 @@
+# pylint: disable=missing-function-docstring,protected-access
+
+import hypothesis.strategies as st
+import pytest
+from hypothesis import given
+
+from pycards.cards import Cards
+from pycards.games.cribbage.pegging import PeggingState
+from pycards.games.cribbage.util import cribbage_card_value, sum_cribbage_card_values
+from tests.strategies import card_strategy
+
+
+def _rescan_pegging_score(pegged_cards: Cards) -> int:
+    """
+    Scores the last card by rescanning the whole sequence, without the
+    point for the last card
+    """
+
+    score = 0
+
+    card_values = [card.value for card in pegged_cards]
+    for n_cards, points in ((4, 12), (3, 6), (2, 2)):
+        if len(card_values) >= n_cards and len(set(card_values[-n_cards:])) == 1:
+            score += points
+            break
+
+    for i in range(len(pegged_cards) - 2):
+        if pegged_cards[i:].contains_straight(len(pegged_cards) - i):
+            score += len(pegged_cards) - i
+            break
+
+    if sum_cribbage_card_values(pegged_cards) in (15, 31):
+        score += 2
+
+    return score
+
+
+@st.composite
+def pegging_sequence_strategy(draw):
+    """
+    Sequences of cards which never go over 31
+    """
+
+    cards = []
+    total = 0
+    for card in draw(st.lists(card_strategy(), max_size=20)):
+        if total + cribbage_card_value(card) <= 31:
+            cards.append(card)
+            total += cribbage_card_value(card)
+
+    return cards
+
+
+@given(cards=pegging_sequence_strategy())
+def test_pegging_state_matches_rescanning(cards):
+
+    pegging_state = PeggingState()
+
+    for i, card in enumerate(cards):
+        assert pegging_state.can_play_card(card)
+        assert pegging_state.play(card) == _rescan_pegging_score(Cards(cards[: i + 1]))
+        assert pegging_state.count == sum_cribbage_card_values(Cards(cards[: i + 1]))
+
+    assert list(pegging_state.cards) == cards
+
+
+def test_can_play_and_reset():
+
+    pegging_state = PeggingState()
+    for card in Cards.from_string("KH QH JH"):
+        pegging_state.play(card)
+
+    assert pegging_state.count == 30
+    assert pegging_state.can_play(Cards.from_string("KS AD"))
+    assert not pegging_state.can_play(Cards.from_string("KS 2D"))
+    assert not pegging_state.can_play(Cards.empty())
+
+    with pytest.raises(ValueError):
+        pegging_state.play(Cards.from_string("2D")[0])
+
+    assert pegging_state.play(Cards.from_string("AD")[0]) == 2
+    assert pegging_state.last_card_points() == 0
+
+    pegging_state.reset()
+    assert pegging_state.count == 0
+    assert len(pegging_state.cards) == 0
+    assert pegging_state.last_card_points() == 1
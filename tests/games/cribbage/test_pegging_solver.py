@@ -0,0 +1,144 @@
+# pylint: disable=missing-function-docstring,protected-access
+
+from typing import List
+
+import hypothesis.strategies as st
+import numpy as np
+from hypothesis import given, settings
+
+from pycards.cards import Cards
+from pycards.games.cribbage.cribbage import Cribbage
+from pycards.games.cribbage.pegging import PeggingState
+from pycards.games.cribbage.pegging_solver import PeggingSolver, SamplingOptions
+from pycards.games.cribbage.players import (
+    PeggingSolverCribbagePlayer,
+    RandomCribbagePlayer,
+)
+from pycards.players import Players
+
+
+def _brute_force_value(hands: List[Cards], to_move: int, played: List) -> int:
+    """
+    Net points for the player to move, found by replaying the pegging rules
+    of Cribbage._play_pegging_phase for every choice of cards
+    """
+
+    if not hands[0] and not hands[1]:
+        return 0
+
+    pegging_state = PeggingState()
+    for card in played:
+        pegging_state.play(card)
+
+    if not pegging_state.can_play(hands[to_move]):
+        if pegging_state.can_play(hands[1 - to_move]):
+            return -_brute_force_value(hands, 1 - to_move, played)
+        return _brute_force_value(hands, to_move, [])
+
+    best = None
+    for card in hands[to_move]:
+        if not pegging_state.can_play_card(card):
+            continue
+
+        next_state = PeggingState()
+        for played_card in played:
+            next_state.play(played_card)
+        points = next_state.play(card)
+
+        next_hands = [hand.copy() for hand in hands]
+        next_hands[to_move].play_card(card)
+
+        if next_state.can_play(next_hands[1 - to_move]):
+            value = points - _brute_force_value(
+                next_hands, 1 - to_move, played + [card]
+            )
+        elif next_state.can_play(next_hands[to_move]):
+            value = points + _brute_force_value(next_hands, to_move, played + [card])
+        else:
+            points += next_state.last_card_points()
+            value = points - _brute_force_value(next_hands, 1 - to_move, [])
+
+        best = value if best is None else max(best, value)
+
+    return best
+
+
+@st.composite
+def pegging_hands_strategy(draw):
+
+    deck = Cards.standard_deck(shuffle=False).cards
+    indices = draw(
+        st.lists(st.integers(0, len(deck) - 1), min_size=4, max_size=6, unique=True)
+    )
+    split = draw(st.integers(1, len(indices) - 1))
+    return (
+        Cards([deck[i] for i in indices[:split]]),
+        Cards([deck[i] for i in indices[split:]]),
+    )
+
+
+@settings(max_examples=50, deadline=None)
+@given(hands=pegging_hands_strategy())
+def test_solver_matches_brute_force(hands):
+
+    solver = PeggingSolver()
+    position = solver.position(hands[0], hands[1], Cards.empty())
+
+    assert solver.value(position) == _brute_force_value(list(hands), 0, [])
+
+
+def test_best_card_takes_obvious_points():
+
+    solver = PeggingSolver()
+
+    # 5 makes 15, and leaves the other player nothing to pair
+    assert (
+        solver.best_card(
+            Cards.from_string("5H KD"), Cards.from_string("9C"), Cards.from_string("TS")
+        )
+        == Cards.from_string("5H")[0]
+    )
+
+    card = solver.sampled_best_card(
+        Cards.from_string("5H KD"),
+        Cards.from_string("9C 8C 7C 2S"),
+        1,
+        Cards.from_string("TS"),
+        SamplingOptions(n_samples=5, rng=np.random.default_rng(0)),
+    )
+    assert card == Cards.from_string("5H")[0]
+
+
+def test_save_and_load(tmp_path):
+
+    solver = PeggingSolver()
+    position = solver.position(
+        Cards.from_string("AH 4D 7C TS"),
+        Cards.from_string("2H 3D 9C KS"),
+        Cards.empty(),
+    )
+    value = solver.value(position)
+
+    loaded = PeggingSolver.load(solver.save(tmp_path / "pegging.pkl"))
+    assert len(loaded) == len(solver)
+    assert loaded.table[position] == value
+
+
+def test_solver_players_play_a_game():
+
+    for perfect_information in (True, False):
+        players = Players(
+            [
+                PeggingSolverCribbagePlayer(
+                    is_dealer=True,
+                    name="Alice",
+                    seat_position=1,
+                    perfect_information=perfect_information,
+                    n_samples=2,
+                ),
+                RandomCribbagePlayer(is_dealer=False, name="Bob", seat_position=2),
+            ]
+        )
+
+        winner = Cribbage(players, seed=0).play()
+        assert winner.score >= 121
@@ -0,0 +1,117 @@
+# pylint: disable=missing-function-docstring,protected-access
+
+import numpy as np
+import pytest
+
+from pycards.games.cribbage.events import DealEvent, PegEvent
+from pycards.games.cribbage.records import (
+    NO_ENTRY,
+    RECORD_DTYPE,
+    GameRecordWriter,
+    concatenate_game_records,
+    empty_record,
+    read_game_records,
+)
+from tests.games.cribbage.test_cribbage import make_basic_cribbage_game
+
+
+def test_records_match_the_games(tmp_path):
+
+    path = tmp_path / "games.bin"
+    games = []
+    events = []
+    with GameRecordWriter(path, buffer_size=3) as writer:
+        for n_players in [2, 3, 4]:
+            game = make_basic_cribbage_game(n_players)
+            writer.record(game)
+            game.subscribe(events.append)
+            game.play()
+            games.append(game)
+
+    records = read_game_records(path)
+    assert isinstance(records, np.memmap)
+    assert records.dtype == RECORD_DTYPE
+    assert len(records) == sum(isinstance(event, DealEvent) for event in events)
+    assert records["game"].tolist() == sorted(records["game"].tolist())
+
+    for game_number, game in enumerate(games):
+        game_records = records[records["game"] == game_number]
+        n_players = game.n_players
+
+        assert (game_records["n_players"] == n_players).all()
+        assert game_records["turn"].tolist() == list(range(1, len(game_records) + 1))
+        assert (game_records["winner"][:-1] == NO_ENTRY).all()
+        assert game_records["winner"][-1] == list(game.players).index(
+            game._find_winner()
+        )
+
+        final_scores = game_records["scores"][-1, :n_players].tolist()
+        assert final_scores == [player.score for player in game.players]
+
+        points = game_records["pegging_points"][:, :n_players].astype(int).sum(
+            axis=0
+        ) + game_records["hand_points"][:, :n_players].sum(axis=0)
+        for record in game_records:
+            points[record["dealer"]] += record["turn_up_points"]
+            points[record["dealer"]] += record["crib_points"]
+        assert points.tolist() == final_scores
+
+    first_record = records[0]
+    n_dealt = 6 if games[0].n_players == 2 else 5
+    dealt = first_record["hands"][:2]
+    assert (dealt[:, :n_dealt] != NO_ENTRY).all()
+    assert (dealt[:, n_dealt:] == NO_ENTRY).all()
+
+    first_pegs = []
+    for event in events:
+        if isinstance(event, PegEvent):
+            first_pegs.append(event.card.index)
+        elif isinstance(event, DealEvent) and first_pegs:
+            break
+    n_pegged = len(first_pegs)
+    assert first_record["pegged_cards"][:n_pegged].tolist() == first_pegs
+    assert (first_record["pegged_cards"][n_pegged:] == NO_ENTRY).all()
+    assert sorted(first_record["crib"].tolist()) == sorted(
+        first_record["discards"][:2].ravel().tolist()
+    )
+
+
+def test_concatenate_and_read_errors(tmp_path):
+
+    paths = []
+    for i in range(2):
+        paths.append(tmp_path / f"part{i}.bin")
+        with GameRecordWriter(paths[-1], first_game=i) as writer:
+            game = make_basic_cribbage_game(2)
+            writer.record(game)
+            game.play()
+
+    records = read_game_records(concatenate_game_records(paths, tmp_path / "all.bin"))
+    assert len(records) == sum(len(read_game_records(path)) for path in paths)
+    assert set(records["game"].tolist()) == {0, 1}
+
+    with GameRecordWriter(tmp_path / "empty.bin"):
+        pass
+    assert len(read_game_records(tmp_path / "empty.bin")) == 0
+
+    (tmp_path / "bad.bin").write_bytes(b"PCCT\x01\x00\x60\x00")
+    with pytest.raises(ValueError):
+        read_game_records(tmp_path / "bad.bin")
+
+    (tmp_path / "short.bin").write_bytes(paths[0].read_bytes()[:-1])
+    with pytest.raises(ValueError):
+        read_game_records(tmp_path / "short.bin")
+
+
+def test_writer_closes_the_file_on_errors(tmp_path):
+
+    writer = GameRecordWriter(tmp_path / "games.bin")
+    with pytest.raises(ValueError):
+        writer.flush()
+
+    with pytest.raises(RuntimeError):
+        with writer:
+            writer.write(empty_record())
+            raise RuntimeError
+    assert writer._file is None
+    assert len(read_game_records(tmp_path / "games.bin")) == 1
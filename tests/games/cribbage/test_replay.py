@@ -0,0 +1,87 @@
+# pylint: disable=missing-function-docstring,protected-access
+
+import numpy as np
+import pytest
+
+from pycards.cards import Card, Cards
+from pycards.games.cribbage.cribbage import Cribbage
+from pycards.games.cribbage.records import GameRecordWriter, read_game_records
+from pycards.games.cribbage.replay import (
+    ReplayRules,
+    _game_chunks,
+    mismatched_records,
+    replay_records,
+    rescore_records,
+    verify_records,
+)
+from tests.games.cribbage.test_cribbage import make_basic_cribbage_game
+
+
+def _record_games(path, n_games=3):
+
+    with GameRecordWriter(path) as writer:
+        for i in range(n_games):
+            game = make_basic_cribbage_game(2 + i % 3)
+            writer.record(game)
+            game.play()
+
+    return read_game_records(path)
+
+
+def _score_nothing(hand: Cards, turn_up_card: Card, is_crib: bool) -> int:
+
+    return 0
+
+
+def test_replay_matches_the_recorded_games(tmp_path):
+
+    path = tmp_path / "games.bin"
+    _record_games(path, n_games=6)
+
+    assert len(verify_records(path)) == 0
+    assert len(verify_records(path, n_processes=2, chunk_size=10)) == 0
+
+    rules = ReplayRules(pegging_scorer=Cribbage.score_pegging_contribution)
+    assert len(verify_records(path, rules=rules)) == 0
+
+
+def test_rescore_with_a_different_scorer(tmp_path):
+
+    path = tmp_path / "games.bin"
+    records = _record_games(path, n_games=6)
+
+    rules = ReplayRules(winning_points=1000, hand_scorer=_score_nothing)
+    rescored = rescore_records(path, rules)
+    assert (rescored["hand_points"] == 0).all()
+    assert (rescored["crib_points"] == 0).all()
+    assert (rescored["winner"] == 255).all()
+    assert (rescored["pegging_points"] == records["pegging_points"]).all()
+    scored_hands = (records["hand_points"].sum(axis=1) + records["crib_points"]) > 0
+    assert set(np.flatnonzero(scored_hands).tolist()) <= set(
+        mismatched_records(records, rescored).tolist()
+    )
+
+    for game in set(records["game"].tolist()):
+        game_records = rescored[rescored["game"] == game]
+        points = game_records["pegging_points"].astype(int)
+        for points_row, record in zip(points, game_records):
+            points_row[record["dealer"]] += record["turn_up_points"]
+        assert (game_records["scores"] == points.cumsum(axis=0)).all()
+
+
+def test_replay_rejects_impossible_pegging(tmp_path):
+
+    records = np.array(_record_games(tmp_path / "games.bin", n_games=1))
+    records["pegged_cards"][0, 0] = records["crib"][0, 0]
+
+    with pytest.raises(ValueError):
+        replay_records(records)
+
+
+def test_game_chunks_keep_games_together():
+
+    records = np.zeros(10, dtype=[("game", "<u4")])
+    records["game"] = [0, 0, 0, 1, 1, 2, 2, 2, 2, 3]
+
+    assert _game_chunks(records, 2) == [(0, 3), (3, 5), (5, 9), (9, 10)]
+    assert _game_chunks(records, 100) == [(0, 10)]
@@ -0,0 +1,97 @@
+# pylint: disable=missing-function-docstring,protected-access
+
+import csv
+
+from pycards.cards import Card, Cards
+from pycards.games.cribbage.cribbage import Cribbage
+from pycards.games.cribbage.score_cache import (
+    ScoreCache,
+    score_cache_stats,
+    score_caches,
+    score_caches_enabled,
+)
+from pycards.util import get_repo_root
+from tests.games.cribbage.test_cribbage import make_basic_cribbage_game
+
+
+def test_eviction_policies():
+
+    for policy, kept in (("lru", {1, 3}), ("fifo", {2, 3})):
+        cache = ScoreCache(capacity=2, policy=policy)
+        cache.put(1, 10)
+        cache.put(2, 20)
+        assert cache.get(1) == 10
+        cache.put(3, 30)
+
+        assert {key for key in (1, 2, 3) if cache.get(key) is not None} == kept
+        assert cache.stats.evictions == 1
+        assert len(cache) == 2
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.stats.hits == 0
+
+
+def test_caches_are_opt_in():
+
+    assert not score_caches_enabled()
+    assert not score_cache_stats()
+
+    with score_caches(capacity=10):
+        assert score_caches_enabled()
+        for _ in range(3):
+            Cribbage.score_hand(
+                Cards.from_string("5H 5D JC TS"), Cards.from_string("5S")[0]
+            )
+        stats = score_cache_stats()["hand"]
+        assert (stats.hits, stats.misses) == (2, 1)
+        assert stats.hit_rate == 2 / 3
+
+    assert not score_caches_enabled()
+
+
+def test_cached_scores_are_correct():
+
+    repo_root = get_repo_root()
+
+    with score_caches(capacity=1000, policy="fifo"):
+        # twice, so the second time round scores come from the cache
+        for _ in range(2):
+            with (repo_root / "tests/data/cribbage_hands.csv").open() as f:
+                f.readline()
+                for cards, turn_up, is_crib, score in csv.reader(f):
+                    assert Cribbage.score_hand(
+                        Cards.from_string(cards),
+                        Card.from_string(turn_up),
+                        is_crib == "1",
+                    ) == int(score)
+
+            with (repo_root / "tests/data/cribbage_pegging_sequences.csv").open() as f:
+                f.readline()
+                for cards_str, last_card, score_sequence in csv.reader(f):
+                    cards = Cards.from_string(cards_str)
+                    scores = [
+                        Cribbage.score_pegging_contribution(
+                            cards[: i + 1], last_card == "1" and i == len(cards) - 1
+                        )
+                        for i in range(len(cards))
+                    ]
+                    assert scores == list(map(int, score_sequence.split(",")))
+
+        stats = score_cache_stats()
+        assert stats["hand"].hits > 0 and stats["pegging"].hits > 0
+
+
+def test_cached_games_play_the_same():
+
+    def play_seeded_game():
+        game = Cribbage(make_basic_cribbage_game(n_players=3).players, seed=7)
+        events = []
+        game.subscribe(events.append)
+        game.play()
+        return [event for event in events if hasattr(event, "points")]
+
+    uncached = play_seeded_game()
+    with score_caches(capacity=1000):
+        assert play_seeded_game() == uncached
+        assert score_cache_stats()["pegging"].hits > 0
@@ -0,0 +1,110 @@
+# pylint: disable=missing-function-docstring,protected-access
+
+import numpy as np
+import pytest
+
+from pycards.cards import (
+    CARDS_BY_INDEX,
+    DECK_SIZE,
+    Cards,
+    canonical_card_sets,
+    canonical_form,
+)
+from pycards.games.cribbage.cribbage import Cribbage
+from pycards.games.cribbage.score_distributions import (
+    DISTRIBUTION_DTYPE,
+    ScoreDistribution,
+    ScoreDistributionTable,
+    _chunk_path,
+    analyse_hands,
+    generate_score_distributions,
+    hold_distribution,
+    write_score_distributions,
+)
+
+
+def _score_counts(hand: Cards, discard: Cards):
+
+    hold = Cards([card for card in hand if card not in discard])
+    counts = [0] * 30
+    for turn_up in CARDS_BY_INDEX:
+        if turn_up not in hand:
+            counts[Cribbage.score_hand(hold, turn_up)] += 1
+
+    return tuple(counts)
+
+
+def test_distributions_match_scoring(tmp_path):
+
+    rng = np.random.default_rng(0)
+    hands = [
+        Cards.from_indices(rng.choice(DECK_SIZE, n_cards, replace=False).tolist())
+        for n_cards in (5, 6)
+        for _ in range(10)
+    ]
+    path = write_score_distributions(
+        analyse_hands([canonical_form(hand.indices()).groups[0] for hand in hands]),
+        tmp_path / "distributions.bin",
+    )
+
+    table = ScoreDistributionTable(path)
+    assert len(table) == 10 * 5 + 10 * 15
+
+    for hand in hands:
+        for position in range(len(hand) - 4):
+            discard = Cards(hand.cards[position : position + len(hand) - 4])
+            distribution = table.hold_distribution(hand, discard)
+            assert distribution.counts == _score_counts(hand, discard)
+            assert distribution.n_turn_ups == DECK_SIZE - len(hand)
+
+    with pytest.raises(KeyError):
+        table.hold_distribution(
+            Cards.from_string("AH 2H 3H 4H 5H"), Cards.from_string("AH")
+        )
+    with pytest.raises(ValueError):
+        table.hold_distribution(hands[0], Cards.from_string("AH 2H"))
+
+
+def test_score_distribution_statistics():
+
+    distribution = ScoreDistribution((1, 0, 2, 1) + (0,) * 26)
+
+    assert distribution.n_turn_ups == 4
+    assert distribution.mean == 1.75
+    assert distribution.variance == pytest.approx(1.1875)
+    assert distribution.probability_at_least(2) == 0.75
+    assert distribution.probability_at_least(0) == 1.0
+
+
+def test_generate_resumes_from_checkpoint(tmp_path):
+
+    # pretend all but the last few hundred 5 card hands have been checkpointed
+    checkpoint_dir = tmp_path / "checkpoint"
+    checkpoint_dir.mkdir()
+    np.save(_chunk_path(checkpoint_dir, 5, 0, 134000), np.zeros(0, DISTRIBUTION_DTYPE))
+
+    path = generate_score_distributions(
+        tmp_path / "distributions.bin",
+        hand_sizes=(5,),
+        n_processes=1,
+        chunk_size=134000,
+        checkpoint_dir=checkpoint_dir,
+    )
+
+    assert _chunk_path(checkpoint_dir, 5, 134000, 134459).exists()
+    assert len(ScoreDistributionTable(path)) == 459 * 5
+
+    hand = Cards.from_indices(list(canonical_card_sets(5))[-1].groups[0])
+    discard = Cards(hand.cards[:1])
+    assert hold_distribution(hand, discard, path).counts == _score_counts(hand, discard)
+
+
+def test_bad_files_are_rejected(tmp_path):
+
+    (tmp_path / "short.bin").write_bytes(b"PCSD")
+    with pytest.raises(ValueError):
+        ScoreDistributionTable(tmp_path / "short.bin")
+
+    (tmp_path / "bad.bin").write_bytes(b"XXXX" + bytes(100))
+    with pytest.raises(ValueError):
+        ScoreDistributionTable(tmp_path / "bad.bin")
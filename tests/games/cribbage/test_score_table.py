@@ -0,0 +1,89 @@
+# pylint: disable=missing-function-docstring,protected-access
+
+import struct
+
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+
+from pycards.cards import Cards
+from pycards.games.cribbage.score_table import (
+    HEADER_FORMAT,
+    N_RANK_MULTISETS,
+    SCORE_TABLE_MAGIC,
+    ScoreTable,
+    load_default_score_table,
+    rank_multiset_index,
+    write_score_table,
+)
+from pycards.games.cribbage.util import score_fifteens_pairs_and_runs
+
+
+def test_rank_multiset_index_is_a_bijection():
+
+    indices = set()
+    for ranks in (
+        (r0, r1, r2, r3, r4)
+        for r0 in range(13)
+        for r1 in range(r0, 13)
+        for r2 in range(r1, 13)
+        for r3 in range(r2, 13)
+        for r4 in range(r3, 13)
+    ):
+        indices.add(rank_multiset_index(ranks))
+
+    assert indices == set(range(N_RANK_MULTISETS))
+    assert rank_multiset_index([4, 0, 12, 4, 7]) == rank_multiset_index(
+        [0, 4, 4, 7, 12]
+    )
+
+
+@given(
+    cards=st.lists(
+        st.sampled_from(Cards.standard_deck(shuffle=False).cards),
+        min_size=5,
+        max_size=5,
+        unique=True,
+    )
+)
+def test_default_table_matches_enumeration(cards):
+
+    score_table = load_default_score_table()
+    assert score_table is not None
+
+    hand = Cards(cards[:4])
+    assert score_table.score_fifteens_pairs_and_runs(
+        hand, cards[4]
+    ) == score_fifteens_pairs_and_runs(Cards(cards))
+
+
+def test_write_and_load_score_table(tmp_path):
+
+    path = write_score_table(tmp_path / "table.bin")
+    score_table = ScoreTable(path)
+
+    assert len(score_table) == N_RANK_MULTISETS
+    # 5 5 5 J + 5 is the best hand, apart from nobs
+    assert score_table.score_ranks([4, 4, 4, 4, 10]) == 28
+
+
+def test_score_table_rejects_bad_files(tmp_path):
+
+    path = write_score_table(tmp_path / "table.bin")
+    table = path.read_bytes()
+
+    wrong_version = tmp_path / "wrong_version.bin"
+    wrong_version.write_bytes(
+        struct.pack(HEADER_FORMAT, SCORE_TABLE_MAGIC, 999, N_RANK_MULTISETS)
+        + table[struct.calcsize(HEADER_FORMAT) :]
+    )
+
+    wrong_magic = tmp_path / "wrong_magic.bin"
+    wrong_magic.write_bytes(b"XXXX" + table[4:])
+
+    truncated = tmp_path / "truncated.bin"
+    truncated.write_bytes(table[:-1])
+
+    for bad_path in (wrong_version, wrong_magic, truncated):
+        with pytest.raises(ValueError):
+            ScoreTable(bad_path)
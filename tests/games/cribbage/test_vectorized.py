@@ -0,0 +1,53 @@
+# pylint: disable=missing-function-docstring,protected-access
+
+import csv
+
+import numpy as np
+import pytest
+
+from pycards.cards import Card, Cards
+from pycards.games.cribbage.cribbage import Cribbage
+from pycards.games.cribbage.vectorized import score_hands
+from pycards.util import get_repo_root
+
+
+def test_score_hands_matches_example_hands():
+
+    repo_root = get_repo_root()
+    example_hands_file = repo_root / "tests/data/cribbage_hands.csv"
+
+    hands, turn_ups, is_cribs, scores = [], [], [], []
+    with example_hands_file.open() as f:
+        reader = csv.reader(f)
+        f.readline()
+        for cards, turn_up, is_crib, score in reader:
+            hands.append(Cards.from_string(cards).indices())
+            turn_ups.append(Card.from_string(turn_up).index)
+            is_cribs.append(is_crib == "1")
+            scores.append(int(score))
+
+    assert score_hands(hands, turn_ups, np.array(is_cribs)).tolist() == scores
+
+
+def test_score_hands_matches_score_hand():
+
+    rng = np.random.default_rng(0)
+    n_hands = 5000
+    deals = np.array([rng.permutation(52)[:5] for _ in range(n_hands)])
+    is_crib = rng.random(n_hands) < 0.5
+
+    vectorised_scores = score_hands(deals[:, :4], deals[:, 4], is_crib)
+
+    for deal, crib, score in zip(deals, is_crib, vectorised_scores):
+        hand = Cards.from_indices(deal[:4])
+        turn_up = Card.from_index(deal[4])
+        assert Cribbage.score_hand(hand, turn_up, crib) == score
+
+
+def test_score_hands_validates_shapes():
+
+    with pytest.raises(ValueError):
+        score_hands(np.zeros((3, 5), dtype=int), np.zeros(3, dtype=int))
+
+    with pytest.raises(ValueError):
+        score_hands(np.zeros((3, 4), dtype=int), np.zeros(2, dtype=int))
@@ -0,0 +1,103 @@
+# pylint: disable=missing-function-docstring,protected-access
+
+"""
+Tests for the pure Python and NumPy backends
+"""
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from pycards import backends
+from pycards.backends import PythonRandom, get_backend, set_backend
+from pycards.cards import DECK_SIZE, Deck
+from pycards.games.cribbage.cribbage import Cribbage
+from pycards.util import get_repo_root
+from tests.games.cribbage.test_cribbage import make_basic_cribbage_game
+
+
+@pytest.fixture(name="restore_backend")
+def fixture_restore_backend():
+
+    default = dict(backends._default)
+    yield
+    backends._default.clear()
+    backends._default.update(default)
+
+
+def test_backends_score_hands_the_same():
+
+    rng = np.random.default_rng(0)
+    decks = get_backend("numpy").shuffled_decks(500, DECK_SIZE, rng).astype(np.int64)
+    hands, turn_ups = decks[:, :4], decks[:, 4]
+
+    for is_crib in (False, True):
+        assert get_backend("python").score_hands(
+            hands.tolist(), turn_ups.tolist(), is_crib
+        ) == (get_backend("numpy").score_hands(hands, turn_ups, is_crib).tolist())
+
+
+def test_python_random():
+
+    rng = PythonRandom(0)
+
+    assert all(0 <= rng.integers(3) < 3 for _ in range(100))
+    assert all(5 <= rng.integers(5, 7) < 7 for _ in range(100))
+    assert rng.choice("abc") in "abc"
+    assert len(set(rng.choice(10, size=10, replace=False))) == 10
+    assert len(rng.choice([1, 2], size=5)) == 5
+    assert 0 <= rng.random() < 1
+
+    assert PythonRandom("seed").random() == PythonRandom("seed").random()
+
+    with pytest.raises(TypeError):
+        get_backend("numpy").shuffled_decks(1, DECK_SIZE, PythonRandom(0))
+
+
+def test_games_are_reproducible_with_either_backend(restore_backend):
+
+    for name in ("python", "numpy"):
+        set_backend(name)
+        scores = []
+        for _ in range(2):
+            game = make_basic_cribbage_game(3)
+            game = Cribbage(game.players, seed=7)
+            game.play()
+            scores.append([player.score for player in game.players])
+        assert scores[0] == scores[1]
+
+        deck = Deck.standard(rng=get_backend().default_rng(0))
+        assert sorted(deck.indices()) == list(range(52))
+
+
+def test_unknown_backend():
+
+    with pytest.raises(ValueError):
+        get_backend("fortran")
+
+
+def test_importing_the_game_does_not_import_numpy():
+
+    code = (
+        "import sys, pycards.games.cribbage.cribbage, pycards.games.cribbage.players;"
+        " assert 'numpy' not in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=get_repo_root())
+
+
+def test_scoring_with_the_python_backend_does_not_import_numpy():
+
+    code = (
+        "import sys; from pycards.games.cribbage import score_hands;"
+        " assert score_hands([[0, 1, 2, 3]], [4]) == [12];"
+        " assert 'numpy' not in sys.modules"
+    )
+    subprocess.run(
+        [sys.executable, "-c", code],
+        check=True,
+        cwd=get_repo_root(),
+        env={**os.environ, backends.BACKEND_ENV_VAR: "python"},
+    )
@@ -4,11 +4,29 @@
 Test for the cards objects and associated methods
 """
 
+import copy
+import pickle
+from collections import Counter
+from itertools import combinations
+from math import comb
+
 import numpy as np
 import pytest
-from hypothesis import given
-
-from pycards.cards import Card, Cards, FaceValue, Suit
+from hypothesis import assume, given, settings
+
+from pycards.backends import PythonRandom, get_backend
+from pycards.cards import (
+    DECK_SIZE,
+    Card,
+    Cards,
+    CardSet,
+    Deck,
+    FaceValue,
+    Suit,
+    canonical_card_sets,
+    canonical_form,
+    shuffled_decks,
+)
 from tests.strategies import cards_strategy
 
 
@@ -72,6 +90,27 @@ def test_card_from_string():
             Card.from_string(bad_string)
 
 
+def test_cards_are_interned():
+
+    ace_of_hearts = Card(suit=Suit.HEARTS, value=FaceValue.ACE)
+
+    assert ace_of_hearts is Card(Suit.HEARTS, FaceValue.ACE)
+    assert ace_of_hearts is Card.from_string("AH")
+    assert ace_of_hearts is Card.from_string("ah")
+    assert ace_of_hearts is Card.from_index(ace_of_hearts.index)
+    assert hash(ace_of_hearts) == ace_of_hearts.index
+
+    assert copy.copy(ace_of_hearts) is ace_of_hearts
+    assert copy.deepcopy(ace_of_hearts) is ace_of_hearts
+    assert pickle.loads(pickle.dumps(ace_of_hearts)) is ace_of_hearts
+
+    with pytest.raises(AttributeError):
+        ace_of_hearts.value = FaceValue.TWO
+
+    with pytest.raises(ValueError):
+        Card("H", "A")
+
+
 def test_make_standard_deck():
 
     standard_deck = Cards.standard_deck()
@@ -239,3 +278,195 @@ def test_suit_from_string():
         with pytest.raises(ValueError):
             Suit.from_string(invalid_string)
 
+
+def test_card_index_round_trip():
+
+    deck = Cards.standard_deck(shuffle=False)
+
+    assert deck.indices() == list(range(DECK_SIZE))
+    for card in deck:
+        assert Card.from_index(card.index) == card
+
+    assert Cards.from_indices(deck.indices()) == deck
+
+    for bad_index in (-1, DECK_SIZE):
+        with pytest.raises(ValueError):
+            Card.from_index(bad_index)
+
+
+@given(cards=cards_strategy())
+def test_card_set_matches_python_set(cards):
+
+    card_set = cards.to_card_set()
+
+    assert len(card_set) == len(set(cards))
+    assert set(card_set) == set(cards)
+    assert all(card in card_set for card in cards)
+    assert card_set.indices() == sorted({card.index for card in cards})
+
+
+def test_card_set_operations():
+
+    hand = Cards.from_string("AH 2H 3H 4H").to_card_set()
+    other = Cards.from_string("3H 4H 5S").to_card_set()
+
+    assert set(hand | other) == set(Cards.from_string("AH 2H 3H 4H 5S"))
+    assert set(hand & other) == set(Cards.from_string("3H 4H"))
+    assert set(hand - other) == set(Cards.from_string("AH 2H"))
+
+    assert Card.from_string("5S") not in hand
+    assert Card.from_string("5S") in hand.add(Card.from_string("5S"))
+    assert Card.from_string("AH") not in hand.remove(Card.from_string("AH"))
+    with pytest.raises(KeyError):
+        hand.remove(Card.from_string("5S"))
+
+    assert len(CardSet.full()) == DECK_SIZE
+    assert not CardSet()
+    assert CardSet.full().to_cards() == Cards.standard_deck(shuffle=False)
+
+
+def test_in_place_mutation():
+
+    cards = Cards.from_string("AH 2H")
+    same_cards = cards
+
+    cards += Card.from_string("3H")
+    cards += Cards.from_string("4H 5H")
+    cards.append(Card.from_string("6H"))
+    cards.extend(Cards.from_string("7H 8H"))
+
+    assert same_cards is cards
+    assert cards == Cards.from_string("AH 2H 3H 4H 5H 6H 7H 8H")
+
+    with pytest.raises(TypeError):
+        cards += "9H"
+
+
+def test_copies_share_cards_but_not_lists():
+
+    cards = Cards.from_string("AH 2H 3H")
+
+    for copied in (cards.copy(), copy.copy(cards), copy.deepcopy(cards)):
+        assert copied == cards
+        assert all(c1 is c2 for c1, c2 in zip(copied, cards))
+
+        copied.play_card(copied[0])
+        assert len(copied) == 2
+        assert len(cards) == 3
+
+
+def test_count_straights_and_flushes():
+
+    example_hand = Cards.from_string("5S 5D 6H 7C 7D 9C TC JC")
+    assert example_hand.face_value_counts() == [0, 0, 0, 0, 2, 1, 2, 0, 1, 1, 1, 0, 0]
+    assert example_hand.suit_counts() == [1, 1, 2, 4]
+
+    assert example_hand.count_straights(3, 5) == [(4, 3, 4), (8, 3, 1)]
+    assert example_hand.count_straights(4, 5) == []
+    assert example_hand.count_flushes(2, 4) == [4, 2]
+    assert example_hand.count_flushes(3, 3) == []
+
+    assert Cards.empty().count_straights(1, 5) == []
+    assert Cards.empty().get_straights(1, 5) == []
+
+
+@settings(deadline=None)
+@given(cards=cards_strategy())
+def test_counts_match_materialised_patterns(cards):
+
+    for min_length, max_length in ((1, 13), (3, 5), (4, 4)):
+        run_counts = cards.count_straights(min_length, max_length)
+        # the number of straights grows exponentially with duplicate values
+        assume(sum(run.multiplicity for run in run_counts) <= 10_000)
+        straights = cards.get_straights(min_length, max_length)
+
+        assert len(straights) == sum(run.multiplicity for run in run_counts)
+        assert sorted(map(len, straights)) == sorted(
+            run.length for run in run_counts for _ in range(run.multiplicity)
+        )
+
+        flushes = cards.get_flushes(min_length, max_length)
+        assert list(map(len, flushes)) == cards.count_flushes(min_length, max_length)
+
+
+def test_deck_deals_from_the_top():
+
+    deck = Deck.standard(shuffle=False)
+    assert list(deck) == Cards.standard_deck(shuffle=False).cards
+
+    assert deck.deal_card() == Card.from_index(0)
+    assert deck.deal_cards(3) == Cards.from_indices([1, 2, 3])
+    assert len(deck) == DECK_SIZE - 4
+    assert Card.from_index(2) not in deck
+
+    deck.reset()
+    assert len(deck) == DECK_SIZE
+    assert deck.deal_card() == Card.from_index(0)
+
+    deck.deal_cards(len(deck))
+    with pytest.raises(IndexError):
+        deck.deal_card()
+
+
+def test_deck_random_cards_and_refills():
+
+    rng = np.random.default_rng(0)
+    deck = Deck.standard(rng=rng)
+
+    dealt = Cards([deck.play_random_card(rng) for _ in range(50)])
+    assert len(deck) == 2
+    assert set(dealt + deck.to_cards()) == set(Cards.standard_deck())
+
+    remaining = deck.indices()
+    deck.add_to_bottom(dealt, rng=rng)
+    assert len(deck) == DECK_SIZE
+    assert deck.indices()[:2] == remaining
+    assert set(deck) == set(Cards.standard_deck())
+
+    deck.add_to_bottom(Cards.from_string("AH 2H"), shuffle=False)
+    assert list(deck)[-2:] == Cards.from_string("AH 2H").cards
+
+
+def test_shuffled_decks():
+
+    decks = get_backend("numpy").shuffled_decks(
+        100, DECK_SIZE, np.random.default_rng(0)
+    )
+
+    assert decks.shape == (100, DECK_SIZE)
+    assert decks.dtype == np.int8
+    assert (np.sort(decks, axis=1) == np.arange(DECK_SIZE)).all()
+    assert len({deck.tobytes() for deck in decks}) == 100
+
+    decks = get_backend("python").shuffled_decks(100, DECK_SIZE, PythonRandom(0))
+    assert all(sorted(deck) == list(range(DECK_SIZE)) for deck in decks)
+    assert len({bytes(deck) for deck in decks}) == 100
+
+    assert len(shuffled_decks(3)) == 3
+
+
+def test_canonical_form():
+
+    form = canonical_form(
+        Cards.from_string("AH 2H 3D").indices(), [Card.from_string("3S").index]
+    )
+    other = canonical_form(
+        Cards.from_string("AC 2C 3S").indices(), [Card.from_string("3H").index]
+    )
+    assert form == other._replace(suit_map=form.suit_map)
+    assert form.weight == 24
+
+    form = canonical_form(Cards.from_string("AH AD AS AC").indices())
+    assert form.groups == ((0, 13, 26, 39),)
+    assert form.weight == 1
+
+
+def test_canonical_card_sets_cover_every_set():
+
+    weights = Counter(
+        canonical_form(indices).groups for indices in combinations(range(DECK_SIZE), 3)
+    )
+    forms = list(canonical_card_sets(3))
+
+    assert {form.groups: form.weight for form in forms} == weights
+    assert sum(form.weight for form in canonical_card_sets(4)) == comb(DECK_SIZE, 4)
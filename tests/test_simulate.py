@@ -0,0 +1,139 @@
+# pylint: disable=missing-function-docstring,protected-access
+
+"""
+Tests for the headless simulation runner
+"""
+
+import pytest
+
+from pycards.games.cribbage.instrumentation import Instrumentation
+from pycards.games.cribbage.players import (
+    ExpectedValueCribbagePlayer,
+    RandomCribbagePlayer,
+)
+from pycards.games.cribbage.records import read_game_records
+from pycards.simulate import (
+    GameChunk,
+    SimulationConfig,
+    SimulationResult,
+    play_games,
+    resolve_strategy,
+    simulate,
+)
+
+
+class ClosingPlayer(RandomCribbagePlayer):
+    """
+    Counts how many players have been closed
+    """
+
+    n_closed = 0
+
+    def close(self):
+        ClosingPlayer.n_closed += 1
+
+
+def test_resolve_strategy():
+
+    assert resolve_strategy("RandomCribbagePlayer") is RandomCribbagePlayer
+    assert (
+        resolve_strategy("pycards.games.cribbage.players.ExpectedValueCribbagePlayer")
+        is ExpectedValueCribbagePlayer
+    )
+
+    for bad_name in ("NotAPlayer", "pycards.players.Players", "CribbagePlayerz"):
+        with pytest.raises(ValueError):
+            resolve_strategy(bad_name)
+
+
+def test_simulation_result_aggregates():
+
+    result = SimulationResult(4, 3, 1, 20, 1.0) + SimulationResult(6, 1, 5, -10, 2.0)
+
+    assert result == SimulationResult(10, 4, 6, 10, 3.0)
+    assert result.first_win_rate == 0.4
+    assert result.second_win_rate == 0.6
+    assert result.average_margin == 1.0
+    assert SimulationResult().first_win_rate == 0.0
+
+
+def test_simulate_is_reproducible():
+
+    strategies = ("RandomCribbagePlayer", "RandomCribbagePlayer")
+
+    config = SimulationConfig(n_processes=1, chunk_size=3, seed=5)
+
+    result = simulate(strategies, n_games=7, config=config)
+    assert result.n_games == 7
+    assert result.first_wins + result.second_wins == 7
+
+    repeat = simulate(strategies, n_games=7, config=config)
+    assert (repeat.first_wins, repeat.total_margin) == (
+        result.first_wins,
+        result.total_margin,
+    )
+
+
+def test_simulate_collects_instrumentation():
+
+    strategies = ("RandomCribbagePlayer", "RandomCribbagePlayer")
+
+    result = simulate(
+        strategies,
+        n_games=5,
+        config=SimulationConfig(
+            n_processes=2,
+            chunk_size=2,
+            seed=5,
+            instrumentation=Instrumentation(profile_every=2),
+        ),
+    )
+
+    assert result.instrumentation.n_games == 5
+    assert result.instrumentation.phases["deal"].calls >= 5
+    # games 1 and 3 of each chunk (of 2, 2 and 1 games) are profiled
+    assert len(result.instrumentation.profiles) == 3
+
+    assert (
+        simulate(
+            strategies, n_games=2, config=SimulationConfig(n_processes=1)
+        ).instrumentation
+        is None
+    )
+
+
+def test_simulate_records_games(tmp_path):
+
+    path = tmp_path / "games.bin"
+    result = simulate(
+        ("RandomCribbagePlayer", "RandomCribbagePlayer"),
+        n_games=5,
+        config=SimulationConfig(n_processes=1, chunk_size=2, seed=0, record_path=path),
+    )
+
+    records = read_game_records(path)
+    assert set(records["game"].tolist()) == set(range(5))
+    # the first strategy sits at seat 0 in the even numbered games
+    last_rounds = records[records["winner"] != 255]
+    first_wins = (last_rounds["winner"] == last_rounds["game"] % 2).sum()
+    assert first_wins == result.first_wins
+    assert (last_rounds["winner"] == 0).sum() == result.first_seat_wins
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_play_games_closes_the_players():
+
+    ClosingPlayer.n_closed = 0
+    play_games(
+        ("tests.test_simulate.ClosingPlayer", "RandomCribbagePlayer"),
+        GameChunk(n_games=3, seed=0),
+    )
+
+    assert ClosingPlayer.n_closed == 3
+
+
+def test_simulation_config_rejects_empty_chunks():
+
+    for chunk_size in (0, -1):
+        with pytest.raises(ValueError):
+            SimulationConfig(chunk_size=chunk_size)